@@ -3,19 +3,37 @@ import os
 from dotenv import load_dotenv
 load_dotenv()                         # .env 파일 읽기
 
-from flask import Flask, request, jsonify, session
-from flask_socketio import SocketIO
+# eventlet/gevent 모드면 다른 모듈을 import 하기 전에 패치해야 함
+from async_runtime import ASYNC_MODE, monkey_patch
+monkey_patch()
+
+from logs import configure_logging
+configure_logging()                   # LOG_LEVEL (기본 INFO)
+
+from flask import Flask, request, jsonify, session, Response
 import mysql.connector
 
 # 분리된 모듈들 import
 from game_logic import Game
 from database import DB
-from socket_handlers import register_socket_handlers, get_games, get_bg_lock
+from socket_handlers import register_socket_handlers, get_games, get_participants, get_bg_lock, set_shard_pool
+from game_loop import GameLoop
+from shard_pool import ShardPool, GAME_SHARDS
+from lobby import LOBBY
+from input_limiter import INPUTS, RESYNCS
+from write_behind import WRITES
+from spectators import SPECTATORS
+from password_hasher import HASHER, HasherBusy
+from metrics import REGISTRY, MeteredSocketIO, gauge
+from cluster import CLUSTER
+from matchmaking import MATCHMAKER
 
 # ─────────── Flask + Socket.IO ───────────
 app = Flask(__name__, static_folder="../frontend/dist", static_url_path="/")
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "default-secret-key")   # 세션 서명에 사용
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
+# CLUSTER_BUS 를 지정하면 emit 이 클러스터 버스를 거쳐 모든 노드로 전달됨 (cluster.py)
+socketio = MeteredSocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,  # ASYNC_MODE: threading | eventlet | gevent
+                           client_manager=CLUSTER.client_manager())
 
 # CORS 헤더 추가
 @app.after_request
@@ -27,34 +45,82 @@ def after_request(response):
 
 # Socket.IO 핸들러 등록
 register_socket_handlers(socketio)
+CLUSTER.start(app, socketio)   # 클러스터 모드가 아니면 아무것도 하지 않음
 
 # ─────────── 백그라운드 루프 ───────────
+# 물리 단계와 전송 단계는 GameLoop 안에서 분리됨 (방마다 틱당 최대 1회 직렬화)
+# GAME_SHARDS > 0 이면 방들을 워커 프로세스에 나눠 돌리고 메인 프로세스는 입력 라우팅/전송만 담당
+game_loop = GameLoop(socketio, get_games())
+shard_pool = ShardPool(socketio, GAME_SHARDS, WRITES.skill_used) if GAME_SHARDS > 0 else None
+
 def loop():
-    games = get_games()
-    while True:
-        socketio.sleep(Game.TICK)
-        for r, g in games.items():
-            g.step()
-            socketio.emit("state", g.out(), room=r)
+    game_loop.run()
+
+@app.get("/api/loop_stats")
+def loop_stats():
+    # 방별 직렬화/전송 시간 프로파일링 카운터
+    if shard_pool is not None:
+        return jsonify(ok=True, **shard_pool.get_stats())
+    return jsonify(ok=True, rooms=game_loop.get_stats())
+
+# ─────────── 메트릭 (/metrics, Prometheus 텍스트 형식) ───────────
+# 상태 값은 수집 시점에 읽는 게이지로 등록 (샤드 모드에서는 워커 프로세스 안의 틱 히스토그램은 포함되지 않음)
+def _rooms_by_phase():
+    counts = {}
+    for g in list(get_games().values()):
+        phase = getattr(g, "phase", "remote")
+        counts[(phase,)] = counts.get((phase,), 0) + 1
+    return counts
+
+gauge("airhockey_rooms", "게임 중인 방 수 (단계별)", _rooms_by_phase, ("phase",))
+gauge("airhockey_participants", "게임 방에 들어온 플레이어 소켓 수",
+      lambda: sum(len(sids) for sids in list(get_participants().values())))
+gauge("airhockey_spectators", "관전자 소켓 수", lambda: len(SPECTATORS.viewing))
+gauge("airhockey_db_pool_size", "DB 커넥션 풀 크기", lambda: DB.pool_stats.size)
+gauge("airhockey_db_pool_in_use", "사용 중인 DB 커넥션 수", lambda: DB.pool_stats.in_use)
+gauge("airhockey_db_pool_timeouts", "커넥션을 기다리다 시간 초과된 누적 횟수", lambda: DB.pool_stats.timeouts)
+gauge("airhockey_write_behind_pending", "지연 쓰기 큐에 남은 항목 수", lambda: WRITES.stats()["pending"])
+gauge("airhockey_input_dropped", "속도 제한으로 버린 누적 패들 입력 수", lambda: INPUTS.dropped)
+gauge("airhockey_password_hash_in_flight", "처리 중인 비밀번호 해시 요청 수", lambda: HASHER.in_flight)
+gauge("airhockey_match_queued", "자동 매칭 큐에서 기다리는 플레이어 수", lambda: len(MATCHMAKER.waiting))
+gauge("airhockey_cluster_owned_rooms", "이 노드가 맡은 방 수 (클러스터 모드)", lambda: len(CLUSTER.owned_rooms()))
+
+@app.get("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 # ─────────── 회원가입 / 로그인 ───────────
+# 비밀번호 해시는 HASHER 의 프로세스 풀에서 계산. 워커/대기열이 가득 차거나 PASSWORD_HASH_TIMEOUT 안에 끝나지 않으면 429
+# (HasherTimeout 은 HasherBusy 의 하위 클래스)
 @app.post("/api/signup")
 def signup():
     data = request.get_json()
     try:
-        DB.create_user(data["username"], data["password"])
+        DB.create_user(data["username"], HASHER.hash(data["password"]))
         return jsonify(ok=True)
+    except HasherBusy:
+        return jsonify(ok=False, error="TOO_MANY_REQUESTS"), 429, {"Retry-After": "1"}
     except mysql.connector.errors.IntegrityError:
         return jsonify(ok=False, error="USERNAME_TAKEN"), 409
 
 @app.post("/api/login")
 def login():
     data = request.get_json()
-    if DB.verify_user(data["username"], data["password"]):
+    pw_hash = DB.get_pw_hash(data["username"])
+    try:
+        valid = pw_hash is not None and HASHER.verify(pw_hash, data["password"])
+    except HasherBusy:
+        return jsonify(ok=False, error="TOO_MANY_REQUESTS"), 429, {"Retry-After": "1"}
+    if valid:
         session["user"] = data["username"]
         return jsonify(ok=True)
     return jsonify(ok=False, error="INVALID_CRED"), 401
 
+@app.get("/api/auth_stats")
+def auth_stats():
+    # 비밀번호 해시 워커 풀 처리 중/거절 수, 해시·검증 지연 시간 (DB 시간 제외)
+    return jsonify(ok=True, **HASHER.stats())
+
 @app.get("/api/user/skills")
 def get_skills():
     # 더미 유저로 자동 로그인 (세션 없이도 작동)
@@ -63,26 +129,67 @@ def get_skills():
     skills = DB.get_user_skills(username)
     return jsonify(ok=True, skills=skills)
 
+@app.get("/api/cache_stats")
+def cache_stats():
+    # 스킬 카탈로그 / 유저 스킬 캐시 적중률
+    return jsonify(ok=True, **DB.get_cache_stats())
+
+@app.get("/api/input_stats")
+def input_stats():
+    # 패들 입력 수신/속도 제한으로 버림/틱 전에 합쳐짐 카운터 (resync: 키프레임 재요청 수신/버림)
+    return jsonify(ok=True, resync=RESYNCS.stats(), **INPUTS.stats())
+
+@app.get("/api/spectator_stats")
+def spectator_stats():
+    # 방별 관전자 수, 관전자 피드 인코딩/전송 시간
+    return jsonify(ok=True, **SPECTATORS.stats())
+
+@app.get("/api/db_stats")
+def db_stats():
+    # 커넥션 풀 대기 시간/사용 중 개수/쿼리별 지연 시간 (풀 크기 조정용)
+    return jsonify(ok=True, **DB.get_pool_stats())
+
+@app.get("/api/match_stats")
+def match_stats():
+    # 매칭 큐 대기 인원(버킷별), 짝지은 수, 평균 대기 시간
+    return jsonify(ok=True, **MATCHMAKER.stats())
+
+@app.get("/api/cluster_stats")
+def cluster_stats():
+    # 노드 id, 노드별로 맡은 방 수, 다른 노드로 넘긴/넘겨받은 이벤트 수
+    return jsonify(ok=True, **CLUSTER.stats())
+
+@app.get("/api/write_stats")
+def write_stats():
+    # 지연 쓰기 큐 깊이/버린 항목/플러시 시간
+    return jsonify(ok=True, **WRITES.stats())
+
 @app.post("/api/make_room")
 def make_room():
     data = request.get_json()
-    DB.make_room(data["username"], data["room_name"])
-    socketio.emit("room_created", data["room_name"], broadcast=True)
+    change = LOBBY.add(data["username"], data["room_name"])
+    if change is None:
+        return jsonify(ok=False, error="ROOM_EXISTS"), 409
+    socketio.emit(*change)
+    CLUSTER.share_lobby(change)
     return jsonify(ok=True)
 
 @app.post("/api/get_room_list")
 def get_room_list():
-    rooms = DB.get_room_list()
-    print("방 목록 조회 2 =============")
-    print(rooms)
-    return jsonify(ok=True, rooms=rooms)
+    snapshot = LOBBY.snapshot()
+    return jsonify(ok=True, rooms=snapshot["rooms"], version=snapshot["version"])
 
 # ─────────── 실행 ───────────
 if __name__ == "__main__":
     print("server run\n")
     # DB 초기화가 필요할 때만 아래 줄을 수동으로 실행하세요
     DB.init_db()
+    WRITES.start()  # 종료 시 남은 쓰기는 atexit 에서 플러시
     bg_lock = get_bg_lock()
     with bg_lock:
-        socketio.start_background_task(loop)
+        if shard_pool is not None:
+            set_shard_pool(shard_pool)
+            shard_pool.start()
+        else:
+            socketio.start_background_task(loop)
     socketio.run(app, host="0.0.0.0", port=8000)    # Mac·Win 공통
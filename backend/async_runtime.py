@@ -0,0 +1,101 @@
+import os
+import time
+import threading
+import functools
+
+# ─────────── 서버 동시성 모드 ───────────
+# "threading": 연결/백그라운드 작업마다 OS 스레드 (기본값)
+# "eventlet" / "gevent": 그린 스레드 기반 협력형 서버. 블로킹 DB 호출은 아래 실행기로 넘긴다
+ASYNC_MODE = os.getenv("ASYNC_MODE", "threading")
+# 협력형 모드에서 DB 호출을 실행할 네이티브 스레드 수 (동시에 MySQL 을 기다릴 수 있는 최대 호출 수)
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "8"))
+# LoadOnce 를 다른 호출자가 읽는 중일 때 다시 확인하는 간격 (초)
+LOAD_ONCE_POLL = 0.005
+
+_local = threading.local()
+_pool = None
+
+
+def monkey_patch():
+    """협력형 모드면 표준 라이브러리를 패치. 다른 모듈보다 먼저 호출해야 함.
+    DB 풀의 락이 실행기 스레드에서도 안전하도록 thread 모듈은 패치하지 않는다"""
+    global _pool
+    if ASYNC_MODE == "eventlet":
+        import eventlet
+        eventlet.monkey_patch(thread=False)
+        os.environ.setdefault("EVENTLET_THREADPOOL_SIZE", str(DB_EXECUTOR_WORKERS))
+    elif ASYNC_MODE == "gevent":
+        from gevent import monkey
+        monkey.patch_all(thread=False)
+        from gevent.threadpool import ThreadPool
+        _pool = ThreadPool(DB_EXECUTOR_WORKERS)
+
+
+def _call(fn, args, kwargs):
+    _local.offloaded = True
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.offloaded = False
+
+
+def run_blocking(fn, *args, **kwargs):
+    """블로킹 함수를 이벤트 루프 밖(제한된 네이티브 스레드 풀)에서 실행하고 결과를 기다린다.
+    threading 모드이거나 이미 실행기 스레드 안이면 그냥 호출"""
+    if ASYNC_MODE == "threading" or getattr(_local, "offloaded", False):
+        return fn(*args, **kwargs)
+    if ASYNC_MODE == "eventlet":
+        from eventlet import tpool
+        return tpool.execute(_call, fn, args, kwargs)
+    if ASYNC_MODE == "gevent":
+        return _pool.apply(_call, (fn, args, kwargs))
+    return fn(*args, **kwargs)
+
+
+class LoadOnce:
+    """처음 한 번만 loader() 로 값을 읽어 둔다. 협력형 모드에서는 threading 이 패치되지 않아 lock 이 OS 락이므로,
+    실행기로 넘긴 DB 호출을 lock 을 쥔 채 기다리면 같은 허브의 다른 그린 스레드가 lock 에서 허브 스레드 전체를 막는다.
+    그래서 lock 은 상태 확인에만 쓰고, 읽는 동안 다른 호출자는 time.sleep(패치되면 양보)으로 기다린다"""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.loading = False
+        self.loaded = False
+        self.value = None
+
+    def get(self):
+        while not self.loaded:
+            with self.lock:
+                if self.loaded:
+                    break
+                mine = not self.loading
+                self.loading = True
+            if not mine:
+                time.sleep(LOAD_ONCE_POLL)
+                continue
+            try:
+                value = self.loader()
+            except BaseException:
+                with self.lock:
+                    self.loading = False
+                raise
+            with self.lock:
+                self.value = value
+                self.loaded = True
+                self.loading = False
+        return self.value
+
+    def reset(self):
+        """다음 get() 에서 다시 읽음"""
+        with self.lock:
+            self.loaded = False
+            self.value = None
+
+
+def offloaded(method):
+    """Database 메서드용 데코레이터 - 협력형 모드에서 이벤트 루프를 막지 않도록 실행기로 보냄"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        return run_blocking(method, *args, **kwargs)
+    return wrapper
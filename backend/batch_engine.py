@@ -0,0 +1,303 @@
+import os
+
+try:
+    import numpy as np
+except ImportError:  # numpy 는 선택 의존성 - 없으면 스칼라 엔진만 사용
+    np = None
+
+from game_logic import Game, SideState, TOP, BOTTOM
+from match_log import new_recorder
+
+# ─────────── 배치 물리 엔진 (PHYSICS_ENGINE=numpy) ───────────
+# 모든 방의 공/패들/골대 입구를 구조체-배열(SoA) NumPy 버퍼에 두고, 한 번의 배치 연산으로 모든 방을 스텝한다.
+# BatchGame 은 자기 행(row)을 읽고 쓰는 얇은 뷰라서 소켓 핸들러/스킬/직렬화 코드는 그대로 동작한다.
+# 벽 반사와 이벤트 탐색만 벡터화하고, 드문 이벤트(득점, 패들 충돌)는 Game 의 스칼라 메서드를 그대로 호출하므로
+# 결과는 스칼라 경로(Game.step)와 같다.
+PHYSICS_ENGINE = os.getenv("PHYSICS_ENGINE", "scalar")
+
+# 이벤트 종류
+EV_NONE, EV_WALL_X, EV_WALL_Y, EV_GOAL, EV_PADDLE = 0, 1, 2, 3, 4
+
+
+class BatchEngine:
+    def __init__(self, capacity=64):
+        self.capacity = 0
+        self.games = []
+        self.free = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        def extend(arr, shape):
+            new = np.zeros(shape)
+            if arr is not None:
+                new[:len(arr)] = arr
+            return new
+
+        old = self.capacity
+        self.bx = extend(getattr(self, "bx", None), capacity)
+        self.by = extend(getattr(self, "by", None), capacity)
+        self.vx = extend(getattr(self, "vx", None), capacity)
+        self.vy = extend(getattr(self, "vy", None), capacity)
+        self.px = extend(getattr(self, "px", None), (capacity, 2))          # 패들 x [top, bottom]
+        self.py = extend(getattr(self, "py", None), (capacity, 2))          # 패들 y
+        self.mouth_l = extend(getattr(self, "mouth_l", None), (capacity, 2))  # 골대 입구 왼쪽 x
+        self.mouth_r = extend(getattr(self, "mouth_r", None), (capacity, 2))  # 골대 입구 오른쪽 x
+        self.games.extend([None] * (capacity - old))
+        self.free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def attach(self, game):
+        if not self.free:
+            self._grow(self.capacity * 2)
+        row = self.free.pop()
+        self.games[row] = game
+        return row
+
+    def detach(self, row):
+        if self.games[row] is not None:
+            self.games[row] = None
+            self.free.append(row)
+
+    def step(self, rows, on_error=None):
+        """rows(행 번호 배열)의 방들을 물리 한 프레임 진행 - Game.step() 과 같은 순서.
+        on_error 가 있으면 입력/타이머 처리 중 예외가 난 방만 on_error(game) 으로 넘기고 나머지는 계속"""
+        games = self.games
+        for r in rows:
+            g = games[r]
+            try:
+                if g.actions:
+                    g.apply_actions()
+                if g.input_pending:
+                    g._apply_input()
+                g.timers.advance()
+            except Exception:
+                if on_error is None:
+                    raise
+                on_error(g)
+
+        # 골대 입구는 스텝 시작 시점 값으로 고정 (스칼라 경로와 동일)
+        mouth_l = self.mouth_l[rows]
+        mouth_r = self.mouth_r[rows]
+
+        # 스텝 시작 시 패들과 겹친 공 밀어내기 - 후보만 골라 스칼라 메서드로 정확히 판정
+        reach = (Game.PR + Game.BR) ** 2 * (1 + 1e-9)
+        for s in (TOP, BOTTOM):
+            dx = self.bx[rows] - self.px[rows, s]
+            dy = self.by[rows] - self.py[rows, s]
+            d2 = dx * dx + dy * dy
+            for r in rows[(d2 > 0) & (d2 < reach)]:
+                games[r]._push_out(s)
+
+        # 스윕 이동: 활성 행만 모아 가며 이벤트를 차례로 처리
+        idx = np.arange(len(rows))   # rows 안에서의 위치 (골대 입구 조회용)
+        remaining = np.ones(len(rows))
+        for _ in range(Game.MAX_SWEEP_EVENTS):
+            if len(idx) == 0:
+                break
+            act = rows[idx]
+            t, kind, side = self._next_event(act, remaining, mouth_l[idx], mouth_r[idx])
+
+            bx = self.bx[act] + self.vx[act] * t
+            by = self.by[act] + self.vy[act] * t
+            self.bx[act] = bx
+            self.by[act] = by
+            remaining = remaining - t
+
+            wx = kind == EV_WALL_X
+            if wx.any():
+                r = act[wx]
+                self.bx[r] = np.where(self.vx[r] < 0, Game.BR, Game.W - Game.BR)
+                self.vx[r] *= -1
+            wy = kind == EV_WALL_Y
+            if wy.any():
+                r = act[wy]
+                self.by[r] = np.where(self.vy[r] < 0, Game.BR, Game.H - Game.BR)
+                self.vy[r] *= -1
+            for i in np.flatnonzero(kind == EV_GOAL):
+                games[act[i]]._goal(int(side[i]))
+            for i in np.flatnonzero(kind == EV_PADDLE):
+                games[act[i]]._sweep_paddle(int(side[i]))
+
+            keep = (kind == EV_WALL_X) | (kind == EV_WALL_Y) | (kind == EV_PADDLE)
+            idx = idx[keep]
+            remaining = remaining[keep]
+
+        moving = (self.vx[rows] != 0) | (self.vy[rows] != 0)
+        for r, m in zip(rows, moving):
+            g = games[r]
+            g.record_history()
+            if m:
+                g.dirty = True
+
+    def _next_event(self, act, limit, left, right):
+        """Game._next_event 의 벡터 버전. 비교 순서와 동점 처리까지 같게 유지할 것"""
+        BR, W, H = Game.BR, Game.W, Game.H
+        bx, by, vx, vy = self.bx[act], self.by[act], self.vx[act], self.vy[act]
+        best = limit.copy()
+        kind = np.full(len(act), EV_NONE)
+        side = np.zeros(len(act), dtype=np.intp)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 좌우 벽
+            moving = vx != 0
+            t = np.maximum(0.0, (np.where(vx < 0, BR, W - BR) - bx) / vx)
+            hit = moving & (t <= best)
+            best = np.where(hit, t, best)
+            kind = np.where(hit, EV_WALL_X, kind)
+
+            # 위/아래: 골라인 또는 벽
+            moving = vy != 0
+            up = vy < 0
+            s = np.where(up, TOP, BOTTOM)
+            lo = left[np.arange(len(act)), s]
+            hi = right[np.arange(len(act)), s]
+            goal_y = np.where(up, Game.GOAL_HEIGHT - BR / 2, H - Game.GOAL_HEIGHT + BR / 2)
+            wall_y = np.where(up, BR, H - BR)
+            tg = np.maximum(0.0, (goal_y - by) / vy)
+            xg = bx + vx * tg
+            goal = moving & (tg <= best) & (lo <= xg) & (xg <= hi)
+            tw = np.maximum(0.0, (wall_y - by) / vy)
+            xw = bx + vx * tw
+            wall = moving & ~goal & (tw <= best)
+            wall_kind = np.where((lo <= xw) & (xw <= hi), EV_GOAL, EV_WALL_Y)
+            best = np.where(goal, tg, np.where(wall, tw, best))
+            kind = np.where(goal, EV_GOAL, np.where(wall, wall_kind, kind))
+            side = np.where(goal | wall, s, side)
+
+            # 패들 (원 대 원 스윕) - Game._paddle_toi 와 같은 식
+            r2 = (Game.PR + Game.BR) * (Game.PR + Game.BR)
+            a = vx * vx + vy * vy
+            for p in (TOP, BOTTOM):
+                dx = bx - self.px[act, p]
+                dy = by - self.py[act, p]
+                b = dx * vx + dy * vy
+                c = dx * dx + dy * dy - r2
+                disc = b * b - a * c
+                inside = c <= 0
+                t = np.where(inside, 0.0, (-b - np.sqrt(disc)) / a)
+                valid = (b < 0) & (inside | ((disc >= 0) & (t <= best)))
+                hit = valid & ((t < best) | (kind == EV_NONE))
+                best = np.where(hit, t, best)
+                kind = np.where(hit, EV_PADDLE, kind)
+                side = np.where(hit, p, side)
+
+        return best, kind, side
+
+
+def _column(name):
+    def get(self):
+        return float(getattr(self.engine, name)[self.row])
+
+    def set(self, value):
+        getattr(self.engine, name)[self.row] = value
+
+    return property(get, set)
+
+
+class BatchSideState(SideState):
+    """패들 좌표(x, y)만 엔진 배열에 두는 SideState"""
+    __slots__ = ("engine", "row", "index")
+
+    def __init__(self, engine, row, index, x, y):
+        self.engine = engine
+        self.row = row
+        self.index = index
+        super().__init__(x, y)
+
+    @property
+    def x(self):
+        return float(self.engine.px[self.row, self.index])
+
+    @x.setter
+    def x(self, value):
+        self.engine.px[self.row, self.index] = value
+
+    @property
+    def y(self):
+        return float(self.engine.py[self.row, self.index])
+
+    @y.setter
+    def y(self, value):
+        self.engine.py[self.row, self.index] = value
+
+
+class BatchGame(Game):
+    """배치 엔진의 한 행을 보는 Game. 공/패들 좌표를 엔진 배열에 저장"""
+    bx = _column("bx")
+    by = _column("by")
+    vx = _column("vx")
+    vy = _column("vy")
+
+    def __init__(self, room, socketio=None, engine=None, seed=None):
+        self.engine = engine or get_engine()
+        self.row = self.engine.attach(self)
+        super().__init__(room, socketio, seed)
+        for s in (TOP, BOTTOM):
+            self._sync_mouth(s)
+
+    def _new_side(self, index, x, y):
+        return BatchSideState(self.engine, self.row, index, x, y)
+
+    def close(self):
+        super().close()
+        self.engine.detach(self.row)
+
+    def _sync_mouth(self, s):
+        self.engine.mouth_l[self.row, s], self.engine.mouth_r[self.row, s] = self.goal_mouth(s)
+
+    def _set_effect(self, s, kind, value, seconds):
+        super()._set_effect(s, kind, value, seconds)
+        if kind == "goal_effect":
+            self._sync_mouth(s)
+
+    def _clear_effect(self, s, kind):
+        super()._clear_effect(s, kind)
+        if kind == "goal_effect":
+            self._sync_mouth(s)
+
+
+_engine = None
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = BatchEngine()
+    return _engine
+
+
+def batch_enabled():
+    return PHYSICS_ENGINE == "numpy" and np is not None
+
+
+def make_game(room, socketio=None, seed=None):
+    """설정된 물리 엔진으로 방의 Game 생성 (REPLAY_DIR 가 있으면 입력 로그도 기록)"""
+    if batch_enabled():
+        g = BatchGame(room, socketio, seed=seed)
+    else:
+        g = Game(room, socketio, seed)
+    g.recorder = new_recorder(room, g.seed)
+    return g
+
+
+def step_games(games, steps, on_error=None):
+    """게임별 스텝 수만큼 진행. BatchGame 은 엔진별로 같은 차례끼리 묶어 한 번에 스텝.
+    on_error 가 있으면 예외가 난 방만 on_error(game) 으로 넘기고 다른 방은 계속 진행"""
+    batches = {}
+    for g, n in zip(games, steps):
+        if isinstance(g, BatchGame):
+            if n > 0:
+                batches.setdefault(g.engine, []).append((g.row, n))
+        else:
+            try:
+                for _ in range(n):
+                    g.step()
+            except Exception:
+                if on_error is None:
+                    raise
+                on_error(g)
+    for engine, batch in batches.items():
+        rows = np.array([r for r, _ in batch], dtype=np.intp)
+        counts = np.array([n for _, n in batch])
+        for k in range(counts.max()):
+            engine.step(rows[counts > k], on_error)
@@ -0,0 +1,190 @@
+"""게임 시뮬레이션 벤치마크 - 네트워크/MySQL 없이 Game.step() 과 상태 직렬화 비용을 잰다.
+
+N 개의 방을 스텁 socketio 로 만들고, 스크립트로 패들 입력과 스킬 사용을 넣어 가며 돌린다.
+결과는 JSON 으로 출력하고, --baseline 으로 이전 결과를 주면 허용 범위를 넘게 느려졌을 때 1 로 종료한다.
+
+    python bench_game.py --rooms 200 --ticks 2000 --output bench.json
+    python bench_game.py --rooms 200 --ticks 2000 --baseline bench.json --max-regression 0.15
+"""
+import argparse
+import gc
+import json
+import math
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from game_logic import Game
+import batch_engine
+import state_sync
+
+SKILLS = [
+    {"id": 1, "name": "스킬 1", "icon": "⚡", "multiplier": 1.5, "color": "#6366f1", "cooldown": 3.0},
+    {"id": 2, "name": "스킬 2", "icon": "🔥", "multiplier": 2.0, "color": "#f59e0b", "cooldown": 3.0},
+    {"id": 3, "name": "골대 축소 1", "icon": "🛡", "multiplier": 0.0, "color": "#0ea5e9", "cooldown": 3.0},
+    {"id": 4, "name": "골대 축소 2", "icon": "🧊", "multiplier": 0.0, "color": "#1e293b", "cooldown": 5.0},
+    {"id": 5, "name": "먹물 1/4", "icon": "🎯", "multiplier": 0.0, "color": "#64748b", "cooldown": 3.0},
+    {"id": 6, "name": "먹물 1/2", "icon": "🎯", "multiplier": 0.0, "color": "#64748b", "cooldown": 5.0},
+]
+
+# 작을수록 좋은 지표 (기준 대비 비교 대상)
+REGRESSION_KEYS = ("tick_ms_p50", "tick_ms_p99", "serialize_us_per_frame")
+
+
+class StubSocketIO:
+    """emit 만 세는 가짜 socketio"""
+
+    def __init__(self):
+        self.events = 0
+
+    def emit(self, event, data, room=None, to=None):
+        self.events += 1
+
+    def sleep(self, seconds):
+        pass
+
+
+def make_rooms(n, sio, seed):
+    games = {}
+    for i in range(n):
+        room = f"bench-{i}"
+        g = batch_engine.make_game(room, sio, seed + i)  # 방마다 공 재발사 각도 시드
+        g.set_player_skills("left", [dict(s) for s in SKILLS])
+        g.set_player_skills("right", [dict(s) for s in SKILLS])
+        games[room] = g
+    return games
+
+
+def drive_input(g, tick, rng):
+    """스크립트 입력: 패들은 공을 조금 늦게 따라가고, 가끔 스킬을 고르거나 즉시 발동"""
+    for side, p, home_y in (("left", g.sides[0], 80), ("right", g.sides[1], Game.H - 80)):
+        x = p.x + (g.bx - p.x) * 0.15
+        y = home_y + 30 * math.sin(tick / 20)
+        g.set_paddle_position(side, x, y)
+        roll = rng.random()
+        if roll < 0.002:
+            g.set_selected_skill(side, rng.choice((1, 2)))
+        elif roll < 0.003:
+            g.activate_skill(side, rng.choice((3, 4, 5, 6)))
+
+
+def frame_size(event, frame):
+    if isinstance(frame, (bytes, bytearray)):
+        return len(frame)
+    return len(json.dumps(frame, separators=(",", ":")))
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    state_sync.STATE_SYNC_MODE = args.mode
+    sio = StubSocketIO()
+    batch_engine.PHYSICS_ENGINE = args.engine
+    games = make_rooms(args.rooms, sio, args.seed)
+    game_list, one_step = list(games.values()), [1] * args.rooms
+
+    tick_times = []
+    serialize_time = 0.0
+    frames = 0
+    frame_bytes = 0
+    gc.collect()
+    gc_before = sum(s["collections"] for s in gc.get_stats())
+    blocks_before = sys.getallocatedblocks()
+
+    for tick in range(args.ticks):
+        for g in games.values():
+            drive_input(g, tick, rng)
+
+        # 물리 단계 (서버 한 틱 = 모든 방 step)
+        t0 = time.perf_counter()
+        batch_engine.step_games(game_list, one_step)
+        tick_times.append(time.perf_counter() - t0)
+
+        # 전송 단계 (직렬화만 측정, 실제 전송 없음)
+        t0 = time.perf_counter()
+        encoded = [state_sync.encode_state(r, g) for r, g in games.items()]
+        serialize_time += time.perf_counter() - t0
+        frames += len(encoded)
+        if (tick + 1) % args.size_every == 0:   # 첫 키프레임은 제외
+            frame_bytes += sum(frame_size(*e) for e in encoded) * args.size_every
+
+    blocks_after = sys.getallocatedblocks()
+    gc_after = sum(s["collections"] for s in gc.get_stats())
+    total_steps = args.ticks * args.rooms
+    physics_time = sum(tick_times)
+
+    # 메모리: 방 하나를 만들고 돌리는 데 드는 추적 메모리 (별도 패스)
+    tracemalloc.start()
+    mem_games = make_rooms(min(args.rooms, 50), StubSocketIO(), args.seed)
+    for tick in range(100):
+        for g in mem_games.values():
+            drive_input(g, tick, rng)
+            g.step()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rooms": args.rooms,
+        "ticks": args.ticks,
+        "mode": args.mode,
+        "engine": args.engine,
+        "steps_per_sec": total_steps / physics_time if physics_time else 0.0,
+        "rooms_at_80hz": int(Game.TICK / statistics.mean(tick_times) * args.rooms) if tick_times else 0,
+        "tick_ms_p50": percentile(tick_times, 0.50) * 1000,
+        "tick_ms_p99": percentile(tick_times, 0.99) * 1000,
+        "tick_ms_max": max(tick_times) * 1000,
+        "serialize_us_per_frame": serialize_time / frames * 1e6 if frames else 0.0,
+        "bytes_per_frame": frame_bytes / frames if frames else 0.0,
+        "alloc_blocks_net": blocks_after - blocks_before,
+        "gc_collections": gc_after - gc_before,
+        "mem_kb_per_room": current / 1024 / len(mem_games),
+        "mem_peak_kb_per_room": peak / 1024 / len(mem_games),
+        "emits": sio.events,
+    }
+
+
+def compare(result, baseline, max_regression):
+    """기준 대비 느려진 지표 목록"""
+    regressions = []
+    for key in REGRESSION_KEYS:
+        old, new = baseline.get(key), result.get(key)
+        if old and new and new > old * (1 + max_regression):
+            regressions.append({"metric": key, "baseline": old, "current": new, "ratio": new / old})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--mode", default="delta", choices=("delta", "full", "binary"), help="STATE_SYNC_MODE")
+    parser.add_argument("--engine", default="scalar", choices=("scalar", "numpy"), help="PHYSICS_ENGINE")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--size-every", type=int, default=10, help="N 틱마다 프레임 크기 측정 (json.dumps 비용 절약)")
+    parser.add_argument("--output", help="결과 JSON 을 저장할 파일")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="허용하는 악화 비율")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["regressions"] = compare(result, json.load(f), args.max_regression)
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    if result.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
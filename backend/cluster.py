@@ -0,0 +1,330 @@
+import os
+import atexit
+import pickle
+import queue
+import socket
+from threading import Lock
+
+import socketio as socketio_pkg
+from flask import request
+
+from metrics import CLUSTER_FORWARDED
+from logs import get_logger
+
+# ─────────── 다중 노드 (클러스터 모드) ───────────
+# CLUSTER_BUS 를 지정하면 여러 서버 프로세스(노드)를 로드 밸런서 뒤에 둘 수 있다.
+# - Socket.IO emit 은 메시지 버스를 거쳐 모든 노드에 전달되므로, 어느 노드에서 emit 해도 그 방/sid 의 클라이언트가 받는다.
+# - 방(Game / 로딩 방)은 그것을 만든 노드가 맡고(owner), 다른 노드로 들어온 그 방의 이벤트는 owner 노드로 넘긴다.
+#   owner 노드는 원래 sid 로 핸들러를 실행하고, Socket.IO 방 입장/퇴장은 소켓이 붙어 있는 노드에 요청한다.
+# - 로비 델타도 버스로 공유해 모든 노드의 LOBBY 가 같은 방 목록을 유지한다.
+# 버스 메시지는 노드당 하나의 구독 연결로 받으므로 방 입장 요청과 그 뒤의 emit 순서가 유지된다.
+# 서버 노드는 프로세스당 하나다 (socket_handlers 의 방 상태와 CLUSTER 싱글턴이 모듈 전역). Cluster 객체 자체는
+# 서로 독립이라 테스트에서는 LocalBus 하나에 Cluster 를 여러 개 붙여 노드 여러 개처럼 시험한다.
+CLUSTER_BUS = os.getenv("CLUSTER_BUS", "")            # "" (끔) | local | redis://host:6379/0
+CLUSTER_NODE_ID = os.getenv("CLUSTER_NODE_ID", "") or f"{socket.gethostname()}-{os.getpid()}"
+CLUSTER_CHANNEL = os.getenv("CLUSTER_CHANNEL", "airhockey")
+
+log = get_logger("cluster")
+
+
+class LocalBus:
+    """프로세스 안의 메시지 버스 - Cluster 객체 여러 개를 한 프로세스에서 시험할 때. publish 한 스레드에서 바로 전달"""
+
+    def __init__(self):
+        self.subscribers = {}   # 채널 -> [callback(channel, message)]
+        self.counters = {}      # incr() 카운터 (Redis INCR 대용)
+        self.lock = Lock()
+
+    def subscribe(self, channels, callback):
+        with self.lock:
+            for channel in channels:
+                self.subscribers.setdefault(channel, []).append(callback)
+
+    def incr(self, key):
+        with self.lock:
+            value = self.counters[key] = self.counters.get(key, 0) + 1
+            return value
+
+    def publish(self, channel, message):
+        data = pickle.dumps(message)  # 실제 큐처럼 직렬화한 복사본을 전달
+        with self.lock:
+            callbacks = list(self.subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(channel, pickle.loads(data))
+
+    def close(self):
+        pass
+
+
+class RedisBus:
+    """Redis pub/sub 버스 (redis 패키지 필요). 구독은 연결 하나 + 수신 스레드 하나"""
+
+    def __init__(self, url):
+        import redis  # 선택 의존성: CLUSTER_BUS=redis://... 일 때만
+        self.redis = redis.Redis.from_url(url)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self.thread = None
+
+    def subscribe(self, channels, callback):
+        def handler(message):
+            callback(message["channel"].decode(), pickle.loads(message["data"]))
+        self.pubsub.subscribe(**{channel: handler for channel in channels})
+        if self.thread is None:
+            self.thread = self.pubsub.run_in_thread(sleep_time=0.001, daemon=True)
+
+    def publish(self, channel, message):
+        self.redis.publish(channel, pickle.dumps(message))
+
+    def incr(self, key):
+        return self.redis.incr(key)
+
+    def close(self):
+        if self.thread is not None:
+            self.thread.stop()
+            self.thread = None
+
+
+LOCAL_BUS = LocalBus()
+
+
+def make_bus(url):
+    if not url:
+        return None
+    if url == "local":
+        return LOCAL_BUS
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBus(url)
+    raise ValueError(f"지원하지 않는 CLUSTER_BUS: {url}")
+
+
+class BusManager(socketio_pkg.PubSubManager):
+    """Socket.IO 클라이언트 매니저 - emit 을 클러스터 버스로 모든 노드에 전달 (python-socketio 의 RedisManager 와 같은 방식)"""
+    name = "cluster"
+
+    def __init__(self, bus, channel):
+        super().__init__(channel=channel)
+        self.bus = bus
+        self.inbox = queue.Queue()
+
+    def _publish(self, data):
+        self.bus.publish(self.channel, data)
+
+    def _listen(self):
+        while True:
+            yield self.inbox.get()
+
+
+class Cluster:
+    def __init__(self, bus=None, node_id=CLUSTER_NODE_ID, channel=CLUSTER_CHANNEL):
+        self.bus = bus
+        self.node_id = node_id
+        self.channel = channel
+        self.owners = {}        # room -> 그 방을 맡은 노드 id
+        self.lock = Lock()
+        self.manager = None
+        self.app = None
+        self.socketio = None
+        self.dispatch = None    # (event, args) -> None, 넘어온 이벤트를 실행 (socket_handlers 에서 설정)
+        self.on_lobby = None    # (event, payload) -> None, 다른 노드의 로비 델타 반영
+        self.on_lost = None     # (room) -> None, 동시에 맡은 방을 다른 노드에 양보함 - 이 노드의 방 정리
+        self.forwarded = 0
+        self.received = 0
+
+    @property
+    def enabled(self):
+        return self.bus is not None
+
+    def _node_channel(self, node_id):
+        return f"{self.channel}:node:{node_id}"
+
+    def _publish_all(self, op, **fields):
+        self.bus.publish(f"{self.channel}:all", dict(fields, op=op, node=self.node_id))
+
+    def client_manager(self):
+        """SocketIO(client_manager=...) 에 넘길 매니저. 클러스터 모드가 아니면 None (기본 매니저)"""
+        if self.bus is None:
+            return None
+        if self.manager is None:
+            self.manager = BusManager(self.bus, f"{self.channel}:sio")
+        return self.manager
+
+    def bind(self, dispatch, on_lobby, on_lost=None):
+        self.dispatch = dispatch
+        self.on_lobby = on_lobby
+        self.on_lost = on_lost
+
+    def start(self, app, socketio):
+        """버스 구독을 시작하고 다른 노드에 방 소유 정보를 요청 (app.py 에서 한 번)"""
+        self.app = app
+        self.socketio = socketio
+        if self.bus is None:
+            return
+        self.bus.subscribe(
+            (f"{self.channel}:sio", f"{self.channel}:all", self._node_channel(self.node_id)), self._on_message)
+        self._publish_all("hello")
+        atexit.register(self.stop)
+        log.info("클러스터 노드 %s 시작 (버스 %s)", self.node_id, type(self.bus).__name__)
+
+    def stop(self):
+        if self.bus is None or self.app is None:
+            return
+        try:
+            self._publish_all("bye")
+        except Exception:
+            log.exception("클러스터 종료 알림 실패")
+        self.bus.close()
+        self.app = None
+
+    # ─────────── 방 소유 ───────────
+    def owner(self, room):
+        return self.owners.get(room)
+
+    def claim(self, room):
+        """이 노드가 room 을 맡는다. 다른 노드가 이미 맡고 있으면 False"""
+        if self.bus is None:
+            return True
+        with self.lock:
+            current = self.owners.get(room)
+            if current is not None:
+                return current == self.node_id
+            self.owners[room] = self.node_id
+        self._publish_all("own", room=room)
+        return True
+
+    def release(self, room):
+        if self.bus is None:
+            return
+        with self.lock:
+            if self.owners.get(room) != self.node_id:
+                return
+            del self.owners[room]
+        self._publish_all("disown", room=room)
+
+    def owned_rooms(self):
+        with self.lock:
+            return [room for room, node in self.owners.items() if node == self.node_id]
+
+    # ─────────── 이벤트 전달 ───────────
+    def forward(self, event, room, args, sid):
+        """room 을 다른 노드가 맡고 있으면 이벤트를 그 노드로 넘기고 True"""
+        if self.bus is None:
+            return False
+        owner = self.owners.get(room)
+        if owner is None or owner == self.node_id:
+            return False
+        self.bus.publish(self._node_channel(owner), {
+            "op": "event", "event": event, "args": list(args), "sid": sid, "origin": self.node_id})
+        self.forwarded += 1
+        CLUSTER_FORWARDED.inc(event)
+        return True
+
+    def enter_room(self, origin, sid, room):
+        """소켓이 붙어 있는 노드(origin)에서 sid 를 Socket.IO 방에 넣음"""
+        self._room_op("enter", origin, sid, room)
+
+    def leave_room(self, origin, sid, room):
+        self._room_op("leave", origin, sid, room)
+
+    def _room_op(self, op, origin, sid, room):
+        if origin == self.node_id:
+            self._apply_room_op(op, sid, room)
+        else:
+            self.bus.publish(self._node_channel(origin), {"op": op, "sid": sid, "room": room})
+
+    def _apply_room_op(self, op, sid, room):
+        try:
+            if op == "enter":
+                self.socketio.server.enter_room(sid, room, namespace="/")
+            else:
+                self.socketio.server.leave_room(sid, room, namespace="/")
+        except (KeyError, ValueError):
+            pass  # 그 사이 연결이 끊김
+
+    def next_lobby_version(self):
+        """모든 노드가 공유하는 로비 델타 버전 (버스의 카운터). 노드마다 따로 세면 두 노드가 같은 버전을 내보내
+        클라이언트가 뒤의 델타를 버리므로 클러스터 모드에서는 이 값을 쓴다"""
+        return self.bus.incr(f"{self.channel}:lobby_version")
+
+    def share_lobby(self, change):
+        """로비 델타를 다른 노드의 LOBBY 에 반영 (클라이언트 전송은 Socket.IO emit 이 따로 함)"""
+        if self.bus is not None and change is not None:
+            self._publish_all("lobby", change=list(change))
+
+    def share_disconnect(self, sid):
+        """sid 가 끊김 - 그 sid 가 참가한 방을 맡은 노드들도 disconnect 핸들러를 실행"""
+        if self.bus is not None:
+            self._publish_all("disconnect", sid=sid)
+
+    # ─────────── 수신 ───────────
+    def _on_message(self, channel, message):
+        if channel.endswith(":sio"):
+            if self.manager is not None:
+                self.manager.inbox.put(message)
+            return
+        op = message["op"]
+        try:
+            if op == "event":
+                self.received += 1
+                self._run(message["event"], message["args"], message["sid"], message["origin"])
+            elif op in ("enter", "leave"):
+                self._apply_room_op(op, message["sid"], message["room"])
+            elif message["node"] != self.node_id:
+                self._on_broadcast(op, message)
+        except Exception:
+            log.exception("클러스터 메시지 처리 실패: %s", op)
+
+    def _on_broadcast(self, op, message):
+        node = message["node"]
+        lost = False
+        with self.lock:
+            if op == "own":
+                current = self.owners.get(message["room"])
+                if current == self.node_id:
+                    # 두 노드가 동시에 맡음 - id 가 작은 노드가 이기고 진 노드는 자기 방을 정리
+                    if node > self.node_id:
+                        log.warning("방 %s 를 %s 와 동시에 맡음 - 이 노드가 유지", message["room"], node)
+                        return
+                    log.warning("방 %s 를 %s 와 동시에 맡음 - 그 노드에 양보", message["room"], node)
+                    lost = True
+                self.owners[message["room"]] = node
+            elif op == "disown":
+                if self.owners.get(message["room"]) == node:
+                    del self.owners[message["room"]]
+            elif op == "bye":
+                self.owners = {room: n for room, n in self.owners.items() if n != node}
+        if lost and self.on_lost is not None:
+            self.on_lost(message["room"])
+        elif op == "hello":
+            for room in self.owned_rooms():
+                self._publish_all("own", room=room)
+        elif op == "lobby" and self.on_lobby is not None:
+            self.on_lobby(*message["change"])
+        elif op == "disconnect":
+            self._run("disconnect", [], message["sid"], node)
+
+    def _run(self, event, args, sid, origin):
+        # Flask-SocketIO 핸들러와 같은 요청 컨텍스트 (request.sid / emit() 기본 수신자) 를 만들어 실행
+        if self.dispatch is None or self.app is None:
+            return
+        with self.app.test_request_context("/"):
+            request.sid = sid
+            request.namespace = "/"
+            request.cluster_origin = origin
+            self.dispatch(event, args)
+
+    def stats(self):
+        with self.lock:
+            nodes = {}
+            for node in self.owners.values():
+                nodes[node] = nodes.get(node, 0) + 1
+        return {
+            "enabled": self.enabled,
+            "node_id": self.node_id,
+            "rooms_by_node": nodes,
+            "forwarded": self.forwarded,
+            "received": self.received,
+        }
+
+
+# 싱글턴 인스턴스
+CLUSTER = Cluster(make_bus(CLUSTER_BUS))
@@ -1,7 +1,143 @@
 import os
-from werkzeug.security import generate_password_hash, check_password_hash
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from werkzeug.security import generate_password_hash
 import mysql.connector
-from threading import Lock
+import mysql.connector.pooling
+from mysql.connector.errors import PoolError
+from threading import Lock, BoundedSemaphore
+
+from async_runtime import offloaded, LoadOnce
+from metrics import DB_QUERY_SECONDS, DB_POOL_WAIT_SECONDS
+from logs import get_logger
+
+log = get_logger("db")
+
+# 유저별 해금 스킬 캐시 설정
+SKILL_CACHE_SIZE = int(os.getenv("SKILL_CACHE_SIZE", "1024"))   # 최대 유저 수 (LRU)
+SKILL_CACHE_TTL = float(os.getenv("SKILL_CACHE_TTL", "300"))    # 초
+
+# 커넥션 풀 설정
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))                  # 풀 커넥션 수 (mysql-connector 상한 32)
+DB_USE_PURE = os.getenv("DB_USE_PURE", "1") == "1"                  # 1: 순수 파이썬 드라이버, 0: C 확장 (설치돼 있을 때)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))          # 커넥션이 모두 사용 중일 때 기다리는 최대 시간 (초)
+
+
+class LoadoutCache:
+    """username -> {skill_id: usage_count} 의 LRU + TTL 캐시"""
+
+    def __init__(self, maxsize=SKILL_CACHE_SIZE, ttl=SKILL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()    # username -> (만료 시각, 값)
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, username):
+        with self.lock:
+            entry = self.entries.get(username)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[username]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(username)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, username, value):
+        with self.lock:
+            self.entries[username] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(username)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username=None):
+        with self.lock:
+            if username is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(username, None)
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class PoolTimeout(PoolError):
+    """DB_POOL_TIMEOUT 안에 커넥션을 빌리지 못함"""
+
+
+class PoolStats:
+    """커넥션 대기 시간 / 사용 중 개수 / 쿼리(트랜잭션)별 지연 시간"""
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.queries = {}   # 이름 -> [횟수, 합계(초), 최대(초), 실패 수]
+
+    def checked_out(self, waited):
+        DB_POOL_WAIT_SECONDS.observe(waited)
+        with self.lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def timed_out(self, waited):
+        DB_POOL_WAIT_SECONDS.observe(waited)
+        with self.lock:
+            self.timeouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def returned(self, name, elapsed, failed):
+        DB_QUERY_SECONDS.observe(elapsed, name)
+        with self.lock:
+            self.in_use -= 1
+            entry = self.queries.get(name)
+            if entry is None:
+                entry = self.queries[name] = [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+            entry[3] += failed
+
+    def stats(self):
+        with self.lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "size": self.size,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": self.wait_total / waits * 1000 if waits else 0.0,
+                "wait_ms_max": self.wait_max * 1000,
+                "queries": {
+                    name: {"count": n, "ms_avg": total / n * 1000, "ms_max": peak * 1000, "errors": failed}
+                    for name, (n, total, peak, failed) in self.queries.items()
+                },
+            }
+
 
 class Database:
     _instance = None
@@ -20,181 +156,260 @@ class Database:
             password = os.getenv("DB_PASSWORD"),
             host     = os.getenv("DB_HOST", "127.0.0.1"),
             database = os.getenv("DB_NAME", "airhockey"),
-            use_pure = True
+            use_pure = DB_USE_PURE
         )
         self.pool = mysql.connector.pooling.MySQLConnectionPool(
-            pool_name="ah_pool", pool_size=5, **DB_CONF
+            pool_name="ah_pool", pool_size=DB_POOL_SIZE, **DB_CONF
         )
+        # mysql-connector 풀은 비어 있으면 바로 PoolError 를 던지므로, 세마포어로 빈 커넥션을 일정 시간 기다림
+        self.pool_slots = BoundedSemaphore(DB_POOL_SIZE)
+        self.pool_stats = PoolStats(DB_POOL_SIZE)
+        # skills 테이블은 정적 참조 데이터라 한 번만 읽어 둠
+        self.skill_catalog = LoadOnce(self._load_skill_catalog)   # 읽는 동안 lock 을 쥐지 않음 (협력형 모드)
+        self.loadouts = LoadoutCache()
+
+    @contextmanager
+    def transaction(self, name, dictionary=False):
+        """커넥션을 빌려 커서를 넘겨주고, 블록이 끝나면 커밋(예외면 롤백)하고 반납.
+        풀이 모두 사용 중이면 DB_POOL_TIMEOUT 까지 기다리고, 그래도 없으면 PoolTimeout"""
+        t0 = time.perf_counter()
+        if not self.pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+            self.pool_stats.timed_out(time.perf_counter() - t0)
+            raise PoolTimeout(f"{DB_POOL_TIMEOUT}초 안에 DB 커넥션을 얻지 못했습니다 ({name})")
+        try:
+            conn = self.pool.get_connection()
+        except Exception:
+            self.pool_slots.release()
+            self.pool_stats.timed_out(time.perf_counter() - t0)
+            raise
+        t1 = time.perf_counter()
+        self.pool_stats.checked_out(t1 - t0)
+        failed = True
+        try:
+            cur = conn.cursor(dictionary=dictionary)
+            try:
+                yield cur
+                conn.commit()
+                failed = False
+            finally:
+                cur.close()
+                if failed:
+                    try:
+                        conn.rollback()
+                    except mysql.connector.Error:
+                        pass  # 끊긴 커넥션이면 반납 시 풀이 다시 연결함
+        finally:
+            conn.close()
+            self.pool_slots.release()
+            self.pool_stats.returned(name, time.perf_counter() - t1, failed)
 
     def init_db(self):
-        conn = self.pool.get_connection(); cur = conn.cursor()
-        # 기존 테이블 삭제 (외래키 제약조건 때문에 순서 중요)
-        cur.execute("DROP TABLE IF EXISTS user_skills")
-        cur.execute("DROP TABLE IF EXISTS matches")
-        cur.execute("DROP TABLE IF EXISTS users")
-        cur.execute("DROP TABLE IF EXISTS skills")
-        cur.execute("DROP TABLE IF EXISTS match_room")
-        # 테이블들 다시 생성    
-        cur.execute("""
-            CREATE TABLE users(
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(32) UNIQUE,
-                pw_hash VARCHAR(255),
-                created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE skills(
-                id INT PRIMARY KEY,
-                name VARCHAR(50) NOT NULL,
-                icon VARCHAR(10) NOT NULL,
-                multiplier DECIMAL(3,1) NOT NULL,
-                color VARCHAR(7) NOT NULL,
-                description TEXT,
-                unlock_condition VARCHAR(100),
-                cooldown DECIMAL(3,1) DEFAULT 3.0
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE user_skills(
-                user_id INT,
-                skill_id INT,
-                unlocked BOOLEAN DEFAULT FALSE,
-                usage_count INT DEFAULT 0,
-                last_used TIMESTAMP NULL,
-                PRIMARY KEY (user_id, skill_id),
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE matches(
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                left_score INT,
-                right_score INT
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS match_room(
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                is_playing BOOLEAN DEFAULT FALSE,
-                max_player INT DEFAULT 2,
-                current_player INT DEFAULT 0,
-                room_name VARCHAR(50) NOT NULL,
-                username VARCHAR(32) NOT NULL
-            )
-        """)
-        # 기본 스킬 데이터 삽입 (기존 데이터 삭제 후 다시 생성)
-        cur.execute("DELETE FROM skills")
-        default_skills = [
-            (1, "스킬 1", "⚡", 1.5, "#6366f1", "기본 속도 증가 스킬", "기본 제공", 3.0),
-            (2, "스킬 2", "🔥", 2.0, "#f59e0b", "고속 공격 스킬", "기본 제공", 3.0),
-            (3, "골대 축소 1", "🛡", 0, "#0ea5e9", "내 골대가 1/2로 5초간 줄어듭니다.", "기본 제공", 3.0),
-            (4, "골대 축소 2", "🧊", 0, "#1e293b", "내 골대가 1/4로 3초간 줄어듭니다.", "기본 제공", 5.0),
-            (5, "먹물 1/4", "🎯", 0, "#64748b", "상대 중앙 1/4이 퍽 색으로 3초간 변함", "기본 제공", 3.0),
-            (6, "먹물 1/2", "🎯", 0, "#64748b", "상대 중앙 1/2이 퍽 색으로 3초간 변함", "기본 제공", 5.0),
+        with self.transaction("init_db") as cur:
+            # 기존 테이블 삭제 (외래키 제약조건 때문에 순서 중요)
+            cur.execute("DROP TABLE IF EXISTS user_skills")
+            cur.execute("DROP TABLE IF EXISTS matches")
+            cur.execute("DROP TABLE IF EXISTS users")
+            cur.execute("DROP TABLE IF EXISTS skills")
+            cur.execute("DROP TABLE IF EXISTS match_room")
+            # 테이블들 다시 생성    
+            cur.execute("""
+                CREATE TABLE users(
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    username VARCHAR(32) UNIQUE,
+                    pw_hash VARCHAR(255),
+                    created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cur.execute("""
+                CREATE TABLE skills(
+                    id INT PRIMARY KEY,
+                    name VARCHAR(50) NOT NULL,
+                    icon VARCHAR(10) NOT NULL,
+                    multiplier DECIMAL(3,1) NOT NULL,
+                    color VARCHAR(7) NOT NULL,
+                    description TEXT,
+                    unlock_condition VARCHAR(100),
+                    cooldown DECIMAL(3,1) DEFAULT 3.0
+                )
+            """)
+            cur.execute("""
+                CREATE TABLE user_skills(
+                    user_id INT,
+                    skill_id INT,
+                    unlocked BOOLEAN DEFAULT FALSE,
+                    usage_count INT DEFAULT 0,
+                    last_used TIMESTAMP NULL,
+                    PRIMARY KEY (user_id, skill_id),
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                    FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+                )
+            """)
+            cur.execute("""
+                CREATE TABLE matches(
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    left_score INT,
+                    right_score INT
+                )
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS match_room(
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    is_playing BOOLEAN DEFAULT FALSE,
+                    max_player INT DEFAULT 2,
+                    current_player INT DEFAULT 0,
+                    room_name VARCHAR(50) NOT NULL,
+                    username VARCHAR(32) NOT NULL
+                )
+            """)
+            # 기본 스킬 데이터 삽입 (기존 데이터 삭제 후 다시 생성)
+            cur.execute("DELETE FROM skills")
+            default_skills = [
+                (1, "스킬 1", "⚡", 1.5, "#6366f1", "기본 속도 증가 스킬", "기본 제공", 3.0),
+                (2, "스킬 2", "🔥", 2.0, "#f59e0b", "고속 공격 스킬", "기본 제공", 3.0),
+                (3, "골대 축소 1", "🛡", 0, "#0ea5e9", "내 골대가 1/2로 5초간 줄어듭니다.", "기본 제공", 3.0),
+                (4, "골대 축소 2", "🧊", 0, "#1e293b", "내 골대가 1/4로 3초간 줄어듭니다.", "기본 제공", 5.0),
+                (5, "먹물 1/4", "🎯", 0, "#64748b", "상대 중앙 1/4이 퍽 색으로 3초간 변함", "기본 제공", 3.0),
+                (6, "먹물 1/2", "🎯", 0, "#64748b", "상대 중앙 1/2이 퍽 색으로 3초간 변함", "기본 제공", 5.0),
             
-        ]
-        
-        cur.executemany("""
-            INSERT INTO skills (id, name, icon, multiplier, color, description, unlock_condition, cooldown) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, default_skills)
-        print("기본 스킬 데이터를 생성했습니다.")
-        # 더미 유저 생성 (없는 경우에만)
-        cur.execute("SELECT COUNT(*) FROM users")
-        user_count = cur.fetchone()[0]
-        if user_count == 0:
-            dummy_users = [
-                ("player1", "password123"),
-                ("player2", "password123"),
-                ("player3", "password123"),
-                ("test_user", "password123")
             ]
-            for username, password in dummy_users:
-                pw_hash = generate_password_hash(password)
-                cur.execute("INSERT INTO users(username, pw_hash) VALUES (%s,%s)", (username, pw_hash))
-                user_id = cur.lastrowid
-                cur.execute("INSERT INTO user_skills(user_id, skill_id, unlocked) VALUES (%s, 1, TRUE), (%s, 2, TRUE), (%s, 3, TRUE), (%s, 4, TRUE), (%s, 5, TRUE), (%s, 6, TRUE)", (user_id, user_id, user_id, user_id, user_id, user_id))
-                print(f"더미 유저 '{username}'을 생성하고 모든 스킬을 제공했습니다.")
-        else:
-            cur.execute("SELECT id FROM users")
-            existing_users = cur.fetchall()
-            for user in existing_users:
-                user_id = user[0]
-                cur.execute("DELETE FROM user_skills WHERE user_id = %s", (user_id,))
-                cur.execute("INSERT INTO user_skills(user_id, skill_id, unlocked) VALUES (%s, 1, TRUE), (%s, 2, TRUE), (%s, 3, TRUE), (%s, 4, TRUE), (%s, 5, TRUE), (%s, 6, TRUE)", (user_id, user_id, user_id, user_id, user_id, user_id))
-                print(f"유저 ID {user_id}에게 모든 스킬을 제공했습니다.")
-        conn.commit(); cur.close(); conn.close()
+        
+            cur.executemany("""
+                INSERT INTO skills (id, name, icon, multiplier, color, description, unlock_condition, cooldown) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, default_skills)
+            log.info("기본 스킬 데이터를 생성했습니다.")
+            # 더미 유저 생성 (없는 경우에만)
+            cur.execute("SELECT COUNT(*) FROM users")
+            user_count = cur.fetchone()[0]
+            if user_count == 0:
+                dummy_users = [
+                    ("player1", "password123"),
+                    ("player2", "password123"),
+                    ("player3", "password123"),
+                    ("test_user", "password123")
+                ]
+                for username, password in dummy_users:
+                    pw_hash = generate_password_hash(password)
+                    cur.execute("INSERT INTO users(username, pw_hash) VALUES (%s,%s)", (username, pw_hash))
+                    user_id = cur.lastrowid
+                    cur.execute("INSERT INTO user_skills(user_id, skill_id, unlocked) VALUES (%s, 1, TRUE), (%s, 2, TRUE), (%s, 3, TRUE), (%s, 4, TRUE), (%s, 5, TRUE), (%s, 6, TRUE)", (user_id, user_id, user_id, user_id, user_id, user_id))
+                    log.info("더미 유저 '%s'을 생성하고 모든 스킬을 제공했습니다.", username)
+            else:
+                cur.execute("SELECT id FROM users")
+                existing_users = cur.fetchall()
+                for user in existing_users:
+                    user_id = user[0]
+                    cur.execute("DELETE FROM user_skills WHERE user_id = %s", (user_id,))
+                    cur.execute("INSERT INTO user_skills(user_id, skill_id, unlocked) VALUES (%s, 1, TRUE), (%s, 2, TRUE), (%s, 3, TRUE), (%s, 4, TRUE), (%s, 5, TRUE), (%s, 6, TRUE)", (user_id, user_id, user_id, user_id, user_id, user_id))
+                    log.info("유저 ID %s에게 모든 스킬을 제공했습니다.", user_id)
+        self.skill_catalog.reset()
+        self.loadouts.invalidate()
 
-    def get_user_skills(self, username):
-        conn = self.pool.get_connection(); cur = conn.cursor(dictionary=True)
-        cur.execute("""
-            SELECT s.id, s.name, s.icon, s.multiplier, s.color, s.description, s.cooldown, us.unlocked, us.usage_count
-            FROM users u
-            INNER JOIN user_skills us ON u.id = us.user_id
-            INNER JOIN skills s ON us.skill_id = s.id
-            WHERE u.username = %s AND us.unlocked = TRUE
-            ORDER BY s.id
-        """, (username,))
-        skills = cur.fetchall()
+    @offloaded
+    def _load_skill_catalog(self):
+        with self.transaction("load_skill_catalog", dictionary=True) as cur:
+            cur.execute("SELECT id, name, icon, multiplier, color, description, cooldown FROM skills ORDER BY id")
+            skills = cur.fetchall()
         for skill in skills:
             if 'multiplier' in skill and hasattr(skill['multiplier'], '__float__'):
                 skill['multiplier'] = float(skill['multiplier'])
             if 'cooldown' in skill and hasattr(skill['cooldown'], '__float__'):
                 skill['cooldown'] = float(skill['cooldown'])
-            if 'usage_count' in skill and skill['usage_count'] is not None:
-                skill['usage_count'] = int(skill['usage_count'])
-        print(f"유저 {username}의 스킬: {[s['name'] for s in skills]}")
-        cur.close(); conn.close()
-        return skills
-
-    def create_user(self, username, password):
-        pw_hash = generate_password_hash(password)
-        conn = self.pool.get_connection(); cur = conn.cursor()
-        cur.execute("INSERT INTO users(username, pw_hash) VALUES (%s,%s)", (username, pw_hash))
-        user_id = cur.lastrowid
-        cur.execute("INSERT INTO user_skills(user_id, skill_id, unlocked) VALUES (%s, 1, TRUE), (%s, 2, TRUE), (%s, 3, TRUE), (%s, 4, TRUE), (%s, 5, TRUE), (%s, 6, TRUE)", (user_id, user_id, user_id, user_id, user_id, user_id))
-        conn.commit(); cur.close(); conn.close()
-    def toggle_is_playing(self, room_name):
-        conn = self.pool.get_connection(); cur = conn.cursor()
-        cur.execute("UPDATE match_room SET is_playing = NOT is_playing WHERE room_name = %s", (room_name,))
-        conn.commit(); cur.close(); conn.close()
-
-    def update_current_player(self, room_name, current_player):
-        conn = self.pool.get_connection(); cur = conn.cursor()
-        cur.execute("UPDATE match_room SET current_player = %s WHERE room_name = %s", (current_player, room_name))
-        conn.commit(); cur.close(); conn.close()
-
-    def verify_user(self, username, password):
-        conn = self.pool.get_connection(); cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT pw_hash FROM users WHERE username=%s", (username,))
-        row = cur.fetchone()
-        cur.close(); conn.close()
-        return row and check_password_hash(row["pw_hash"], password)
+        return {skill["id"]: skill for skill in skills}
+
+    def get_skill_catalog(self):
+        """skill_id -> 스킬 정보 (처음 한 번만 DB 에서 읽음)"""
+        return self.skill_catalog.get()
+
+    @offloaded
+    def _load_user_loadout(self, username):
+        with self.transaction("load_user_loadout") as cur:
+            cur.execute("""
+                SELECT us.skill_id, us.usage_count
+                FROM users u
+                INNER JOIN user_skills us ON u.id = us.user_id
+                WHERE u.username = %s AND us.unlocked = TRUE
+            """, (username,))
+            rows = cur.fetchall()
+        return {skill_id: int(usage_count or 0) for skill_id, usage_count in rows}
 
+    def get_user_skills(self, username):
+        """유저의 해금된 스킬 목록. 캐시에 있으면 DB 를 건드리지 않음"""
+        loadout = self.loadouts.get(username)
+        if loadout is None:
+            loadout = self._load_user_loadout(username)
+            self.loadouts.put(username, loadout)
+        catalog = self.get_skill_catalog()
+        return [
+            dict(catalog[skill_id], unlocked=1, usage_count=loadout[skill_id])
+            for skill_id in sorted(loadout) if skill_id in catalog
+        ]
+
+    @offloaded
+    def unlock_skill(self, username, skill_id):
+        with self.transaction("unlock_skill") as cur:
+            cur.execute("""
+                INSERT INTO user_skills(user_id, skill_id, unlocked)
+                SELECT id, %s, TRUE FROM users WHERE username = %s
+                ON DUPLICATE KEY UPDATE unlocked = TRUE
+            """, (skill_id, username))
+        self.loadouts.invalidate(username)
+
+    def get_pool_stats(self):
+        return self.pool_stats.stats()
+
+    def get_cache_stats(self):
+        return {
+            "skill_catalog_loaded": self.skill_catalog.loaded,
+            "loadouts": self.loadouts.stats(),
+        }
+
+    @offloaded
+    def create_user(self, username, pw_hash):
+        """pw_hash 는 호출하는 쪽에서 해시 워커 풀(HASHER)로 미리 계산해 넘긴다"""
+        with self.transaction("create_user") as cur:
+            cur.execute("INSERT INTO users(username, pw_hash) VALUES (%s,%s)", (username, pw_hash))
+            user_id = cur.lastrowid
+            cur.execute("INSERT INTO user_skills(user_id, skill_id, unlocked) VALUES (%s, 1, TRUE), (%s, 2, TRUE), (%s, 3, TRUE), (%s, 4, TRUE), (%s, 5, TRUE), (%s, 6, TRUE)", (user_id, user_id, user_id, user_id, user_id, user_id))
+        self.loadouts.invalidate(username)
+
+    @offloaded
+    def get_pw_hash(self, username):
+        """저장된 비밀번호 해시 (없는 유저면 None). 비교는 해시 워커 풀(HASHER)에서"""
+        with self.transaction("get_pw_hash", dictionary=True) as cur:
+            cur.execute("SELECT pw_hash FROM users WHERE username=%s", (username,))
+            row = cur.fetchone()
+        return row["pw_hash"] if row else None
+
+    @offloaded
     def save_match(self, g):
-        conn = self.pool.get_connection(); cur = conn.cursor()
-        cur.execute("INSERT INTO matches(left_score,right_score) VALUES (%s,%s)",
-                    (g.score["left"], g.score["right"]))
-        conn.commit(); cur.close(); conn.close()
+        with self.transaction("save_match") as cur:
+            cur.execute("INSERT INTO matches(left_score,right_score) VALUES (%s,%s)",
+                        (g.get_score("left"), g.get_score("right")))
 
+    @offloaded
     def make_room(self, username, room_name):
-        conn = self.pool.get_connection(); cur = conn.cursor()
         if(room_name == ""):
             room_name = username + "의 방"
-        cur.execute("INSERT INTO match_room(username, room_name) VALUES (%s,%s)", (username, room_name))
-        print(f"방 생성: {username} - {room_name}")
-        conn.commit(); cur.close(); conn.close()
+        with self.transaction("make_room") as cur:
+            cur.execute("INSERT INTO match_room(username, room_name) VALUES (%s,%s)", (username, room_name))
+            room_id = cur.lastrowid
+        log.info("방 생성: %s - %s", username, room_name)
+        return room_id
+
+    @offloaded
+    def delete_room(self, room_id):
+        with self.transaction("delete_room") as cur:
+            cur.execute("DELETE FROM match_room WHERE id = %s", (room_id,))
 
+    @offloaded
     def get_room_list(self):
-        print("방 목록 조회")
-        conn = self.pool.get_connection(); cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT * FROM match_room")
-        rooms = cur.fetchall()
-        cur.close(); conn.close()
+        log.debug("방 목록 조회")
+        with self.transaction("get_room_list", dictionary=True) as cur:
+            cur.execute("SELECT * FROM match_room")
+            rooms = cur.fetchall()
         return rooms
 # 싱글턴 인스턴스
 DB = Database() 
\ No newline at end of file
@@ -1,13 +1,78 @@
 import random
 import time
 import math
+from collections import deque
+
+from timer_wheel import TimerWheel
+from lag_comp import new_history
+from match_log import OP_SELECT, OP_ACTIVATE, OP_COUNTDOWN, OP_FINISH, OP_POSITION, OP_MOVE
+from logs import get_logger, SampledLogger
+
+# 틱마다 실행되는 경로의 디버그 로그는 샘플링 (LOG_LEVEL=DEBUG 일 때만 기록)
+hot_log = SampledLogger(get_logger("game"))
+
+# side 인덱스 - 내부에서는 정수로만 다루고, 문자열은 입력/출력 경계에서만 변환
+TOP, BOTTOM = 0, 1
+SIDE_NAMES = ("top", "bottom")
+SIDE_INDEX = {"top": TOP, "left": TOP, "bottom": BOTTOM, "right": BOTTOM}
+
+# 방 라이프사이클 - 게임 루프는 진행 중(카운트다운/플레이/일시정지)인 방만 물리를 돌린다
+WAITING = "waiting"       # 상대를 기다리는 중 (공 정지)
+COUNTDOWN = "countdown"   # 두 명이 모임, 시작 전 대기
+PLAYING = "playing"
+PAUSED = "paused"         # 득점 후 재발사 대기
+FINISHED = "finished"     # 상대가 나감
+PHASES = (WAITING, COUNTDOWN, PLAYING, PAUSED, FINISHED)
+
+# 소켓 핸들러 스레드에서 들어오는 스킬/라이프사이클 동작 - 패들 입력처럼 큐에 넣었다가 틱 시작(물리 전)에만 적용해
+# 리플레이 로그의 틱이 실제로 적용된 틱과 같게 한다
+QUEUED_ACTIONS = ("set_player_skills", "set_selected_skill", "activate_skill", "start_countdown", "finish")
+
+
+class Effect:
+    """시간 제한 효과 한 칸. 방마다 미리 만들어 두고 값만 바꿔 재사용 (활성화마다 dict 를 만들지 않음)"""
+    __slots__ = ("value", "until", "timer")
+
+    def __init__(self):
+        self.value = None   # 골대: 폭 비율, 먹물: 모양("circle"/"rect"). None 이면 비활성
+        self.until = 0      # 만료 틱
+        self.timer = None   # 만료 타이머
+
+    def to_dict(self, key):
+        return {key: self.value, "until": self.until} if self.value is not None else None
+
+
+class SideState:
+    """플레이어 한 명(위/아래)의 상태"""
+    __slots__ = ("x", "y", "input_x", "input_y", "input_dx", "input_dy", "input_seq", "input_tick", "ack_seq",
+                 "score", "username", "active_skill", "selected_skill", "skills", "cooldowns", "goal_effect", "blind_effect")
+
+    def __init__(self, x, y):
+        self.x = x                  # 패들 위치
+        self.y = y
+        self.input_x = None         # 다음 스텝에 적용할 절대 위치 (None 이면 없음)
+        self.input_y = None
+        self.input_dx = 0           # 다음 스텝에 적용할 이동량 합계
+        self.input_dy = 0
+        self.input_seq = None       # 버퍼에 있는 마지막 입력의 클라이언트 시퀀스 번호
+        self.input_tick = None      # 클라이언트가 입력할 때 보고 있던 서버 틱 (지연 보상용)
+        self.ack_seq = 0            # 마지막으로 적용한 입력의 시퀀스 번호 (상태 프레임으로 되돌려 줌)
+        self.score = 0
+        self.username = None        # 스킬 사용 횟수를 기록할 유저 (없으면 기록 안 함)
+        self.active_skill = 0       # 현재 활성화된 스킬 ID
+        self.selected_skill = 0     # 선택된 스킬 ID
+        self.skills = []            # 보유 스킬 정보
+        self.cooldowns = {}         # 스킬 ID -> 쿨타임 만료 타이머
+        self.goal_effect = Effect()   # 이 side 골대 축소
+        self.blind_effect = Effect()  # 이 side 화면 먹물
+
 
 class Game:
     W, H = 400, 700
     PR = 25     # 패들 반지름 (원형)
     BR = 12     # 공 반지름
     SPD, TICK = 5, 1/80     # 픽셀/frame, 60 fps
-    
+
     # 골대 설정
     GOAL_WIDTH = 121  # 골대 폭
     GOAL_HEIGHT = 20  # 골대 높이
@@ -17,24 +82,45 @@ class Game:
     GOAL_WIDTH_DURATION3 = 5.0 # 스킬3: 5초
     GOAL_WIDTH_DURATION4 = 3.0 # 스킬4: 3초
 
-    def __init__(self, room, socketio=None):
+    # 고정 스텝 설정
+    MAX_STEPS_PER_ADVANCE = 5   # 한 번의 advance()에서 따라잡을 최대 스텝 수 (과부하 시 폭주 방지)
+    MAX_SWEEP_EVENTS = 8        # 한 스텝 안에서 처리할 최대 충돌 횟수
+    RELAUNCH_DELAY = 1.0        # 득점 후 공을 다시 발사하기까지 (초)
+    BLIND_DURATION5 = 3.0       # 스킬5 먹물: 3초
+    BLIND_DURATION6 = 5.0       # 스킬6 먹물: 5초
+    DEFAULT_COOLDOWN = 3.0      # 스킬 정보에 쿨타임이 없을 때 (초)
+    COUNTDOWN_DURATION = 3.0    # 두 명이 모인 뒤 공을 발사하기까지 (초)
+
+    def __init__(self, room, socketio=None, seed=None):
         self.room = room
         self.socketio = socketio
+        # 공 발사 각도/방향은 방마다 시드가 정해진 난수로 (같은 시드 + 같은 입력이면 같은 경기)
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.recorder = None  # 리플레이용 입력 로그 (match_log.MatchRecorder, 끄면 None)
         self.bx, self.by = self.W//2, self.H//2
         self.vx, self.vy = self.SPD, self.SPD
-        self.paddle = {
-            "top": {"x": self.W//2, "y": 50},
-            "bottom": {"x": self.W//2, "y": self.H-50}
-        }
-        self.score = {"top": 0, "bottom": 0}
-        self.active_skill = {"top": 0, "bottom": 0}  # 현재 활성화된 스킬 ID
-        self.selected_skill = {"top": 0, "bottom": 0}  # 선택된 스킬 ID
-        self.player_skills = {"top": [], "bottom": []}
-        self.skill_cooldowns = {"top": {}, "bottom": {}}  # 스킬별 마지막 사용 시간
+        self.sides = (self._new_side(TOP, self.W//2, 50), self._new_side(BOTTOM, self.W//2, self.H-50))
+        self.static_rev = 0  # 스킬 목록이 바뀔 때마다 증가 (키프레임 재전송 기준)
+        self.publish_requested = False  # 다음 틱에 전송 주기와 상관없이 상태를 보내야 함
+        self.input_pending = False  # 입력 버퍼에 아직 적용하지 않은 패들 입력이 있음
+        self.actions = deque()  # 다음 틱 시작에 적용할 (동작 이름, 인자) - 핸들러 스레드는 append 만
+        self.dirty = True  # 마지막 전송 이후 화면에 보이는 상태가 바뀜 (안 바뀐 방은 하트비트만)
+        self.phase = WAITING
         self.base_speed = self.SPD
         self.base_goal_width = self.GOAL_WIDTH
-        self.goal_width_effect = {"top": None, "bottom": None} # 각 side별로 관리
-        self.blind_effect = {"top": None, "bottom": None}  # {"shape": "circle"/"rect", "until": float}
+        # 지연 발사 / 효과 만료 / 쿨타임은 모두 틱 단위 타이머로 처리 (스레드, 매 틱 시간 확인 없음)
+        self.timers = TimerWheel()
+        self.accumulator = 0.0  # 아직 시뮬레이션하지 않은 실제 경과 시간 (초)
+        self.ball_serial = 0  # 공을 중앙에 다시 놓을 때마다 증가 (득점을 넘어서 되감지 않도록)
+        self.history = new_history(self.TICK)  # 지연 보상용 최근 틱별 공 상태 (끄면 None)
+        self.tick_interval = self.TICK  # 스케줄러가 이 방을 돌리는 주기 (대기/종료 방은 느리게)
+        self.on_skill_used = None  # 스킬 효과가 적용될 때 (username, skill_id) 로 호출 (사용 횟수 기록용)
+
+    def _new_side(self, index, x, y):
+        """측면 상태 생성 훅. index(TOP/BOTTOM)는 기본 구현에서는 쓰지 않고,
+        BatchGame 이 엔진 배열에서 이 측면의 열을 고르는 데 쓴다"""
+        return SideState(x, y)
 
 
     def emit(self, event, data):
@@ -42,285 +128,514 @@ class Game:
         if self.socketio:
             self.socketio.emit(event, data, room=self.room)
 
-    # 물리 한 프레임
+    def request_publish(self):
+        """다음 전송 단계에서 이 방의 상태를 반드시 보내도록 표시 (직렬화는 루프에서 한 번만)"""
+        self.publish_requested = True
+        self.dirty = True
+
+    def is_active(self):
+        """물리를 돌려야 하는 방인지 (대기/종료 방은 공이 멈춰 있으므로 스텝하지 않음)"""
+        return self.phase in (COUNTDOWN, PLAYING, PAUSED)
+
+    def _stop_ball(self):
+        self.bx, self.by = self.W // 2, self.H // 2
+        self.vx, self.vy = 0, 0  # 정지 상태
+        self.ball_serial += 1
+
+    def start_countdown(self):
+        """두 명이 모이면 호출 - 공을 중앙에 세우고 카운트다운 후 발사"""
+        if self.recorder is not None:
+            self.recorder.event(OP_COUNTDOWN, self.timers.now)
+        if self.phase not in (WAITING, FINISHED):
+            return
+        self._stop_ball()
+        self.phase = COUNTDOWN
+        self.request_publish()
+        self.timers.schedule(self.ticks(self.COUNTDOWN_DURATION), self._start_play, self.rng.choice((-1, 1)))
+
+    def _start_play(self, direction):
+        self.phase = PLAYING
+        self._relaunch_ball(direction)
+
+    def finish(self):
+        """상대가 나가 더 진행할 수 없을 때 호출 - 공을 멈추고 종료 상태로"""
+        if self.recorder is not None:
+            self.recorder.event(OP_FINISH, self.timers.now)
+        self._stop_ball()
+        self.phase = FINISHED
+        self.request_publish()
+
+    def close(self):
+        """방이 없어질 때 호출 (배치 엔진의 행 반납, 입력 로그 닫기 등)"""
+        if self.recorder is not None:
+            self.recorder.close(self.timers.now, self)
+            self.recorder = None
+
+    def steps_due(self, elapsed):
+        """실제 경과 시간을 누적하고 지금 실행해야 할 고정 dt(TICK) 스텝 수를 반환 (실행은 호출자가)"""
+        self.accumulator += elapsed
+        steps = 0
+        # 느리게 도는 방(대기/종료)은 한 번에 더 많은 스텝을 따라잡아야 함
+        max_steps = max(self.MAX_STEPS_PER_ADVANCE, 2 * round(self.tick_interval / self.TICK))
+        while self.accumulator >= self.TICK and steps < max_steps:
+            self.accumulator -= self.TICK
+            steps += 1
+        if self.accumulator >= self.TICK:
+            # 너무 밀렸으면 남은 시간은 버림 (게임이 느려지는 대신 폭주하지 않도록)
+            self.accumulator %= self.TICK
+        return steps
+
+    def advance(self, elapsed):
+        """실제 경과 시간만큼 고정 dt 스텝을 실행. 실행한 스텝 수 반환"""
+        steps = self.steps_due(elapsed)
+        for _ in range(steps):
+            self.step()
+        return steps
+
+    def set_tick_rate(self, hz):
+        """이 방의 틱 주기 변경 (물리는 고정 dt 그대로, advance 호출 간격만 바뀜)"""
+        self.tick_interval = 1 / hz if hz > 0 else self.TICK
+
+    def goal_mouth(self, s):
+        """s 골대의 (왼쪽 x, 오른쪽 x)"""
+        ratio = self.sides[s].goal_effect.value
+        width = int(self.W * (ratio if ratio is not None else 0.5))
+        width = max(width, self.GOAL_WIDTH_MIN)
+        return (self.W - width) // 2, (self.W + width) // 2
+
+    def _paddle_toi(self, paddle, limit):
+        """공(원)이 패들(원)에 닿는 시각 (스텝 비율, 0~limit). 닿지 않거나 멀어지는 중이면 None"""
+        dx = self.bx - paddle.x
+        dy = self.by - paddle.y
+        b = dx * self.vx + dy * self.vy
+        if b >= 0:
+            return None
+        r = self.PR + self.BR
+        c = dx * dx + dy * dy - r * r
+        if c <= 0:
+            return 0.0
+        a = self.vx * self.vx + self.vy * self.vy
+        disc = b * b - a * c
+        if disc < 0:
+            return None
+        t = (-b - math.sqrt(disc)) / a
+        return t if t <= limit else None
+
+    def _next_event(self, limit, mouths):
+        """limit 안에서 가장 먼저 일어나는 (시각, 종류, side). 없으면 (limit, None, None)"""
+        best_t, best_kind, best_side = limit, None, None
+
+        # 좌우 벽 (골대 입구는 가운데에 있으므로 모서리에서도 항상 튕김)
+        if self.vx != 0:
+            wall_x = self.BR if self.vx < 0 else self.W - self.BR
+            t = max(0.0, (wall_x - self.bx) / self.vx)
+            if t <= best_t:
+                best_t, best_kind, best_side = t, "wall_x", None
+
+        # 위/아래: 골대 입구에서 골라인을 넘으면 득점, 아니면 벽 튕김
+        if self.vy != 0:
+            s = TOP if self.vy < 0 else BOTTOM
+            left, right = mouths[s]
+            goal_y = self.GOAL_HEIGHT - self.BR / 2 if s == TOP else self.H - self.GOAL_HEIGHT + self.BR / 2
+            wall_y = self.BR if s == TOP else self.H - self.BR
+            t = max(0.0, (goal_y - self.by) / self.vy)
+            if t <= best_t and left <= self.bx + self.vx * t <= right:
+                best_t, best_kind, best_side = t, "goal", s
+            else:
+                t = max(0.0, (wall_y - self.by) / self.vy)
+                if t <= best_t:
+                    kind = "goal" if left <= self.bx + self.vx * t <= right else "wall_y"
+                    best_t, best_kind, best_side = t, kind, s
+
+        # 패들 (원 대 원 스윕)
+        for s in (TOP, BOTTOM):
+            t = self._paddle_toi(self.sides[s], best_t)
+            if t is not None and (t < best_t or best_kind is None):
+                best_t, best_kind, best_side = t, "paddle", s
+
+        return best_t, best_kind, best_side
+
+    def _paddle_hit(self, s, nx, ny):
+        """패들 충돌 처리 - 공을 패들 밖으로 밀고, 다가오는 중이면 반사 + 스킬 처리"""
+        st = self.sides[s]
+        self.bx = st.x + nx * (self.PR + self.BR)
+        self.by = st.y + ny * (self.PR + self.BR)
+
+        # 반사 벡터 계산
+        dot_product = self.vx * nx + self.vy * ny
+        if dot_product >= 0:
+            return
+        self.vx = self.vx - 2 * dot_product * nx
+        self.vy = self.vy - 2 * dot_product * ny
+
+        self.emit("bounce", {"side": SIDE_NAMES[s]})
+        hot_log.debug("bounce", "bounce %s", SIDE_NAMES[s])
+        # 선택된 스킬이 있으면 자동으로 활성화
+        if st.active_skill == 0:  # 이미 활성화된 스킬이 없을 때만
+            self._auto_activate(s)
+
+        # 스킬이 활성화되어 있으면 공 속도 증가 및 쿨타임 시작
+        if st.active_skill > 0:
+            # 활성화된 스킬의 배율 찾기
+            skill = self._find_skill(s, st.active_skill)
+            if skill is not None:
+                multiplier = skill["multiplier"]
+                self.vy *= multiplier
+                self.vx *= multiplier
+            self.emit("skill_activated", {"side": SIDE_NAMES[s], "skill_id": st.active_skill})
+            self.apply_skill_effect(s)
+
+    def ticks(self, seconds):
+        """초를 게임 틱 수로 변환"""
+        return max(1, round(seconds / self.TICK))
+
+    # 물리 한 프레임 (고정 dt)
     def step(self):
-        self.bx += self.vx
-        self.by += self.vy
-
-        # 골대 스킬 효과 적용 (side별)
-        now = time.time()
-        for side in ["top", "bottom"]:
-            eff = self.goal_width_effect[side]
-            eff = self.blind_effect[side]
-            if eff and now + 0.1 > eff["until"]:
-                self.goal_width_effect[side] = None
-                self.blind_effect[side] = None
+        # 이번 틱까지 쌓인 스킬/라이프사이클 동작과 패들 입력 반영
+        if self.actions:
+            self.apply_actions()
+        if self.input_pending:
+            self._apply_input()
+
+        # 만료된 타이머 실행 (공 재발사, 스킬 효과 종료, 쿨타임 종료)
+        self.timers.advance()
 
         # 득점 체크용: 각 골대별로 적용
-        goal_width_top = int(self.W * (self.goal_width_effect["top"]["ratio"] if self.goal_width_effect["top"] else 0.5))
-        goal_width_top = max(goal_width_top, self.GOAL_WIDTH_MIN)
-        goal_left_top = (self.W - goal_width_top) // 2
-        goal_right_top = (self.W + goal_width_top) // 2
-        goal_width_bottom = int(self.W * (self.goal_width_effect["bottom"]["ratio"] if self.goal_width_effect["bottom"] else 0.5))
-        goal_width_bottom = max(goal_width_bottom, self.GOAL_WIDTH_MIN)
-        goal_left_bottom = (self.W - goal_width_bottom) // 2
-        goal_right_bottom = (self.W + goal_width_bottom) // 2
-
-        # 공이 골대 영역(y) 안에 있는지
-        in_top_goal_area = self.by - self.BR <= self.GOAL_HEIGHT
-        in_bottom_goal_area = self.by + self.BR >= self.H - self.GOAL_HEIGHT
-
-        # 좌우 벽 튕김 (골대 영역(y)에서는 튕기지 않음)
-        if not (in_top_goal_area or in_bottom_goal_area):
-            if self.bx - self.BR <= 0:
-                self.bx = self.BR
-                self.vx *= -1
-            elif self.bx + self.BR >= self.W:
-                self.bx = self.W - self.BR
+        mouths = (self.goal_mouth(TOP), self.goal_mouth(BOTTOM))
+
+        # 패들이 공 위로 옮겨진 경우 (스텝 시작 시 이미 겹침) - 밖으로 밀어냄
+        self._push_out(TOP)
+        self._push_out(BOTTOM)
+
+        self._move_ball(mouths)
+        self.record_history()
+        if self.vx or self.vy:
+            self.dirty = True
+
+    def _move_ball(self, mouths):
+        """스윕 이동: 이번 스텝의 이동 구간 안에서 가장 먼저 닿는 것부터 차례로 처리"""
+        remaining = 1.0
+        for _ in range(self.MAX_SWEEP_EVENTS):
+            t, kind, s = self._next_event(remaining, mouths)
+            self.bx += self.vx * t
+            self.by += self.vy * t
+            remaining -= t
+            if kind is None:
+                break
+            if kind == "goal":
+                self._goal(s)
+                return
+            if kind == "wall_x":
+                self.bx = self.BR if self.vx < 0 else self.W - self.BR
                 self.vx *= -1
-
-        # 위쪽 패들 충돌 (원형)
-        top_paddle = self.paddle["top"]
-        dx = self.bx - top_paddle["x"]
-        dy = self.by - top_paddle["y"]
+            elif kind == "wall_y":
+                self.by = self.BR if self.vy < 0 else self.H - self.BR
+                self.vy *= -1
+            else:
+                self._sweep_paddle(s)
+
+    def record_history(self):
+        if self.history is not None:
+            self.history.record(self.timers.now, self.bx, self.by, self.vx, self.vy, self.ball_serial)
+
+    def _compensate(self, s, client_tick):
+        """s 플레이어가 client_tick 을 보며 놓은 패들 위치로 되감아 충돌을 확인.
+        그 사이 공이 패들을 지나쳤다면 닿은 시점에서 반사시키고 현재 틱까지 공만 다시 진행"""
+        history = self.history
+        now = self.timers.now
+        # client_tick 은 [now - history.size + 1, now] 로 제한 - 미래 틱이면 되감지 않고, 너무 오래된 틱은 기록 끝까지만
+        rewind = min(now - client_tick, history.size - 1)
+        if rewind <= 0:
+            return
+        t0 = time.perf_counter()
+        history.checks += 1
+        st = self.sides[s]
+        reach = (self.PR + self.BR) ** 2
+        for tick in range(now - rewind, now):
+            past = history.get(tick)
+            if past is None or past[4] != self.ball_serial:
+                continue
+            bx, by, vx, vy, _ = past
+            dx, dy = bx - st.x, by - st.y
+            if dx * dx + dy * dy >= reach or dx * vx + dy * vy >= 0:
+                continue
+            # 그 뒤로 이 패들에 맞은 적이 있으면 (속도 방향이 바뀜) 이미 처리된 충돌
+            if (vy < 0) != (self.vy < 0):
+                break
+            self.bx, self.by, self.vx, self.vy = bx, by, vx, vy
+            self._sweep_paddle(s)
+            mouths = (self.goal_mouth(TOP), self.goal_mouth(BOTTOM))
+            serial = self.ball_serial
+            for _ in range(now - tick):
+                self._move_ball(mouths)
+                if self.ball_serial != serial:
+                    break   # 다시 진행하는 중에 득점
+            history.rewinds += 1
+            history.rewind_ticks += now - tick
+            break
+        history.cpu += time.perf_counter() - t0
+
+    # 아래 세 메서드는 배치 엔진(batch_engine.py)도 그대로 호출한다 - 결과가 스칼라 경로와 같도록
+    def _push_out(self, s):
+        st = self.sides[s]
+        dx = self.bx - st.x
+        dy = self.by - st.y
         distance = (dx*dx + dy*dy)**0.5
-        
-        # 충돌 감지 개선: 거리만으로 판단하고 추가 조건 제거
-        if distance <= self.PR + self.BR:
-            # 충돌 처리 - 패들 중심에서 공을 밀어냄
-            if distance > 0:
-                # 정규화된 방향 벡터
-                nx = dx / distance
-                ny = dy / distance
-                
-                # 공을 패들 밖으로 밀어냄
-                self.bx = top_paddle["x"] + nx * (self.PR + self.BR)
-                self.by = top_paddle["y"] + ny * (self.PR + self.BR)
-                
-                # 반사 벡터 계산
-                dot_product = self.vx * nx + self.vy * ny
-                self.vx = self.vx - 2 * dot_product * nx
-                self.vy = self.vy - 2 * dot_product * ny
-                
-                self.emit("bounce", {"side": "top"})
-                print("bounce emit in game_logic top")
-                # 선택된 스킬이 있으면 자동으로 활성화
-                if self.active_skill["top"] == 0:  # 이미 활성화된 스킬이 없을 때만
-                    activated = self.auto_activate_selected_skill("top")
-                
-                # 스킬이 활성화되어 있으면 공 속도 증가 및 쿨타임 시작
-                if self.active_skill["top"] > 0:
-                    # 활성화된 스킬의 배율 찾기
-                    for skill in self.player_skills["top"]:
-                        if skill["id"] == self.active_skill["top"]:
-                            multiplier = skill["multiplier"]
-                            self.vy *= multiplier
-                            self.vx *= multiplier
-                            break
-                    self.emit("skill_activated", {"side": "top", "skill_id": self.active_skill["top"]})
-                    self.apply_skill_effect("top")
-
-        # 아래쪽 패들 충돌 (원형)
-        bottom_paddle = self.paddle["bottom"]
-        dx = self.bx - bottom_paddle["x"]
-        dy = self.by - bottom_paddle["y"]
+        if 0 < distance < self.PR + self.BR:
+            self._paddle_hit(s, dx / distance, dy / distance)
+
+    def _sweep_paddle(self, s):
+        st = self.sides[s]
+        dx = self.bx - st.x
+        dy = self.by - st.y
         distance = (dx*dx + dy*dy)**0.5
-        
-        # 충돌 감지 개선: 거리만으로 판단하고 추가 조건 제거
-        if distance <= self.PR + self.BR:
-            # 충돌 처리 - 패들 중심에서 공을 밀어냄
-            if distance > 0:
-                # 정규화된 방향 벡터
-                nx = dx / distance
-                ny = dy / distance
-                
-                # 공을 패들 밖으로 밀어냄
-                self.bx = bottom_paddle["x"] + nx * (self.PR + self.BR)
-                self.by = bottom_paddle["y"] + ny * (self.PR + self.BR)
-                
-                # 반사 벡터 계산
-                dot_product = self.vx * nx + self.vy * ny
-                self.vx = self.vx - 2 * dot_product * nx
-                self.vy = self.vy - 2 * dot_product * ny
-
-                self.emit("bounce", {"side": "bottom"})
-                print("bounce emit in game_logic bottom")
-
-                # 선택된 스킬이 있으면 자동으로 활성화
-                if self.active_skill["bottom"] == 0:  # 이미 활성화된 스킬이 없을 때만
-                    activated = self.auto_activate_selected_skill("bottom")
-                
-                # 스킬이 활성화되어 있으면 공 속도 증가 및 쿨타임 시작
-                if self.active_skill["bottom"] > 0:
-                    # 활성화된 스킬의 배율 찾기
-                    for skill in self.player_skills["bottom"]:
-                        if skill["id"] == self.active_skill["bottom"]:
-                            multiplier = skill["multiplier"]
-                            self.vy *= multiplier
-                            self.vx *= multiplier
-                            break
-
-                    self.emit("skill_activated", {"side": "bottom", "skill_id": self.active_skill["bottom"]})
-                    self.apply_skill_effect("bottom")
-
-
-        # 골 체크 - 골대에 들어갔는지 확인
-        goal_width = self.W // 2  # 골대 폭을 전체의 1/2로 설정
-        goal_left = (self.W - goal_width) // 2
-        goal_right = (self.W + goal_width) // 2
-
-        # 위쪽 골대 (bottom 플레이어가 득점)
-        if (self.by <= self.GOAL_HEIGHT - self.BR/2 and goal_left_top <= self.bx <= goal_right_top):
-            self.score["bottom"] += 1
+        if distance > 0:
+            self._paddle_hit(s, dx / distance, dy / distance)
+
+    def _goal(self, s):
+        if s == TOP:
+            # 위쪽 골대 (bottom 플레이어가 득점)
+            self.sides[BOTTOM].score += 1
             self.reset_ball(1)  # 중앙에서 시작
-        # 아래쪽 골대 (top 플레이어가 득점)
-        elif (self.by >= self.H - self.GOAL_HEIGHT + self.BR/2 and goal_left_bottom <= self.bx <= goal_right_bottom):
-            self.score["top"] += 1
+        else:
+            # 아래쪽 골대 (top 플레이어가 득점)
+            self.sides[TOP].score += 1
             self.reset_ball(-1)  # 중앙에서 시작
-        # 상단 벽 튕김 (골대 범위 밖)
-        elif self.by - self.BR <= 0 and not (goal_left_top <= self.bx <= goal_right_top and self.by - self.BR <= self.GOAL_HEIGHT):
-            self.by = self.BR
-            self.vy *= -1
-        # 하단 벽 튕김 (골대 범위 밖)
-        elif self.by + self.BR >= self.H and not (goal_left_bottom <= self.bx <= goal_right_bottom and self.by + self.BR >= self.H - self.GOAL_HEIGHT):
-            self.by = self.H - self.BR
-            self.vy *= -1
-        self.socketio.emit("state", self.out(), room=self.room)
 
     def reset_ball(self, direction):
         """골이 들어간 후 중앙에서 1초 대기 후 발사"""
-        self.bx, self.by = self.W // 2, self.H // 2
-        self.vx, self.vy = 0, 0  # 정지 상태
+        self._stop_ball()
+        if self.phase == PLAYING:
+            self.phase = PAUSED
 
-        if self.socketio:
-            # 상태를 즉시 전송 (공은 정지한 채 중앙에 있음)
-            self.emit("state", self.out())
-
-            # 1초 후에 방향 설정 및 상태 전송
-            def resume_ball():
-                time.sleep(1.0)  # 1초 대기
+        # 상태를 즉시 전송 (공은 정지한 채 중앙에 있음)
+        self.request_publish()
 
-                angle = random.uniform(-0.4, 0.4)  # 살짝 좌우 편차
-                base_angle = -1 if direction < 0 else 1  # 위 또는 아래
-                speed = self.SPD
-                self.vx = speed * math.sin(angle)
-                self.vy = speed * base_angle * math.cos(angle)
+        # 1초 후에 방향 설정 (틱 루프 안에서 실행됨)
+        self.timers.schedule(self.ticks(self.RELAUNCH_DELAY), self._relaunch_ball, direction)
 
-                # 방향 설정 이후 상태 다시 전송
-                self.emit("state", self.out())
+    def _relaunch_ball(self, direction):
+        if self.phase in (COUNTDOWN, FINISHED):
+            return  # 종료 / 재시작 카운트다운 중에 남은 재발사 타이머
+        angle = self.rng.uniform(-0.4, 0.4)  # 살짝 좌우 편차
+        base_angle = -1 if direction < 0 else 1  # 위 또는 아래
+        speed = self.SPD
+        self.vx = speed * math.sin(angle)
+        self.vy = speed * base_angle * math.cos(angle)
+        if self.phase == PAUSED:
+            self.phase = PLAYING
 
-            self.socketio.start_background_task(resume_ball)
+        # 방향 설정 이후 상태 다시 전송
+        self.request_publish()
 
 
+    def _place_paddle(self, st, x, y):
+        # 패들을 원형으로 이동 (x, y축 모두 이동)
+        x = max(self.PR, min(self.W-self.PR, x))
+        y = max(self.PR, min(self.H-self.PR, y))
+        if x != st.x or y != st.y:
+            st.x = x
+            st.y = y
+            self.dirty = True
 
     def move_paddle(self, side, dx, dy):
-        if side == "left": side = "top"
-        if side == "right": side = "bottom"
-        
-        # 패들을 원형으로 이동 (x, y축 모두 이동)
-        x = max(self.PR, min(self.W-self.PR, self.paddle[side]["x"]+dx))
-        y = max(self.PR, min(self.H-self.PR, self.paddle[side]["y"]+dy))
-        self.paddle[side]["x"] = x
-        self.paddle[side]["y"] = y
+        s = SIDE_INDEX[side]
+        if self.recorder is not None:
+            self.recorder.place(OP_MOVE, self.timers.now, s, dx, dy)
+        st = self.sides[s]
+        self._place_paddle(st, st.x+dx, st.y+dy)
 
     def set_paddle_position(self, side, x, y):
         """패들을 절대 위치로 이동 (마우스 조작용)"""
-        if side == "left": side = "top"
-        if side == "right": side = "bottom"
-        
-        # 패들을 원형으로 이동 (x, y축 모두 이동)
-        x = max(self.PR, min(self.W-self.PR, x))
-        y = max(self.PR, min(self.H-self.PR, y))
-        self.paddle[side]["x"] = x
-        self.paddle[side]["y"] = y
-
-    def set_player_skills(self, side, skills):
+        s = SIDE_INDEX[side]
+        if self.recorder is not None:
+            self.recorder.place(OP_POSITION, self.timers.now, s, x, y)
+        self._place_paddle(self.sides[s], x, y)
+
+    def queue_paddle_position(self, side, x, y, seq=None, tick=None):
+        """절대 위치 입력을 버퍼에 넣음 (다음 스텝에 마지막 값만 적용). 덮어쓴 입력이 있으면 True.
+        tick 은 클라이언트가 보고 있던 서버 틱 (지연 보상 기준)"""
+        st = self.sides[SIDE_INDEX[side]]
+        coalesced = st.input_x is not None or st.input_dx != 0 or st.input_dy != 0
+        st.input_x, st.input_y = x, y
+        st.input_dx = st.input_dy = 0   # 절대 위치가 그 전의 이동량을 대체
+        if seq is not None:
+            st.input_seq = seq
+        if tick is not None:
+            st.input_tick = tick
+        self.input_pending = True
+        return coalesced
+
+    def queue_paddle_move(self, side, dx, dy, seq=None, tick=None):
+        """이동량 입력을 버퍼에 합산 (다음 스텝에 한 번에 적용). 합쳐진 입력이 있으면 True"""
+        st = self.sides[SIDE_INDEX[side]]
+        coalesced = st.input_x is not None or st.input_dx != 0 or st.input_dy != 0
+        st.input_dx += dx
+        st.input_dy += dy
+        if seq is not None:
+            st.input_seq = seq
+        if tick is not None:
+            st.input_tick = tick
+        self.input_pending = True
+        return coalesced
+
+    def queue_action(self, name, *args):
+        """QUEUED_ACTIONS 의 메서드 호출을 다음 틱 시작에 적용하도록 넣음 (핸들러 스레드용)"""
+        if name not in QUEUED_ACTIONS:
+            raise ValueError(f"큐에 넣을 수 없는 동작: {name}")
+        self.actions.append((name, args))
+
+    def apply_actions(self):
+        """큐에 쌓인 동작을 들어온 순서대로 적용 (게임 루프 스레드, 패들 입력 버퍼보다 먼저).
+        리플레이 로그에는 각 메서드가 이 시점의 틱으로 기록한다"""
+        while self.actions:
+            name, args = self.actions.popleft()
+            result = getattr(self, name)(*args)
+            if name == "activate_skill" and result:
+                side, skill_id = args
+                hot_log.debug("activate_skill", "스킬 %s 활성화 성공! %s 플레이어", skill_id, side)
+                self.emit("skill_activated", {"side": side, "skill_id": skill_id})
+        self.request_publish()
+
+    def _apply_input(self):
+        self.input_pending = False
+        if self.recorder is not None:
+            for s, st in enumerate(self.sides):
+                self.recorder.input(self.timers.now, s, st)
+        for st in self.sides:
+            if st.input_x is not None:
+                self._place_paddle(st, st.input_x, st.input_y)
+                st.input_x = st.input_y = None
+            if st.input_dx != 0 or st.input_dy != 0:
+                self._place_paddle(st, st.x + st.input_dx, st.y + st.input_dy)
+                st.input_dx = st.input_dy = 0
+            if st.input_seq is not None:
+                # 클라이언트 예측 보정용: 이 번호까지의 입력은 반영됨
+                st.ack_seq = st.input_seq
+                st.input_seq = None
+        for s, st in enumerate(self.sides):
+            if st.input_tick is not None:
+                if self.history is not None:
+                    self._compensate(s, st.input_tick)
+                st.input_tick = None
+
+    def get_score(self, side):
+        return self.sides[SIDE_INDEX[side]].score
+
+    def set_player_skills(self, side, skills, username=None):
         """플레이어의 스킬 정보 설정"""
-        if side == "left": side = "top"
-        if side == "right": side = "bottom"
-        self.player_skills[side] = skills
+        s = SIDE_INDEX[side]
+        if self.recorder is not None:
+            self.recorder.skills(self.timers.now, s, skills)
+        st = self.sides[s]
+        st.skills = skills
+        st.username = username
+        self.static_rev += 1
 
     def set_selected_skill(self, side, skill_id):
         """플레이어가 선택한 스킬 설정"""
-        if side == "left": side = "top"
-        if side == "right": side = "bottom"
-        self.selected_skill[side] = skill_id
+        s = SIDE_INDEX[side]
+        if self.recorder is not None:
+            self.recorder.skill(OP_SELECT, self.timers.now, s, skill_id)
+        self.sides[s].selected_skill = skill_id
 
     def activate_skill(self, side, skill_id):
-        if side == "left": side = "top"
-        if side == "right": side = "bottom"
-        
+        s = SIDE_INDEX[side]
+        if self.recorder is not None:
+            self.recorder.skill(OP_ACTIVATE, self.timers.now, s, skill_id)
+        st = self.sides[s]
+
         # 플레이어가 해당 스킬을 소유하고 있는지 확인
-        for skill in self.player_skills[side]:
-            if skill["id"] == skill_id:
-                # 쿨타임 확인 - 스킬이 이미 활성화되어 있으면 사용 불가
-                if self.active_skill[side] > 0:
-                    return False
-                
-                # 스킬 활성화 (쿨타임은 실제 사용 시점에 기록)
-                self.active_skill[side] = skill_id
-                
-                # 3,4번 스킬은 즉시 효과 적용
-                if skill_id in [3, 4, 5, 6]:
-                    self.apply_skill_effect(side)
-                
-                return True
-        return False
+        if self._find_skill(s, skill_id) is None:
+            return False
+        # 쿨타임 확인 - 스킬이 이미 활성화되어 있거나 쿨타임 중이면 사용 불가
+        if st.active_skill > 0 or skill_id in st.cooldowns:
+            return False
+
+        # 스킬 활성화 (쿨타임은 실제 사용 시점에 기록)
+        st.active_skill = skill_id
+        self.dirty = True
+
+        # 3~6번 스킬은 즉시 효과 적용
+        if skill_id in (3, 4, 5, 6):
+            self.apply_skill_effect(s)
+        return True
 
     def auto_activate_selected_skill(self, side):
         """충돌 시 선택된 스킬을 자동으로 활성화"""
-        if side == "left": side = "top"
-        if side == "right": side = "bottom"
-        
-        selected_id = self.selected_skill[side]
-        if selected_id > 0:
+        return self._auto_activate(SIDE_INDEX[side])
+
+    def _auto_activate(self, s):
+        st = self.sides[s]
+        selected_id = st.selected_skill
+        if selected_id > 0 and selected_id not in st.cooldowns:
             # 스킬 활성화
-            self.active_skill[side] = selected_id
+            st.active_skill = selected_id
             # 선택된 스킬 리셋 (선택 상태 취소)
-            self.selected_skill[side] = 0
+            st.selected_skill = 0
+            self.dirty = True
             return True
         return False
 
-    def apply_skill_effect(self, side):
+    def _set_effect(self, s, kind, value, seconds):
+        """s 쪽 효과 칸(kind: "goal_effect"/"blind_effect")에 값을 넣고 만료 타이머를 (기존 것은 취소하고) 예약"""
+        effect = getattr(self.sides[s], kind)
+        if effect.timer:
+            effect.timer.cancel()
+        ticks = self.ticks(seconds)
+        effect.value = value
+        effect.until = self.timers.now + ticks
+        effect.timer = self.timers.schedule(ticks, self._clear_effect, s, kind)
+
+    def _clear_effect(self, s, kind):
+        effect = getattr(self.sides[s], kind)
+        effect.value = None
+        effect.timer = None
+        self.request_publish()
+
+    def _find_skill(self, s, skill_id):
+        for skill in self.sides[s].skills:
+            if skill["id"] == skill_id:
+                return skill
+        return None
+
+    def _start_cooldown(self, s, skill_id):
+        skill = self._find_skill(s, skill_id)
+        seconds = skill.get("cooldown") if skill else None
+        if seconds is None:
+            seconds = self.DEFAULT_COOLDOWN
+        cooldowns = self.sides[s].cooldowns
+        cooldowns[skill_id] = self.timers.schedule(self.ticks(float(seconds)), cooldowns.pop, skill_id, None)
+
+    def apply_skill_effect(self, s):
         """스킬 효과를 적용"""
-        if self.active_skill[side] > 0:
-            skill_id = self.active_skill[side]
+        st = self.sides[s]
+        if st.active_skill > 0:
+            skill_id = st.active_skill
             # 골대 축소 스킬(3,4)
             if skill_id == 3:
-                self.goal_width_effect[side] = {"ratio": self.GOAL_WIDTH_SKILL3, "until": time.time() + self.GOAL_WIDTH_DURATION3}
+                self._set_effect(s, "goal_effect", self.GOAL_WIDTH_SKILL3, self.GOAL_WIDTH_DURATION3)
             elif skill_id == 4:
-                self.goal_width_effect[side] = {"ratio": self.GOAL_WIDTH_SKILL4, "until": time.time() + self.GOAL_WIDTH_DURATION4}
+                self._set_effect(s, "goal_effect", self.GOAL_WIDTH_SKILL4, self.GOAL_WIDTH_DURATION4)
             # 먹물/블라인드 효과(5,6)는 상대방 side에 적용
             if skill_id == 5:
-                self.blind_effect[self._opponent(side)] = {"shape": "circle", "until": time.time() + 3.0}
+                self._set_effect(self._opponent(s), "blind_effect", "circle", self.BLIND_DURATION5)
             elif skill_id == 6:
-                self.blind_effect[self._opponent(side)] = {"shape": "rect", "until": time.time() + 5.0}
-            self.emit("state", self.out())
-            self.active_skill[side] = 0
+                self._set_effect(self._opponent(s), "blind_effect", "rect", self.BLIND_DURATION6)
+            self._start_cooldown(s, skill_id)
+            self.request_publish()
+            st.active_skill = 0
+            if self.on_skill_used is not None and st.username:
+                self.on_skill_used(st.username, skill_id)
 
 
     def get_skill_cooldown(self, side, skill_id):
         """스킬의 남은 쿨타임을 반환 (초 단위)"""
-        if side == "left": side = "top"
-        if side == "right": side = "bottom"
-        
-        if skill_id not in self.skill_cooldowns[side]:
-            return 0.0
-        
-        current_time = time.time()
-        last_used = self.skill_cooldowns[side][skill_id]
-        
-        # 데이터베이스에서 쿨타임 정보 가져오기
-        cooldown_duration = 3.0  # 기본값
-        for skill in self.player_skills[side]:
-            if skill["id"] == skill_id and "cooldown" in skill:
-                cooldown_duration = skill["cooldown"]
-                break
-        
-        remaining = cooldown_duration - (current_time - last_used)
-        return max(0.0, remaining)
+        timer = self.sides[SIDE_INDEX[side]].cooldowns.get(skill_id)
+        return self.timers.remaining(timer) * self.TICK
 
-    def out(self):
+    def out_static(self):
+        """매치 동안 거의 바뀌지 않는 데이터 (양쪽 스킬 목록)"""
         # 스킬 데이터를 JSON 직렬화 가능한 형태로 변환
         def convert_skills(skills):
             converted = []
@@ -332,38 +647,52 @@ class Game:
                     converted_skill['usage_count'] = int(converted_skill['usage_count'])
                 converted.append(converted_skill)
             return converted
-        
-        # 골대 효과 디버그 로그
-        top_ratio = self.goal_width_effect["top"]["ratio"] if self.goal_width_effect["top"] else 0.5
-        bottom_ratio = self.goal_width_effect["bottom"]["ratio"] if self.goal_width_effect["bottom"] else 0.5
-        
+
+        return {
+            "top": convert_skills(self.sides[TOP].skills),
+            "bottom": convert_skills(self.sides[BOTTOM].skills)
+        }
+
+    def out_dynamic(self):
+        """매 틱 바뀔 수 있는 상태 (스킬 목록 제외). 델타 비교를 위해 매번 새 dict 로 만든다"""
+        top, bottom = self.sides
+        top_ratio = top.goal_effect.value if top.goal_effect.value is not None else 0.5
+        bottom_ratio = bottom.goal_effect.value if bottom.goal_effect.value is not None else 0.5
+
         if top_ratio != 0.5 or bottom_ratio != 0.5:
-            print(f"골대 효과 적용: top={top_ratio}, bottom={bottom_ratio}")
-        
+            hot_log.debug("goal_effect", "골대 효과 적용: top=%s, bottom=%s", top_ratio, bottom_ratio)
+
         return {
+            "phase":    self.phase,
+            "tick":     self.timers.now,   # 서버 틱 번호 (클라이언트 예측/보정 기준)
+            "ack":      {"top": top.ack_seq, "bottom": bottom.ack_seq},  # 마지막으로 반영한 입력 시퀀스
             "ball":     {"x": self.bx, "y": self.by, "timestamp": time.time() * 1000},
-            "paddles":  self.paddle,
-            "scores":   self.score,
+            "paddles":  {
+                "top": {"x": top.x, "y": top.y},
+                "bottom": {"x": bottom.x, "y": bottom.y}
+            },
+            "scores":   {"top": top.score, "bottom": bottom.score},
             "goal_width_ratio": {
                 "top": top_ratio,
                 "bottom": bottom_ratio
             },
             "blind_effect": {
-                "top": self.blind_effect["top"],
-                "bottom": self.blind_effect["bottom"]
+                "top": top.blind_effect.to_dict("shape"),
+                "bottom": bottom.blind_effect.to_dict("shape")
             },
             "skills":   {
-                "top": {
-                    "active": self.active_skill["top"], 
-                    "available": convert_skills(self.player_skills["top"])
-                },
-                "bottom": {
-                    "active": self.active_skill["bottom"], 
-                    "available": convert_skills(self.player_skills["bottom"])
-                }
+                "top": {"active": top.active_skill},
+                "bottom": {"active": bottom.active_skill}
             }
+        }
 
-        } 
-
-    def _opponent(self, side):
-        return "bottom" if side == "top" else "top" 
\ No newline at end of file
+    def out(self):
+        """전체 상태 (동적 상태 + 스킬 목록)"""
+        state = self.out_dynamic()
+        static = self.out_static()
+        for side in ("top", "bottom"):
+            state["skills"][side]["available"] = static[side]
+        return state
+
+    def _opponent(self, s):
+        return BOTTOM if s == TOP else TOP
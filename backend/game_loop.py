@@ -0,0 +1,260 @@
+import os
+import time
+import heapq
+
+from game_logic import Game
+from state_sync import encode_state, get_encoder
+from batch_engine import step_games
+from spectators import SPECTATORS
+from metrics import LOOP_PASS_SECONDS, ROOM_TICK_SECONDS, TICK_LATENESS_SECONDS
+from logs import get_logger
+
+# 상태 브로드캐스트 주기 (Hz). 0 이면 물리 틱(Game.TICK)과 같은 주기로 전송
+STATE_PUBLISH_HZ = float(os.getenv("STATE_PUBLISH_HZ", "0"))
+# 상대를 기다리는 방의 틱 주기 (Hz)
+IDLE_TICK_HZ = float(os.getenv("IDLE_TICK_HZ", "20"))
+# 상태가 바뀌지 않은 방(대기/일시정지/종료)에 보내는 하트비트 주기 (Hz)
+STATE_HEARTBEAT_HZ = float(os.getenv("STATE_HEARTBEAT_HZ", "1"))
+
+log = get_logger("loop")
+
+
+def fail_room(g):
+    """방 하나의 스텝/전송이 예외를 냄 - 기록하고 그 방만 종료 상태로 돌려 다른 방은 계속 돌게 함
+    (except 블록 안에서 호출)"""
+    log.exception("방 %s 처리 중 오류 - 방을 종료 상태로 돌림", getattr(g, "room", "?"))
+    try:
+        g.finish()
+    except Exception:
+        log.exception("방 %s 종료 처리 실패", getattr(g, "room", "?"))
+
+
+class RoomStats:
+    """방별 직렬화/전송 프로파일링 카운터"""
+    __slots__ = ("frames", "serialize_total", "emit_total", "serialize_last", "emit_last")
+
+    def __init__(self):
+        self.frames = 0
+        self.serialize_total = 0.0
+        self.emit_total = 0.0
+        self.serialize_last = 0.0
+        self.emit_last = 0.0
+
+    def to_dict(self):
+        frames = self.frames or 1
+        return {
+            "frames": self.frames,
+            "serialize_ms_avg": self.serialize_total / frames * 1000,
+            "emit_ms_avg": self.emit_total / frames * 1000,
+            "serialize_ms_last": self.serialize_last * 1000,
+            "emit_ms_last": self.emit_last * 1000,
+        }
+
+
+class StatePublisher:
+    """네트워크 전송 단계: 방마다 한 번 직렬화하고 한 번 emit"""
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+        self.stats = {}
+
+    def publish(self, room, game):
+        # 입장 키프레임(핸들러 스레드)과 순서가 뒤섞이지 않도록 인코딩과 emit 을 방 인코더 lock 안에서
+        with get_encoder(room).lock:
+            t0 = time.perf_counter()
+            event, frame = encode_state(room, game)
+            t1 = time.perf_counter()
+            self.socketio.emit(event, frame, room=room)
+            t2 = time.perf_counter()
+
+        st = self.stats.get(room)
+        if st is None:
+            st = self.stats[room] = RoomStats()
+        st.frames += 1
+        st.serialize_last = t1 - t0
+        st.emit_last = t2 - t1
+        st.serialize_total += st.serialize_last
+        st.emit_total += st.emit_last
+
+    def drop(self, room):
+        self.stats.pop(room, None)
+
+
+class RoomClock:
+    """방 하나의 틱 일정과 지연 통계"""
+    __slots__ = ("game", "due", "last_run", "next_publish", "next_heartbeat", "ticks", "missed",
+                 "published", "skipped", "jitter_last", "jitter_max", "jitter_total")
+
+    def __init__(self, game, now):
+        self.game = game
+        self.due = now
+        self.last_run = None
+        self.next_publish = now
+        self.next_heartbeat = now
+        self.ticks = 0
+        self.published = 0  # 보낸 상태 프레임 수
+        self.skipped = 0    # 바뀐 게 없어서 건너뛴 전송 수
+        self.missed = 0
+        self.jitter_last = 0.0
+        self.jitter_max = 0.0
+        self.jitter_total = 0.0
+
+    def to_dict(self):
+        ticks = self.ticks or 1
+        return {
+            "phase": self.game.phase,
+            "tick_hz": 1 / self.game.tick_interval,
+            "ticks": self.ticks,
+            "published": self.published,
+            "skipped": self.skipped,
+            "missed_deadlines": self.missed,
+            "jitter_ms_last": self.jitter_last * 1000,
+            "jitter_ms_max": self.jitter_max * 1000,
+            "jitter_ms_avg": self.jitter_total / ticks * 1000,
+        }
+
+
+class GameLoop:
+    """방별 마감 시각(힙)으로 돌리는 틱 스케줄러. 물리 단계(advance)와 전송 단계(publish)는 분리됨"""
+
+    def __init__(self, socketio, games, publish_hz=STATE_PUBLISH_HZ, heartbeat_hz=STATE_HEARTBEAT_HZ):
+        self.socketio = socketio
+        self.games = games
+        self.publisher = StatePublisher(socketio)
+        self.publish_interval = 1 / publish_hz if publish_hz > 0 else Game.TICK
+        self.heartbeat_interval = 1 / heartbeat_hz if heartbeat_hz > 0 else 1.0
+        self.clocks = {}
+        self.heap = []      # (due, room) - 오래된 항목은 꺼낼 때 clock.due 와 비교해 버림
+
+    def _sync_rooms(self, now):
+        # 새로 생긴 방은 바로 스케줄, 사라진 방은 꺼낼 때 정리
+        for r, g in list(self.games.items()):
+            clock = self.clocks.get(r)
+            if clock is None or clock.game is not g:
+                clock = self.clocks[r] = RoomClock(g, now)
+                heapq.heappush(self.heap, (clock.due, r))
+
+    def _start_room(self, clock, now):
+        """지연 통계를 갱신하고 이번에 실행할 고정 스텝 수를 반환"""
+        g = clock.game
+        late = now - clock.due
+        clock.ticks += 1
+        clock.jitter_last = late
+        clock.jitter_max = max(clock.jitter_max, late)
+        clock.jitter_total += late
+        TICK_LATENESS_SECONDS.observe(late)
+        if late >= g.tick_interval:
+            clock.missed += 1
+
+        elapsed = g.tick_interval if clock.last_run is None else now - clock.last_run
+        clock.last_run = now
+        if g.actions:
+            # 스텝하지 않는 대기 방에서도 입장/카운트다운 같은 동작은 틱 경계에서 적용
+            try:
+                g.apply_actions()
+            except Exception:
+                fail_room(g)
+        if not g.is_active():
+            # 대기/종료 방은 공이 멈춰 있으므로 물리를 돌리지 않음 (밀린 시간도 버림)
+            g.accumulator = 0.0
+            return 0
+        return g.steps_due(elapsed)
+
+    def _finish_room(self, r, clock, now):
+        g = clock.game
+        interval = g.tick_interval
+
+        # 2) 전송 단계 - 게임이 즉시 전송을 요청했거나, 전송 주기가 됐고 상태가 바뀌었을 때만 (틱당 최대 1회).
+        #    안 바뀐 방(대기/정지한 공)은 하트비트 주기로만 보냄
+        if (g.publish_requested or now >= clock.next_heartbeat
+                or (g.dirty and now >= clock.next_publish)):
+            g.publish_requested = False
+            g.dirty = False
+            clock.next_publish = max(clock.next_publish + max(self.publish_interval, interval), now)
+            clock.next_heartbeat = now + self.heartbeat_interval
+            clock.published += 1
+            try:
+                self.publisher.publish(r, g)
+            except Exception:
+                fail_room(g)
+        else:
+            clock.skipped += 1
+
+        # 다음 마감은 "지금"이 아니라 "이번 마감" 기준 (늦잠을 보정). 한 주기 이상 밀렸으면 건너뜀
+        due = clock.due + interval
+        if due <= now:
+            due = now + interval - (now - clock.due) % interval
+        clock.due = due
+        heapq.heappush(self.heap, (due, r))
+
+    def run_due(self, now=None):
+        """마감이 지난 방들을 처리하고 다음 마감 시각을 반환"""
+        if now is None:
+            now = time.perf_counter()
+        if len(self.clocks) != len(self.games):
+            self._sync_rooms(now)
+        due_rooms = []
+        while self.heap and self.heap[0][0] <= now:
+            due, r = heapq.heappop(self.heap)
+            clock = self.clocks.get(r)
+            if clock is None or clock.due != due:
+                continue
+            if self.games.get(r) is not clock.game:
+                # 방이 없어졌거나 새 Game 으로 바뀜
+                del self.clocks[r]
+                self.publisher.drop(r)
+                ROOM_TICK_SECONDS.remove(r)
+                continue
+            due_rooms.append((r, clock))
+        if due_rooms:
+            t0 = time.perf_counter()
+            # 1) 물리 단계 - 실제 경과 시간만큼 고정 dt 스텝 (배치 엔진이면 마감된 방들을 한 번에)
+            steps = [self._start_room(clock, now) for _, clock in due_rooms]
+            step_games([clock.game for _, clock in due_rooms], steps, fail_room)
+            t1 = time.perf_counter()
+            physics_share = (t1 - t0) / len(due_rooms)
+            for r, clock in due_rooms:
+                t2 = time.perf_counter()
+                self._finish_room(r, clock, now)
+                ROOM_TICK_SECONDS.observe(physics_share + time.perf_counter() - t2, r)
+            LOOP_PASS_SECONDS.observe(time.perf_counter() - t0)
+        # 3) 관전자 피드 - 플레이어 전송을 모두 끝낸 뒤, 낮은 주기로 방마다 한 번 인코딩해 지연 전송
+        try:
+            SPECTATORS.publish_due(self.socketio, self.games, now)
+        except Exception:
+            log.exception("관전자 피드 전송 실패")
+        return self.heap[0][0] if self.heap else now + Game.TICK
+
+    def run_once(self, max_wait=Game.TICK):
+        """다음 마감까지(최대 max_wait) 잔 뒤 마감이 된 방들을 처리"""
+        next_due = self.run_due()
+        wait = min(next_due - time.perf_counter(), max_wait)
+        if wait > 0:
+            self.socketio.sleep(wait)
+        self.run_due()
+
+    def run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                # 어떤 오류도 모든 방의 루프를 멈추게 하지 않음
+                log.exception("게임 루프 패스 실패")
+                self.socketio.sleep(Game.TICK)
+
+    def set_room_rate(self, room, hz):
+        g = self.games.get(room)
+        if g:
+            g.set_tick_rate(hz)
+
+    def get_stats(self):
+        stats = {}
+        for r, clock in self.clocks.items():
+            stats[r] = clock.to_dict()
+            st = self.publisher.stats.get(r)
+            if st is not None:
+                stats[r].update(st.to_dict())
+            history = getattr(clock.game, "history", None)
+            if history is not None:
+                stats[r]["lag_comp"] = history.stats()
+        return stats
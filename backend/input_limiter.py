@@ -0,0 +1,69 @@
+import os
+import time
+from threading import Lock
+
+# ─────────── 패들 입력 속도 제한 ───────────
+# 브라우저는 마우스 이동을 240Hz 이상으로 보낼 수 있지만 게임은 80Hz 로만 입력을 반영한다.
+# 연결(sid)마다 토큰 버킷으로 초당 이벤트 수를 제한하고, 통과한 입력은 Game 의 입력 버퍼에 쌓여
+# 다음 스텝에서 마지막 값(이동량은 합산)만 적용된다.
+INPUT_RATE_LIMIT = float(os.getenv("INPUT_RATE_LIMIT", "120"))   # sid 당 초당 허용 이벤트 수 (0 이면 제한 없음)
+INPUT_BURST = float(os.getenv("INPUT_BURST", "40"))              # 순간적으로 허용하는 이벤트 수
+# 키프레임 재요청(state_resync)은 매번 전체 상태를 인코딩하므로 훨씬 낮게 제한
+RESYNC_RATE_LIMIT = float(os.getenv("RESYNC_RATE_LIMIT", "2"))   # sid 당 초당 허용 재요청 수 (0 이면 제한 없음)
+RESYNC_BURST = float(os.getenv("RESYNC_BURST", "3"))
+
+
+class InputLimiter:
+    def __init__(self, rate=INPUT_RATE_LIMIT, burst=INPUT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}   # sid -> [토큰, 마지막 충전 시각]
+        self.lock = Lock()
+        self.received = 0
+        self.dropped = 0
+        self.coalesced = 0  # 스텝에 반영되기 전에 덮어쓰인 입력 수
+        self.limited = {}   # sid -> 버린 이벤트 수
+
+    def allow(self, sid):
+        """이 sid 의 입력을 처리해도 되면 True, 한도를 넘었으면 False (버린 것으로 집계)"""
+        with self.lock:
+            self.received += 1
+            if self.rate <= 0:
+                return True
+            now = time.monotonic()
+            bucket = self.buckets.get(sid)
+            if bucket is None:
+                bucket = self.buckets[sid] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                self.dropped += 1
+                self.limited[sid] = self.limited.get(sid, 0) + 1
+                return False
+            bucket[0] -= 1
+            return True
+
+    def record(self, coalesced):
+        if coalesced:
+            self.coalesced += 1
+
+    def forget(self, sid):
+        with self.lock:
+            self.buckets.pop(sid, None)
+            self.limited.pop(sid, None)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "received": self.received,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "connections": len(self.buckets),
+                "limited_connections": len(self.limited),
+            }
+
+
+# 싱글턴 인스턴스
+INPUTS = InputLimiter()
+RESYNCS = InputLimiter(RESYNC_RATE_LIMIT, RESYNC_BURST)
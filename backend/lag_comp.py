@@ -0,0 +1,60 @@
+import os
+from array import array
+
+# ─────────── 지연 보상 (lag compensation) ───────────
+# 클라이언트는 RTT/2 전의 공을 보고 패들을 움직인다. 입력에 "보고 있던 서버 틱"을 붙여 보내면,
+# 서버는 최근 틱들의 공 상태를 되감아 그 시점에 패들이 공에 닿았는지 확인하고, 닿았으면 그 시점에서 반사시킨 뒤
+# 현재 틱까지 공만 다시 시뮬레이션한다. 되감기는 LAG_COMP_MAX_REWIND_MS 까지만 허용 (0 이면 끔).
+LAG_COMP_MAX_REWIND_MS = float(os.getenv("LAG_COMP_MAX_REWIND_MS", "150"))
+
+FIELDS = 5  # bx, by, vx, vy, ball_serial
+
+
+class StateHistory:
+    """방 하나의 최근 틱별 공 상태 링 버퍼 (고정 크기, 틱마다 할당 없음)"""
+    __slots__ = ("size", "ticks", "data", "rewinds", "rewind_ticks", "checks", "cpu")
+
+    def __init__(self, size):
+        self.size = size
+        self.ticks = array("q", [-1] * size)          # 슬롯에 저장된 틱 번호
+        self.data = array("d", [0.0] * (size * FIELDS))
+        self.rewinds = 0        # 되감아서 살려낸 충돌 수
+        self.rewind_ticks = 0   # 그때 되감은 틱 수 합계
+        self.checks = 0         # 되감기 검사 횟수
+        self.cpu = 0.0          # 검사 + 재시뮬레이션에 쓴 시간 (초)
+
+    def record(self, tick, bx, by, vx, vy, serial):
+        i = tick % self.size
+        self.ticks[i] = tick
+        base = i * FIELDS
+        data = self.data
+        data[base] = bx
+        data[base + 1] = by
+        data[base + 2] = vx
+        data[base + 3] = vy
+        data[base + 4] = serial
+
+    def get(self, tick):
+        """tick 직후의 (bx, by, vx, vy, serial). 버퍼에서 밀려났으면 None"""
+        i = tick % self.size
+        if self.ticks[i] != tick:
+            return None
+        base = i * FIELDS
+        return tuple(self.data[base:base + FIELDS])
+
+    def stats(self):
+        return {
+            "rewinds": self.rewinds,
+            "rewind_ticks_avg": self.rewind_ticks / self.rewinds if self.rewinds else 0.0,
+            "checks": self.checks,
+            "cpu_ms_total": self.cpu * 1000,
+            "bytes": self.ticks.itemsize * self.size + self.data.itemsize * len(self.data),
+        }
+
+
+def new_history(tick_seconds):
+    """설정된 최대 되감기 시간만큼의 링 버퍼. 지연 보상을 끄면 None"""
+    if LAG_COMP_MAX_REWIND_MS <= 0:
+        return None
+    return StateHistory(max(1, round(LAG_COMP_MAX_REWIND_MS / 1000 / tick_seconds)) + 1)
+
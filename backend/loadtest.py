@@ -0,0 +1,123 @@
+"""Socket.IO 부하 테스트 - 유휴/활성 연결을 단계적으로 늘리며 서버가 버티는 수를 잰다.
+
+서버를 모드별로 띄우고 같은 옵션으로 실행해 결과(JSON)를 비교한다:
+
+    ASYNC_MODE=threading python app.py     # 터미널 1
+    python loadtest.py --label threading   # 터미널 2
+    ASYNC_MODE=eventlet python app.py
+    python loadtest.py --label eventlet
+
+필요 패키지: python-socketio[asyncio_client] (aiohttp)
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import socketio
+
+STATE_EVENTS = ("state", "state_delta", "state_bin")
+
+
+class Probe:
+    """연결 하나. 활성 연결은 방에 들어가 패들 입력을 보내고 상태 수신률을 잰다"""
+
+    def __init__(self, url):
+        self.url = url
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.states = 0
+        self.connected = False
+        for event in STATE_EVENTS:
+            self.sio.on(event, self._on_state)
+
+    async def _on_state(self, *args):
+        self.states += 1
+
+    async def connect(self, timeout):
+        try:
+            await asyncio.wait_for(self.sio.connect(self.url, transports=["websocket"]), timeout)
+            self.connected = True
+        except Exception:
+            self.connected = False
+        return self.connected
+
+    async def play(self, room, side, hz, stop):
+        # username 을 보내지 않으면 join 이 DB 를 건드리지 않음
+        await self.sio.emit("join", {"room": room})
+        x = 200
+        while not stop.is_set():
+            x = 100 if x >= 300 else x + 5
+            await self.sio.emit("paddle_position", {"room": room, "side": side, "x": x, "y": 100})
+            await asyncio.sleep(1 / hz)
+
+    async def close(self):
+        if self.connected:
+            await self.sio.disconnect()
+
+
+async def ramp_idle(args):
+    probes, steps = [], []
+    while len(probes) < args.idle:
+        batch = [Probe(args.url) for _ in range(min(args.step, args.idle - len(probes)))]
+        t0 = time.perf_counter()
+        ok = await asyncio.gather(*(p.connect(args.timeout) for p in batch))
+        probes.extend(batch)
+        alive = sum(p.connected for p in probes)
+        steps.append({"target": len(probes), "connected": alive,
+                      "batch_connect_s": round(time.perf_counter() - t0, 3)})
+        if sum(ok) < len(batch) * (1 - args.max_fail):
+            break
+    return probes, steps
+
+
+async def run_active(args):
+    pairs = args.active // 2
+    probes = [Probe(args.url) for _ in range(pairs * 2)]
+    await asyncio.gather(*(p.connect(args.timeout) for p in probes))
+    stop = asyncio.Event()
+    tasks = []
+    for i in range(pairs):
+        room = f"loadtest-{i}"
+        for j, side in enumerate(("left", "right")):
+            p = probes[i * 2 + j]
+            if p.connected:
+                tasks.append(asyncio.create_task(p.play(room, side, args.input_hz, stop)))
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    connected = [p for p in probes if p.connected]
+    rates = sorted(p.states / args.duration for p in connected)
+    result = {
+        "target": len(probes),
+        "connected": len(connected),
+        "state_rate_p50": rates[len(rates) // 2] if rates else 0,
+        "state_rate_min": rates[0] if rates else 0,
+    }
+    return probes, result
+
+
+async def main(args):
+    report = {"label": args.label, "url": args.url}
+
+    idle, report["idle"] = await ramp_idle(args)
+    report["idle_sustained"] = sum(p.connected for p in idle)
+
+    active, report["active"] = await run_active(args)
+
+    await asyncio.gather(*(p.close() for p in idle + active), return_exceptions=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--label", default="", help="결과에 남길 서버 모드 이름")
+    parser.add_argument("--idle", type=int, default=2000, help="최대 유휴 연결 수")
+    parser.add_argument("--step", type=int, default=100, help="유휴 연결을 한 번에 늘리는 수")
+    parser.add_argument("--active", type=int, default=200, help="게임 중인 연결 수 (2명씩 한 방)")
+    parser.add_argument("--input-hz", type=float, default=60, help="활성 연결의 패들 입력 빈도")
+    parser.add_argument("--duration", type=float, default=10, help="활성 구간 측정 시간 (초)")
+    parser.add_argument("--timeout", type=float, default=5, help="연결 타임아웃 (초)")
+    parser.add_argument("--max-fail", type=float, default=0.01, help="이 비율 이상 연결에 실패하면 증가 중단")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,147 @@
+from datetime import datetime
+from threading import Lock
+
+from async_runtime import LoadOnce
+from database import DB
+from write_behind import WRITES
+
+# ─────────── 로비 방 목록 ───────────
+# 메모리의 방 인덱스가 로비의 기준 데이터다. 방 생성/삭제는 match_room 에 바로 기록하고 (생성은 AUTO_INCREMENT id 가 필요),
+# 자주 바뀌는 인원 수 / 게임 중 여부는 지연 쓰기 큐(WRITES)에 합쳐 두었다가 주기적으로 기록한다.
+# DB 호출은 lock 밖에서 해 로비 조회/브로드캐스트가 MySQL 왕복을 기다리지 않게 한다.
+# 클라이언트는 접속 시 버전이 붙은 스냅샷을 받고, 이후에는 room_added / room_changed / room_removed 델타만 받는다.
+# 클러스터 모드에서는 델타 버전을 모든 노드가 공유하는 카운터(shared_version)에서 받아 노드끼리 겹치지 않게 한다.
+
+
+def serialize_room(room):
+    room = room.copy()  # 원본 변형 방지
+    if isinstance(room.get('created_at'), datetime):
+        room['created_at'] = room['created_at'].isoformat()
+    return room
+
+
+class RoomIndex:
+    def __init__(self):
+        self.rooms = {}         # room_name -> 직렬화된 방 정보
+        self.reserved = set()   # DB 에 생성 중인 방 이름 (중복 생성 방지)
+        self.version = 0        # 지금까지 본 가장 큰 델타 버전 (단일 노드면 델타마다 1씩 증가)
+        self.lock = Lock()      # 딕셔너리/버전만 보호 - DB 호출은 lock 밖에서
+        self.shared_version = None  # () -> 클러스터 공유 버전 (클러스터 모드에서 socket_handlers 가 설정)
+        self.loader = LoadOnce(self._load)
+
+    def _load(self):
+        rooms = {room["room_name"]: serialize_room(room) for room in DB.get_room_list()}
+        with self.lock:
+            self.rooms = rooms
+        return True
+
+    def _ensure_loaded(self):
+        # 서버 시작 후 처음 한 번만 DB 에서 읽음. 읽는 동안 다른 로비 호출은 lock 을 쥐지 않고 기다림 (LoadOnce)
+        self.loader.get()
+
+    def exists(self, room_name):
+        self._ensure_loaded()
+        with self.lock:
+            return room_name in self.rooms
+
+    def get(self, room_name):
+        self._ensure_loaded()
+        with self.lock:
+            room = self.rooms.get(room_name)
+            return dict(room) if room else None
+
+    def _stamp(self, event, payload):
+        """델타에 버전을 붙임 (lock 밖에서). 공유 카운터는 버스 왕복이라 lock 을 쥔 채 기다리지 않는다.
+        버전이 건너뛰거나 순서가 바뀌면 클라이언트가 스냅샷을 다시 받는다"""
+        version = self.shared_version() if self.shared_version is not None else None
+        with self.lock:
+            if version is None:
+                self.version += 1
+                version = self.version
+            else:
+                self.version = max(self.version, version)
+        payload["version"] = version
+        return event, payload
+
+    def snapshot(self):
+        self._ensure_loaded()
+        with self.lock:
+            return {"version": self.version, "rooms": list(self.rooms.values())}
+
+    def add(self, username, room_name):
+        """방 추가. 이미 있으면 None, 아니면 ("room_added", 페이로드)"""
+        if room_name == "":
+            room_name = username + "의 방"
+        self._ensure_loaded()
+        with self.lock:
+            if room_name in self.rooms or room_name in self.reserved:
+                return None
+            self.reserved.add(room_name)
+            WRITES.discard_room(room_name)
+        try:
+            room_id = DB.make_room(username, room_name)  # AUTO_INCREMENT id 가 필요해 바로 기록
+        except Exception:
+            with self.lock:
+                self.reserved.discard(room_name)
+            raise
+        room = {
+            "id": room_id,
+            "created_at": datetime.now().isoformat(),
+            "is_playing": 0,
+            "max_player": 2,
+            "current_player": 0,
+            "room_name": room_name,
+            "username": username,
+        }
+        with self.lock:
+            self.reserved.discard(room_name)
+            self.rooms[room_name] = room
+        return self._stamp("room_added", {"room": dict(room)})
+
+    def update(self, room_name, current_player=None, is_playing=None):
+        """인원 수 / 게임 중 여부 변경. 바뀐 게 없으면 None, 아니면 ("room_changed", 페이로드)"""
+        self._ensure_loaded()
+        with self.lock:
+            room = self.rooms.get(room_name)
+            if room is None:
+                return None
+            changed = False
+            if current_player is not None and room["current_player"] != current_player:
+                room["current_player"] = current_player
+                changed = True
+            if is_playing is not None and bool(room["is_playing"]) != is_playing:
+                room["is_playing"] = int(is_playing)
+                changed = True
+            if not changed:
+                return None
+            WRITES.room_counters(room_name, current_player, is_playing)
+            room = dict(room)
+        return self._stamp("room_changed", {"room": room})
+
+    def remove(self, room_name):
+        """방 삭제. 없으면 None, 아니면 ("room_removed", 페이로드)"""
+        self._ensure_loaded()
+        with self.lock:
+            room = self.rooms.pop(room_name, None)
+            if room is None:
+                return None
+            WRITES.discard_room(room_name)
+        # 같은 이름으로 곧바로 다시 만든 방을 지우지 않도록 id 로 삭제
+        DB.delete_room(room["id"])
+        return self._stamp("room_removed", {"room_name": room_name})
+
+    def apply(self, event, payload):
+        """다른 클러스터 노드에서 생긴 델타 반영 (DB 는 그 노드가 이미 기록함).
+        버전은 공유 카운터에서 받은 것이라 노드끼리 겹치지 않고, 스냅샷 버전은 지금까지 본 가장 큰 버전을 따른다"""
+        self._ensure_loaded()
+        with self.lock:
+            if event == "room_removed":
+                self.rooms.pop(payload["room_name"], None)
+            else:
+                room = payload["room"]
+                self.rooms[room["room_name"]] = dict(room)
+            self.version = max(self.version, payload["version"])
+
+
+# 싱글턴 인스턴스
+LOBBY = RoomIndex()
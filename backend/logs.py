@@ -0,0 +1,43 @@
+import os
+import logging
+from threading import Lock
+
+# ─────────── 로그 ───────────
+# print() 대신 레벨이 있는 로거를 쓴다. 틱/입력마다 찍히는 로그는 SampledLogger 로 키마다 N 번에 한 번만 남기고,
+# 레벨이 꺼져 있으면 문자열 포맷도 하지 않는다.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "100"))   # 샘플링 로그는 키마다 N 번에 한 번 기록
+
+
+def configure_logging():
+    """서버 시작 시 한 번 호출 (app.py)"""
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+def get_logger(name):
+    return logging.getLogger(f"airhockey.{name}")
+
+
+class SampledLogger:
+    """같은 키의 로그를 every 번에 한 번만 남기는 로거 (핫 패스용)"""
+
+    def __init__(self, logger, every=LOG_SAMPLE_EVERY):
+        self.logger = logger
+        self.every = max(1, every)
+        self.counts = {}
+        self.lock = Lock()
+
+    def log(self, level, key, msg, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        with self.lock:
+            n = self.counts.get(key, 0) + 1
+            self.counts[key] = n
+        if n % self.every == 1 or self.every == 1:
+            self.logger.log(level, "%s [%d회째, %d회에 1번 기록]" % (msg % args if args else msg, n, self.every))
+
+    def debug(self, key, msg, *args):
+        self.log(logging.DEBUG, key, msg, *args)
+
+    def info(self, key, msg, *args):
+        self.log(logging.INFO, key, msg, *args)
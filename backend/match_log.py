@@ -0,0 +1,159 @@
+import os
+import re
+import json
+import time
+import struct
+
+# ─────────── 경기 입력 로그 (리플레이용) ───────────
+# 물리는 고정 dt 틱 + 방마다 시드가 정해진 난수라서, 시드와 "몇 번째 틱에 무슨 입력이 들어왔는지"만 있으면
+# 경기를 그대로 다시 만들 수 있다. out() 프레임을 저장하는 것보다 훨씬 작다.
+# REPLAY_DIR 를 지정하면 방마다 <방>-<시각>-<시드>.rpl 파일에 추가 기록만 하는 바이너리 로그를 남긴다 (비우면 끔).
+REPLAY_DIR = os.getenv("REPLAY_DIR", "")
+
+MAGIC = b"AHRP"
+LOG_VERSION = 1
+HEADER = struct.Struct("<4sBQ")     # magic, 버전, 시드
+RECORD = struct.Struct("<BI")       # 종류, 틱 (그 틱의 step() 직전에 적용)
+SIDE = struct.Struct("<B")
+SIDE_SKILL = struct.Struct("<BH")
+PAIR = struct.Struct("<dd")
+U32 = struct.Struct("<I")
+CHECKSUM = struct.Struct("<ddddIIQ")  # 공 위치/속도, 점수, 공 재배치 횟수 - 리플레이 결과 확인용
+
+# 레코드 종류
+OP_INPUT = 1        # 틱 시작 시 적용된 패들 입력 버퍼 (합쳐진 뒤의 값)
+OP_SKILLS = 2       # set_player_skills (스킬 목록 JSON)
+OP_SELECT = 3       # set_selected_skill
+OP_ACTIVATE = 4     # activate_skill
+OP_COUNTDOWN = 5    # start_countdown
+OP_FINISH = 6       # finish
+OP_POSITION = 7     # set_paddle_position (버퍼를 거치지 않는 즉시 이동)
+OP_MOVE = 8         # move_paddle
+OP_END = 9          # 방이 닫힘 (마지막 틱 + 상태 체크섬)
+
+# OP_INPUT 플래그
+HAS_POSITION = 1
+HAS_DELTA = 2
+HAS_SEQ = 4
+HAS_TICK = 8
+
+
+def checksum(game):
+    return CHECKSUM.pack(game.bx, game.by, game.vx, game.vy,
+                         game.sides[0].score, game.sides[1].score, game.ball_serial)
+
+
+class MatchRecorder:
+    """방 하나의 입력 로그 작성기. 레코드는 파일 버퍼에 덧붙이기만 한다.
+    핸들러에서 온 패들 입력/스킬/라이프사이클 동작은 모두 큐를 거쳐 게임 루프 스레드의 틱 시작에 적용되므로,
+    기록되는 틱은 그 동작이 실제로 적용된 틱이다 (close 만 방을 없앤 쪽에서 호출)"""
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.file = open(path, "wb")
+        self.bytes = 0
+        self._write(HEADER.pack(MAGIC, LOG_VERSION, seed))
+
+    def _write(self, data):
+        self.file.write(data)
+        self.bytes += len(data)
+
+    def _record(self, op, tick, payload=b""):
+        self._write(RECORD.pack(op, tick) + payload)
+
+    def input(self, tick, s, st):
+        """st(SideState)의 입력 버퍼를 소비하기 직전에 호출"""
+        flags = 0
+        payload = b""
+        if st.input_x is not None:
+            flags |= HAS_POSITION
+            payload += PAIR.pack(st.input_x, st.input_y)
+        if st.input_dx != 0 or st.input_dy != 0:
+            flags |= HAS_DELTA
+            payload += PAIR.pack(st.input_dx, st.input_dy)
+        if st.input_seq is not None:
+            flags |= HAS_SEQ
+            payload += U32.pack(st.input_seq & 0xFFFFFFFF)
+        if st.input_tick is not None:
+            flags |= HAS_TICK
+            payload += U32.pack(st.input_tick & 0xFFFFFFFF)
+        if flags:
+            self._record(OP_INPUT, tick, bytes((s, flags)) + payload)
+
+    def skills(self, tick, s, skills):
+        data = json.dumps(skills, ensure_ascii=False, separators=(",", ":"), default=float).encode()
+        self._record(OP_SKILLS, tick, SIDE.pack(s) + U32.pack(len(data)) + data)
+
+    def skill(self, op, tick, s, skill_id):
+        self._record(op, tick, SIDE_SKILL.pack(s, skill_id))
+
+    def place(self, op, tick, s, a, b):
+        self._record(op, tick, SIDE.pack(s) + PAIR.pack(a, b))
+
+    def event(self, op, tick):
+        self._record(op, tick)
+
+    def close(self, tick, game):
+        self._record(OP_END, tick, checksum(game))
+        self.file.close()
+
+
+def new_recorder(room, seed):
+    """REPLAY_DIR 가 설정돼 있으면 이 방의 로그 작성기, 아니면 None"""
+    if not REPLAY_DIR:
+        return None
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    name = re.sub(r"[^\w-]", "_", str(room))[:40]
+    return MatchRecorder(os.path.join(REPLAY_DIR, f"{name}-{int(time.time())}-{seed:x}.rpl"), seed)
+
+
+def read_log(path):
+    """(시드, [(종류, 틱, 값), ...]) - 값은 종류별로 해석한 튜플"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != LOG_VERSION:
+        raise ValueError(f"리플레이 로그가 아닙니다: {path}")
+    pos = HEADER.size
+    records = []
+    while pos + RECORD.size <= len(data):
+        op, tick = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        if op == OP_INPUT:
+            s, flags = data[pos], data[pos + 1]
+            pos += 2
+            position = delta = seq = client_tick = None
+            if flags & HAS_POSITION:
+                position = PAIR.unpack_from(data, pos)
+                pos += PAIR.size
+            if flags & HAS_DELTA:
+                delta = PAIR.unpack_from(data, pos)
+                pos += PAIR.size
+            if flags & HAS_SEQ:
+                seq = U32.unpack_from(data, pos)[0]
+                pos += U32.size
+            if flags & HAS_TICK:
+                client_tick = U32.unpack_from(data, pos)[0]
+                pos += U32.size
+            value = (s, position, delta, seq, client_tick)
+        elif op == OP_SKILLS:
+            s = data[pos]
+            (size,) = U32.unpack_from(data, pos + 1)
+            pos += 1 + U32.size
+            value = (s, json.loads(data[pos:pos + size]))
+            pos += size
+        elif op in (OP_SELECT, OP_ACTIVATE):
+            value = SIDE_SKILL.unpack_from(data, pos)
+            pos += SIDE_SKILL.size
+        elif op in (OP_POSITION, OP_MOVE):
+            value = (data[pos],) + PAIR.unpack_from(data, pos + 1)
+            pos += 1 + PAIR.size
+        elif op == OP_END:
+            value = data[pos:pos + CHECKSUM.size]
+            pos += CHECKSUM.size
+        elif op in (OP_COUNTDOWN, OP_FINISH):
+            value = None
+        else:
+            raise ValueError(f"알 수 없는 레코드 종류 {op} (offset {pos - RECORD.size})")
+        records.append((op, tick, value))
+    return seed, records
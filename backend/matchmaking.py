@@ -0,0 +1,202 @@
+import math
+import os
+import time
+from bisect import bisect_left, insort
+from threading import Lock
+
+from metrics import MATCH_WAIT_SECONDS, MATCHES_MADE
+
+# ─────────── 자동 매칭 큐 ───────────
+# 대기 중인 플레이어를 점수 구간(버킷)별로 넣어 두고, 비어 있지 않은 버킷 번호만 정렬해 두어 가장 가까운 상대를
+# 이분 탐색으로 찾는다 (DB 를 다시 읽지 않음). 처음에는 같은 버킷끼리만 짝짓고, 오래 기다릴수록
+# MATCH_WIDEN_SECONDS 마다 한 버킷씩 허용 범위를 넓힌다 (최대 MATCH_MAX_RANGE).
+# 큐는 노드(프로세스)마다 따로 있다. 짝이 지어지면 socket_handlers 가 로딩 방과 Game 을 바로 만든다.
+MATCH_BY = os.getenv("MATCH_BY", "rating")                             # rating | loadout
+MATCH_BUCKET_WIDTH = float(os.getenv("MATCH_BUCKET_WIDTH", "100"))      # rating 모드의 버킷 폭
+MATCH_WIDEN_SECONDS = float(os.getenv("MATCH_WIDEN_SECONDS", "5"))      # 이만큼 기다릴 때마다 범위 +1 버킷
+MATCH_MAX_RANGE = int(os.getenv("MATCH_MAX_RANGE", "5"))               # 최대 허용 버킷 차이
+MATCH_SWEEP_INTERVAL = float(os.getenv("MATCH_SWEEP_INTERVAL", "0.5"))  # 범위가 넓어진 대기자를 다시 짝짓는 주기 (초)
+MATCH_QUEUE_MAX = int(os.getenv("MATCH_QUEUE_MAX", "10000"))           # 노드당 최대 대기 인원
+
+
+class MatchQueueFull(Exception):
+    """대기 인원이 MATCH_QUEUE_MAX 에 도달함"""
+
+
+def match_rating(skills):
+    """매칭 점수 = 스킬 사용 횟수 합(경험치). 클라이언트가 보낸 값은 믿지 않고 서버의 스킬 기록으로만 계산한다"""
+    rating = float(sum(skill.get("usage_count", 0) or 0 for skill in skills))
+    return rating if math.isfinite(rating) and rating > 0 else 0.0  # NaN/inf 면 버킷 번호를 만들 수 없음
+
+
+def match_bucket(rating, skills):
+    if MATCH_BY == "loadout":
+        return len(skills)  # 해금한 스킬 수가 같은 사람끼리
+    return int(rating // MATCH_BUCKET_WIDTH)
+
+
+class QueueEntry:
+    __slots__ = ("sid", "username", "rating", "bucket", "skills", "since")
+
+    def __init__(self, sid, username, rating, bucket, skills, since):
+        self.sid = sid
+        self.username = username
+        self.rating = rating
+        self.bucket = bucket
+        self.skills = skills
+        self.since = since
+
+
+class MatchQueue:
+    def __init__(self, widen_seconds=MATCH_WIDEN_SECONDS, max_range=MATCH_MAX_RANGE, max_size=MATCH_QUEUE_MAX):
+        self.widen_seconds = widen_seconds
+        self.max_range = max_range
+        self.max_size = max_size
+        self.waiting = {}   # sid -> QueueEntry (넣은 순서 = 오래 기다린 순서, 다시 넣어도 자리 유지)
+        self.buckets = {}   # 버킷 번호 -> {sid: QueueEntry}
+        self.active = []    # 비어 있지 않은 버킷 번호 (정렬)
+        self.lock = Lock()
+        self.enqueued = 0
+        self.matched = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+
+    def _radius(self, entry, now):
+        if self.widen_seconds <= 0:
+            return self.max_range
+        return min(self.max_range, int((now - entry.since) / self.widen_seconds))
+
+    def _add(self, entry):
+        self.waiting[entry.sid] = entry
+        bucket = self.buckets.get(entry.bucket)
+        if bucket is None:
+            bucket = self.buckets[entry.bucket] = {}
+            insort(self.active, entry.bucket)
+        bucket[entry.sid] = entry
+
+    def _take(self, entry):
+        del self.waiting[entry.sid]
+        self._unbucket(entry)
+
+    def _unbucket(self, entry):
+        bucket = self.buckets[entry.bucket]
+        del bucket[entry.sid]
+        if not bucket:
+            del self.buckets[entry.bucket]
+            del self.active[bisect_left(self.active, entry.bucket)]
+
+    def _partner(self, entry, radius):
+        """radius 버킷 안에서 가장 가까운 버킷의 가장 오래 기다린 상대 (없으면 None).
+        같은 계정이 다른 소켓으로 함께 기다리는 경우는 상대로 고르지 않는다"""
+        active = self.active
+        hi = bisect_left(active, entry.bucket)
+        lo = hi - 1
+        while True:
+            d_hi = active[hi] - entry.bucket if hi < len(active) else None
+            d_lo = entry.bucket - active[lo] if lo >= 0 else None
+            if d_hi is not None and d_hi <= radius and (d_lo is None or d_hi <= d_lo):
+                bucket = active[hi]
+                hi += 1
+            elif d_lo is not None and d_lo <= radius:
+                bucket = active[lo]
+                lo -= 1
+            else:
+                return None
+            for other in self.buckets[bucket].values():
+                if other.sid != entry.sid and other.username != entry.username:
+                    return other
+
+    def _pair(self, first, second, now):
+        # first 가 먼저 들어온 쪽 (왼쪽 자리)
+        self._take(first)
+        self._take(second)
+        for entry in (first, second):
+            wait = now - entry.since
+            self.wait_total += wait
+            MATCH_WAIT_SECONDS.observe(wait)
+        self.matched += 1
+        MATCHES_MADE.inc(str(abs(first.bucket - second.bucket)))
+        return first, second
+
+    def enqueue(self, sid, username, skills, now=None):
+        """대기열에 넣는다. 같은 버킷에 상대가 있으면 바로 짝지어 (먼저 온 사람, 나) 를, 아니면 None 을 반환"""
+        if now is None:
+            now = time.perf_counter()
+        rating = match_rating(skills)
+        entry = QueueEntry(sid, username, rating, match_bucket(rating, skills), skills, now)
+        with self.lock:
+            old = self.waiting.get(sid)
+            if old is not None:
+                # 다시 요청하면 새 조건으로 교체. 대기 시간과 waiting 의 순서는 유지 (sweep 이 since 순서에 기댐)
+                self._unbucket(old)
+                entry.since = old.since
+            elif len(self.waiting) >= self.max_size:
+                self.rejected += 1
+                raise MatchQueueFull()
+            else:
+                self.enqueued += 1
+            other = self._partner(entry, self._radius(entry, now))
+            if other is not None:
+                self._add(entry)
+                # 다시 넣은 사람은 대기 시간을 유지하므로 상대보다 먼저 왔을 수 있음
+                return self._pair(*((other, entry) if other.since <= entry.since else (entry, other)), now)
+            self._add(entry)
+            return None
+
+    def cancel(self, sid):
+        with self.lock:
+            entry = self.waiting.get(sid)
+            if entry is None:
+                return False
+            self._take(entry)
+            self.cancelled += 1
+            return True
+
+    def sweep(self, now=None):
+        """범위가 넓어진 대기자들을 오래 기다린 순서로 다시 짝지어 [(먼저 온 사람, 상대), ...] 반환"""
+        if now is None:
+            now = time.perf_counter()
+        pairs = []
+        with self.lock:
+            widened = []
+            for entry in self.waiting.values():
+                radius = self._radius(entry, now)
+                if radius == 0:
+                    break  # 이후는 더 늦게 들어온 사람들
+                widened.append((entry, radius))
+            for entry, radius in widened:
+                if entry.sid not in self.waiting:
+                    continue  # 이번 차례에 이미 짝지어짐
+                other = self._partner(entry, radius)
+                if other is not None:
+                    first, second = (entry, other) if entry.since <= other.since else (other, entry)
+                    pairs.append(self._pair(first, second, now))
+        return pairs
+
+    def position(self, sid):
+        """같은 버킷에서 내 앞에 기다리는 사람 수 + 1 (없으면 None)"""
+        with self.lock:
+            entry = self.waiting.get(sid)
+            if entry is None:
+                return None
+            for i, other in enumerate(self.buckets[entry.bucket].values()):
+                if other.sid == sid:
+                    return i + 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "by": MATCH_BY,
+                "queued": len(self.waiting),
+                "buckets": {bucket: len(entries) for bucket, entries in self.buckets.items()},
+                "enqueued": self.enqueued,
+                "matched": self.matched,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+                "wait_seconds_avg": self.wait_total / max(1, self.matched * 2),
+            }
+
+
+# 싱글턴 인스턴스
+MATCHMAKER = MatchQueue()
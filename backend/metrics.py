@@ -0,0 +1,193 @@
+import os
+import json
+from bisect import bisect_left
+from threading import Lock
+
+from flask_socketio import SocketIO
+
+# ─────────── 메트릭 (Prometheus 텍스트 형식) ───────────
+# 외부 라이브러리 없이 카운터/게이지/히스토그램만 구현한다. 핫 패스에서는 숫자만 올리고,
+# 방 수/커넥션 풀 같은 상태 값은 /metrics 요청 시점에 콜백으로 읽는다 (틱마다 갱신하지 않음).
+# 상태 프레임 바이트 수는 METRICS_BYTES_SAMPLE 번에 한 번만 직렬화해 재고 그 배수로 더한다 (추정치).
+METRICS_BYTES_SAMPLE = int(os.getenv("METRICS_BYTES_SAMPLE", "16"))
+
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = Lock()
+        self.series = {}    # 라벨 값 튜플 -> 값
+
+    def remove(self, *labels):
+        """라벨 값이 사라진 시계열 삭제 (없어진 방 등)"""
+        with self.lock:
+            self.series.pop(labels, None)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = list(self.series.items())
+        for labels, value in items:
+            lines.extend(self._lines(labels, value))
+        return lines
+
+    def _lines(self, labels, value):
+        return [f"{self.name}{_labels(self.labelnames, labels)} {value}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """값을 직접 set 하거나, callback() 이 {라벨 값 튜플: 값} 을 돌려주면 수집 시점에 읽음"""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def set(self, value, *labels):
+        with self.lock:
+            self.series[labels] = value
+
+    def render(self):
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception:
+                values = {}  # 수집 실패가 /metrics 전체를 망가뜨리지 않도록
+            with self.lock:
+                self.series = dict(values)
+        return super().render()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=TIME_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        with self.lock:
+            entry = self.series.get(labels)
+            if entry is None:
+                entry = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+
+    def _lines(self, labels, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + ("+Inf",), counts):
+            cumulative += n
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# 게임 루프
+LOOP_PASS_SECONDS = REGISTRY.register(Histogram(
+    "airhockey_loop_pass_seconds", "마감된 방들을 한 번 처리(물리 + 전송)하는 데 걸린 시간"))
+ROOM_TICK_SECONDS = REGISTRY.register(Histogram(
+    "airhockey_room_tick_seconds", "방 하나의 틱 처리 시간 (물리는 같은 차례 방들로 나눈 값 + 전송)", ("room",)))
+TICK_LATENESS_SECONDS = REGISTRY.register(Histogram(
+    "airhockey_tick_lateness_seconds", "방 틱이 마감보다 늦게 실행된 시간"))
+
+# 소켓 트래픽
+EVENTS_IN = REGISTRY.register(Counter(
+    "airhockey_socket_events_in_total", "받은 Socket.IO 이벤트 수", ("event",)))
+EVENTS_OUT = REGISTRY.register(Counter(
+    "airhockey_socket_events_out_total", "보낸 Socket.IO emit 수 (방 브로드캐스트는 1회)", ("event",)))
+BYTES_OUT = REGISTRY.register(Counter(
+    "airhockey_socket_bytes_out_total", "emit 한 페이로드 바이트 수 (JSON 은 샘플링 추정치)", ("event",)))
+
+# DB
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "airhockey_db_query_seconds", "Database 메서드별 트랜잭션 시간 (커넥션 대기 제외)", ("query",)))
+DB_POOL_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "airhockey_db_pool_wait_seconds", "커넥션 풀에서 커넥션을 빌리기까지 기다린 시간"))
+
+# 자동 매칭
+MATCH_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "airhockey_match_wait_seconds", "매칭 큐에 넣은 뒤 상대를 찾기까지 기다린 시간",
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)))
+MATCHES_MADE = REGISTRY.register(Counter(
+    "airhockey_matches_total", "자동 매칭으로 만든 경기 수 (두 사람의 버킷 차이별)", ("range",)))
+
+# 클러스터
+CLUSTER_FORWARDED = REGISTRY.register(Counter(
+    "airhockey_cluster_forwarded_total", "방을 맡은 다른 노드로 넘긴 Socket.IO 이벤트 수", ("event",)))
+
+
+def gauge(name, help, callback, labelnames=()):
+    """수집 시점에 callback() 으로 값을 읽는 게이지 등록 (라벨 없으면 callback 은 숫자를 반환)"""
+    if labelnames:
+        return REGISTRY.register(Gauge(name, help, labelnames, callback))
+    return REGISTRY.register(Gauge(name, help, (), lambda: {(): callback()}))
+
+
+class MeteredSocketIO(SocketIO):
+    """emit 마다 이벤트 수와 (샘플링한) 바이트 수를 세는 SocketIO"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.emit_counts = {}
+
+    def emit(self, event, *args, **kwargs):
+        EVENTS_OUT.inc(event)
+        data = args[0] if args else None
+        if isinstance(data, (bytes, bytearray)):
+            BYTES_OUT.inc(event, amount=len(data))  # 바이너리는 길이만 보면 되므로 항상 정확히
+        elif data is not None:
+            n = self.emit_counts.get(event, 0)
+            self.emit_counts[event] = n + 1
+            if n % METRICS_BYTES_SAMPLE == 0:
+                try:
+                    size = len(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+                except (TypeError, ValueError):
+                    size = 0
+                BYTES_OUT.inc(event, amount=size * METRICS_BYTES_SAMPLE)
+        return super().emit(event, *args, **kwargs)
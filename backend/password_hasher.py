@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from async_runtime import run_blocking
+
+# ─────────── 비밀번호 해시 워커 풀 ───────────
+# 해시 한 번은 일부러 수십 ms 의 CPU 를 쓴다. 요청 스레드에서 돌리면 로그인이 몰릴 때 GIL 을 잡고 게임 틱을 굶기므로
+# 별도 프로세스 풀에서 계산한다. 처리 중 + 대기 중인 요청이 한도를 넘으면 바로 거절하고 (HTTP 429) 큐를 늘리지 않는다.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))    # 해시 프로세스 수 (0 이면 요청 스레드에서 계산)
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))       # 워커 수를 넘어 기다릴 수 있는 요청 수
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")      # werkzeug 해시 방식/비용 (예: pbkdf2:sha256:600000)
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10")) # 결과를 기다리는 최대 시간 (초)
+
+
+class HasherBusy(Exception):
+    """해시 워커와 대기열이 모두 차서 요청을 받을 수 없음"""
+
+
+class HasherTimeout(HasherBusy):
+    """PASSWORD_HASH_TIMEOUT 안에 결과가 나오지 않음 - 포화와 같게 취급 (HTTP 429)"""
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pw_hash, password):
+    return check_password_hash(pw_hash, password)
+
+
+class PasswordHasher:
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, queue=PASSWORD_HASH_QUEUE, method=PASSWORD_HASH_METHOD):
+        self.workers = workers
+        self.method = method
+        self.slots = threading.BoundedSemaphore(max(1, workers) + queue)
+        self.executor = None
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.latency = {"hash": [0, 0.0, 0.0], "verify": [0, 0.0, 0.0]}  # 종류 -> [횟수, 합계(초), 최대(초)]
+
+    def _get_executor(self):
+        # 처음 쓸 때 만든다 (import 시점에 프로세스를 띄우지 않도록)
+        with self.lock:
+            if self.executor is None:
+                method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+                self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+            return self.executor
+
+    def _run(self, kind, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise HasherBusy()
+        with self.lock:
+            self.in_flight += 1
+        t0 = time.perf_counter()
+        release = True
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            future = self._get_executor().submit(fn, *args)
+            try:
+                # 협력형 모드에서는 기다리는 동안 이벤트 루프를 막지 않도록 실행기 스레드에서 대기
+                return run_blocking(future.result, PASSWORD_HASH_TIMEOUT)
+            except FutureTimeout:
+                with self.lock:
+                    self.timeouts += 1
+                if not future.cancel():
+                    # 이미 워커에서 계산 중이면 멈출 수 없으므로 끝날 때까지 자리를 잡아 둔다 (그동안 새 요청은 거절)
+                    release = False
+                    future.add_done_callback(lambda _: self.slots.release())
+                raise HasherTimeout()
+        finally:
+            elapsed = time.perf_counter() - t0
+            if release:
+                self.slots.release()
+            with self.lock:
+                self.in_flight -= 1
+                entry = self.latency[kind]
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+
+    def hash(self, password):
+        return self._run("hash", _hash, password, self.method)
+
+    def verify(self, pw_hash, password):
+        return self._run("verify", _verify, pw_hash, password)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "method": self.method.split(":")[0],
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                **{
+                    f"{kind}_ms_avg": total / n * 1000 if n else 0.0
+                    for kind, (n, total, _) in self.latency.items()
+                },
+                **{f"{kind}_ms_max": peak * 1000 for kind, (_, _, peak) in self.latency.items()},
+                **{f"{kind}_count": n for kind, (n, _, _) in self.latency.items()},
+            }
+
+
+# 싱글턴 인스턴스
+HASHER = PasswordHasher()
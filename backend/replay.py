@@ -0,0 +1,100 @@
+"""경기 리플레이 - match_log 로 기록한 입력 로그로 경기를 서버/소켓 없이 다시 시뮬레이션한다.
+
+시드와 틱별 입력이 같으면 물리 결과도 비트 단위로 같아야 하므로, 로그 끝에 기록된 상태 체크섬과 비교해
+물리 회귀를 찾거나 실제 경기를 프로파일링할 때 쓴다. 실시간보다 빠르게(틱을 쉬지 않고) 돌린다.
+
+    python replay.py replays/room-1700000000-1a2b.rpl
+    python replay.py replays/*.rpl --engine numpy
+"""
+import argparse
+import json
+import sys
+import time
+
+from game_logic import Game, SIDE_NAMES
+import batch_engine
+from match_log import (read_log, checksum, OP_INPUT, OP_SKILLS, OP_SELECT, OP_ACTIVATE, OP_COUNTDOWN,
+                       OP_FINISH, OP_POSITION, OP_MOVE, OP_END)
+
+
+def new_replay_game(seed, engine="scalar"):
+    # 기록하지 않는 게임 (make_game 은 REPLAY_DIR 설정 시 새 로그를 만듦)
+    if engine == "numpy":
+        return batch_engine.BatchGame("replay", None, seed=seed)
+    return Game("replay", None, seed)
+
+
+def apply_record(g, op, value):
+    if op == OP_INPUT:
+        s, position, delta, seq, client_tick = value
+        st = g.sides[s]
+        if position is not None:
+            st.input_x, st.input_y = position
+        if delta is not None:
+            st.input_dx, st.input_dy = delta
+        st.input_seq = seq
+        st.input_tick = client_tick
+        g.input_pending = True
+    elif op == OP_SKILLS:
+        g.set_player_skills(SIDE_NAMES[value[0]], value[1])
+    elif op == OP_SELECT:
+        g.set_selected_skill(SIDE_NAMES[value[0]], value[1])
+    elif op == OP_ACTIVATE:
+        g.activate_skill(SIDE_NAMES[value[0]], value[1])
+    elif op == OP_POSITION:
+        g.set_paddle_position(SIDE_NAMES[value[0]], value[1], value[2])
+    elif op == OP_MOVE:
+        g.move_paddle(SIDE_NAMES[value[0]], value[1], value[2])
+    elif op == OP_COUNTDOWN:
+        g.start_countdown()
+    elif op == OP_FINISH:
+        g.finish()
+
+
+def replay(path, engine="scalar"):
+    """로그를 끝까지 재생하고 (게임, 결과 dict) 반환. 체크섬이 없으면(서버가 비정상 종료) verified 는 None"""
+    seed, records = read_log(path)
+    g = new_replay_game(seed, engine)
+    expected = None
+    t0 = time.perf_counter()
+    for op, tick, value in records:
+        # 레코드의 틱은 "그 틱의 step() 직전" - 서버가 실제로 돌린 스텝 수만큼만 진행
+        while g.timers.now < tick:
+            g.step()
+        if op == OP_END:
+            expected = value
+            break
+        apply_record(g, op, value)
+    elapsed = time.perf_counter() - t0
+    ticks = g.timers.now
+    result = {
+        "file": path,
+        "seed": seed,
+        "records": len(records),
+        "ticks": ticks,
+        "match_seconds": ticks * Game.TICK,
+        "replay_seconds": elapsed,
+        "speedup": ticks * Game.TICK / elapsed if elapsed > 0 else None,
+        "score": {"left": g.get_score("left"), "right": g.get_score("right")},
+        "verified": None if expected is None else checksum(g) == expected,
+    }
+    g.close()
+    return g, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="+", help="match_log 로 기록한 .rpl 파일")
+    parser.add_argument("--engine", choices=("scalar", "numpy"), default="scalar")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for path in args.logs:
+        _, result = replay(path, args.engine)
+        print(json.dumps(result, ensure_ascii=False))
+        failed |= result["verified"] is False
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
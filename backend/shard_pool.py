@@ -0,0 +1,229 @@
+import os
+import queue
+import threading
+import time
+import multiprocessing
+
+from game_logic import Game
+from logs import get_logger
+from game_loop import GameLoop
+from batch_engine import make_game
+from state_sync import emit_keyframe, emit_resync, drop_encoder
+
+# 게임 루프를 돌릴 워커 프로세스 수. 0 이면 기존처럼 메인 프로세스에서 모든 방을 돌림
+GAME_SHARDS = int(os.getenv("GAME_SHARDS", "0"))
+# 워커가 부하(틱 시간, 방별 통계)를 보고하는 주기 (초)
+SHARD_REPORT_INTERVAL = 1.0
+
+log = get_logger("shard")
+
+# Game 에서 원격으로 호출할 수 있는 메서드 (입력 라우팅용)
+REMOTE_METHODS = ("move_paddle", "set_paddle_position", "queue_paddle_move", "queue_paddle_position",
+                  "queue_action", "set_tick_rate")
+
+
+# ─────────── 워커 프로세스 쪽 ───────────
+class ShardEmitter:
+    """워커 안에서 socketio 대신 쓰는 객체. emit 과 스킬 사용 기록을 모아 두었다가 틱마다 한 번에 부모로 보냄"""
+
+    def __init__(self, outbox):
+        self.outbox = outbox
+        self.pending = []
+        self.skill_uses = []    # (username, skill_id) - 지연 쓰기 큐(WRITES)는 부모 프로세스에 있음
+
+    def emit(self, event, data, room=None, to=None):
+        self.pending.append((event, data, room, to))
+
+    def skill_used(self, username, skill_id):
+        self.skill_uses.append((username, skill_id))
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def flush(self, shard_id, report=None):
+        if self.pending or self.skill_uses or report is not None:
+            self.outbox.put((shard_id, self.pending, self.skill_uses, report))
+            self.pending = []
+            self.skill_uses = []
+
+
+def _handle_command(cmd, games, sink):
+    op, room = cmd[0], cmd[1]
+    if op == "create":
+        if room not in games:
+            g = games[room] = make_game(room, sink)
+            g.on_skill_used = sink.skill_used
+        return
+    g = games.get(room)
+    if g is None:
+        return
+    if op == "remove":
+        games.pop(room, None)
+        drop_encoder(room)
+        g.close()
+    elif op == "call":
+        method, args = cmd[2], cmd[3]
+        getattr(g, method)(*args)
+    elif op == "keyframe":
+        emit_keyframe(sink, room, g)
+    elif op == "resync":
+        emit_resync(sink, room, g, cmd[2])
+
+
+def shard_main(shard_id, inbox, outbox):
+    """워커 프로세스 본체: 자기 방들만 들고 독립적인 틱 루프를 돌린다"""
+    games = {}
+    sink = ShardEmitter(outbox)
+    loop = GameLoop(sink, games)
+    busy_ewma = 0.0
+    next_report = time.perf_counter()
+    next_due = next_report
+
+    while True:
+        wait = min(next_due - time.perf_counter(), Game.TICK)
+        if wait > 0:
+            time.sleep(wait)
+        t0 = time.perf_counter()
+
+        # 부모가 라우팅한 입력/명령 처리
+        while True:
+            try:
+                cmd = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if cmd[0] == "stop":
+                return
+            try:
+                _handle_command(cmd, games, sink)
+            except Exception:
+                # 잘못된 명령 하나로 워커(와 그 안의 모든 방)가 죽지 않도록
+                log.exception("샤드 %d 명령 처리 실패: %s %s", shard_id, cmd[0], cmd[1])
+
+        next_due = loop.run_due()
+
+        t1 = time.perf_counter()
+        busy_ewma = busy_ewma * 0.9 + (t1 - t0) * 0.1
+        report = None
+        if t1 >= next_report:
+            next_report = t1 + SHARD_REPORT_INTERVAL
+            report = {"rooms": len(games), "busy_ms": busy_ewma * 1000, "stats": loop.get_stats()}
+        sink.flush(shard_id, report)
+
+
+# ─────────── 메인 프로세스 쪽 ───────────
+class RemoteGame:
+    """샤드에 있는 Game 의 대리 객체. 소켓 핸들러는 평소처럼 메서드를 호출하면 된다"""
+
+    def __init__(self, pool, room, shard_id):
+        self.pool = pool
+        self.room = room
+        self.shard_id = shard_id
+
+    def _send(self, *cmd):
+        self.pool.inboxes[self.shard_id].put(cmd)
+
+    def __getattr__(self, name):
+        if name not in REMOTE_METHODS:
+            raise AttributeError(name)
+
+        def call(*args):
+            self._send("call", self.room, name, args)
+        return call
+
+    def send_keyframe(self):
+        self._send("keyframe", self.room)
+
+    def resync(self, sid):
+        self._send("resync", self.room, sid)
+
+    def close(self):
+        self._send("remove", self.room)
+        self.pool.release(self.room)
+
+
+class ShardLoad:
+    __slots__ = ("rooms", "busy_ms", "stats")
+
+    def __init__(self):
+        self.rooms = 0
+        self.busy_ms = 0.0
+        self.stats = {}
+
+
+class ShardPool:
+    """방들을 워커 프로세스에 나눠 배치하고, 워커가 보낸 emit 을 Socket.IO 로 내보낸다"""
+
+    def __init__(self, socketio, num_shards=GAME_SHARDS, on_skill_used=None):
+        self.socketio = socketio
+        self.num_shards = num_shards
+        self.on_skill_used = on_skill_used  # (username, skill_id) - 워커에서 넘어온 스킬 사용 기록
+        # spawn 은 워커마다 app.py 를 다시 import (DB 풀 생성) 하므로 가능하면 fork 사용
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self.ctx = multiprocessing.get_context(method)
+        self.inboxes = [self.ctx.Queue() for _ in range(num_shards)]
+        self.outbox = self.ctx.Queue()
+        self.procs = []
+        self.placement = {}     # room -> shard_id
+        self.load = [ShardLoad() for _ in range(num_shards)]
+        self.lock = threading.Lock()
+
+    def start(self):
+        for shard_id in range(self.num_shards):
+            p = self.ctx.Process(target=shard_main, args=(shard_id, self.inboxes[shard_id], self.outbox), daemon=True)
+            p.start()
+            self.procs.append(p)
+        self.socketio.start_background_task(self._pump)
+
+    def stop(self):
+        for inbox in self.inboxes:
+            inbox.put(("stop", None))
+        for p in self.procs:
+            p.join(timeout=1.0)
+
+    def _pick_shard(self):
+        # 최근 틱 시간이 가장 짧은 샤드, 같으면 방이 적은 샤드
+        return min(range(self.num_shards), key=lambda i: (round(self.load[i].busy_ms, 1), self.load[i].rooms))
+
+    def create(self, room):
+        with self.lock:
+            shard_id = self.placement.get(room)
+            if shard_id is None:
+                shard_id = self._pick_shard()
+                self.placement[room] = shard_id
+                # 다음 보고가 오기 전에 같은 샤드로 몰리지 않도록 미리 반영
+                self.load[shard_id].rooms += 1
+        self.inboxes[shard_id].put(("create", room))
+        return RemoteGame(self, room, shard_id)
+
+    def release(self, room):
+        with self.lock:
+            shard_id = self.placement.pop(room, None)
+            if shard_id is not None:
+                self.load[shard_id].rooms = max(0, self.load[shard_id].rooms - 1)
+
+    def _pump(self):
+        while True:
+            try:
+                shard_id, emits, skill_uses, report = self.outbox.get_nowait()
+            except queue.Empty:
+                self.socketio.sleep(Game.TICK / 4)
+                continue
+            for event, data, room, to in emits:
+                if to is not None:
+                    self.socketio.emit(event, data, to=to)
+                else:
+                    self.socketio.emit(event, data, room=room)
+            if self.on_skill_used is not None:
+                for username, skill_id in skill_uses:
+                    self.on_skill_used(username, skill_id)
+            if report is not None:
+                load = self.load[shard_id]
+                load.rooms = report["rooms"]
+                load.busy_ms = report["busy_ms"]
+                load.stats = report["stats"]
+
+    def get_stats(self):
+        return {
+            "shards": [{"rooms": l.rooms, "busy_ms": l.busy_ms} for l in self.load],
+            "rooms": {r: st for l in self.load for r, st in l.stats.items()},
+        }
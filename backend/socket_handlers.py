@@ -1,15 +1,154 @@
+import functools
+import math
+import uuid
 from threading import Lock
 from flask_socketio import emit, join_room, leave_room
 from flask import request
-from game_logic import Game
+from game_logic import Game, SIDE_INDEX
+from batch_engine import make_game
 from database import DB
-from datetime import datetime
+from state_sync import emit_keyframe, emit_resync, drop_encoder
+from shard_pool import RemoteGame
+from game_loop import IDLE_TICK_HZ
+from lobby import LOBBY
+from input_limiter import INPUTS, RESYNCS
+from write_behind import WRITES
+from spectators import SPECTATORS, spectator_channel
+from metrics import EVENTS_IN
+from cluster import CLUSTER
+from matchmaking import MATCHMAKER, MatchQueueFull, MATCH_SWEEP_INTERVAL
+from logs import get_logger, SampledLogger
+
+log = get_logger("socket")
+hot_log = SampledLogger(log)   # 입력/스킬처럼 자주 오는 이벤트용
 
 # ─────────── 룸 상태 관리 ───────────
 games         = {}
 loading_games = {}
 participants  = {}
+matched_sids  = {}     # 자동 매칭 방 -> 아직 접속 중인 매칭된 두 사람의 sid (둘 다 끊기면 방 전체를 정리)
 bg_lock       = Lock()
+shard_pool    = None   # GAME_SHARDS > 0 이면 app.py 에서 설정 (방을 워커 프로세스에 배치)
+matchmaker_started = False
+
+
+def new_game(room, socketio):
+    """방의 Game 생성 - 샤드 모드면 워커에 배치하고 대리 객체를 돌려줌"""
+    if shard_pool is not None:
+        return shard_pool.create(room)
+    g = make_game(room, socketio)
+    g.on_skill_used = WRITES.skill_used
+    return g
+
+
+def release_game(room):
+    g = games.pop(room, None)
+    if g is None:
+        return
+    SPECTATORS.drop_room(room)
+    if room not in loading_games:
+        CLUSTER.release(room)
+    if not isinstance(g, RemoteGame):
+        drop_encoder(room)
+    g.close()
+
+
+def forwarded_from():
+    """다른 노드에서 넘어온 이벤트를 실행 중이면 소켓이 붙어 있는 노드 id, 아니면 None"""
+    return getattr(request, "cluster_origin", None)
+
+
+def enter_room(room):
+    # join_room 과 같지만, 넘어온 이벤트면 소켓이 붙어 있는 노드에 입장을 요청
+    origin = forwarded_from()
+    if origin is None:
+        join_room(room)
+    else:
+        CLUSTER.enter_room(origin, request.sid, room)
+
+
+def exit_room(room):
+    origin = forwarded_from()
+    if origin is None:
+        leave_room(room)
+    else:
+        CLUSTER.leave_room(origin, request.sid, room)
+
+
+def event_room(args):
+    # 이벤트가 가리키는 방 (클러스터 모드에서 어느 노드로 보낼지 결정)
+    data = args[0] if args else None
+    if isinstance(data, dict):
+        return data.get("room") or data.get("room_name")
+    return None
+
+
+def finite_number(value):
+    """클라이언트가 보낸 좌표/이동량 → 유한한 float. 숫자가 아니거나 NaN/inf 면 None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    try:
+        value = float(value)
+    except OverflowError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def client_int(value):
+    """클라이언트가 보낸 정수 (seq / tick / skill_id). 정수가 아니면 None"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def skill_input(data, default_skill):
+    """스킬 이벤트 페이로드 검증 → (side, skill_id), 잘못됐으면 None (동작은 게임 루프에서 적용되므로 여기서 거름)"""
+    side = data.get("side")
+    skill_id = client_int(data.get("skill_id", default_skill))
+    if not isinstance(side, str) or side not in SIDE_INDEX or skill_id is None:
+        return None
+    return side, skill_id
+
+
+def paddle_input(data, a, b):
+    """패들 입력 페이로드 검증 → (side, a, b, seq, tick), 잘못됐으면 None.
+    입력은 버퍼에 쌓였다가 게임 루프(또는 샤드 워커)에서 처리되므로, 잘못된 값은 여기서 걸러야 루프가 멈추지 않는다.
+    seq 는 상태 프레임의 ack(u32)로 돌아가므로 32비트로 자르고, tick 은 정수가 아니면 버린다 (범위는 Game._compensate 가 제한)"""
+    side = data.get("side")
+    if not isinstance(side, str) or side not in SIDE_INDEX:
+        return None
+    x = finite_number(data.get(a, 0))
+    y = finite_number(data.get(b, 0))
+    if x is None or y is None:
+        return None
+    seq = client_int(data.get("seq"))
+    if seq is not None:
+        seq &= 0xFFFFFFFF
+    return side, x, y, seq, client_int(data.get("tick"))
+
+
+def send_keyframe(socketio, room):
+    g = games[room]
+    if isinstance(g, RemoteGame):
+        g.send_keyframe()
+    else:
+        emit_keyframe(socketio, room, g)
+
+
+def new_loading_game():
+    lg = type('LoadingGame', (), {})()
+    lg.COUNT = 0
+    lg.left_username = "waiting"
+    lg.right_username = "waiting"
+    lg.left_user_skills = []
+    lg.right_user_skills = []
+    lg.left_ready = False
+    lg.right_ready = False
+    # 캐릭터 인덱스(혹은 이름) 기본값 추가
+    lg.left_character = 0
+    lg.right_character = 0
+    lg.matched = False   # 자동 매칭으로 만든 방이면 자리가 미리 정해져 있음
+    return lg
 
 
 def serialize_loading_game(game):
@@ -26,7 +165,57 @@ def serialize_loading_game(game):
     }
 
 def register_socket_handlers(socketio):
-    @socketio.on("join_loading_ready_toggle")
+    handlers = {}   # 이벤트명 -> 핸들러 (다른 노드에서 넘어온 이벤트 실행용)
+
+    def on(event):
+        """socketio.on 과 같지만 받은 이벤트 수를 메트릭(EVENTS_IN)에 기록하고,
+        클러스터 모드에서 다른 노드가 맡은 방의 이벤트면 그 노드로 넘긴다"""
+        def decorator(handler):
+            handlers[event] = handler
+
+            @functools.wraps(handler)
+            def counted(*args):
+                EVENTS_IN.inc(event)
+                room = event_room(args)
+                if room is not None and CLUSTER.forward(event, room, args, request.sid):
+                    return
+                return handler(*args)
+            return socketio.on(event)(counted)
+        return decorator
+
+    def run_forwarded(event, args):
+        handler = handlers.get(event)
+        if handler is not None:
+            handler(*args)
+
+    def drop_lost_room(room):
+        # 다른 노드와 동시에 맡은 방을 양보함 - 이 노드에 만든 로딩 방/Game 을 정리 (이후 그 방 이벤트는 이긴 노드로 넘어감)
+        loading_games.pop(room, None)
+        participants.pop(room, None)
+        matched_sids.pop(room, None)
+        release_game(room)
+
+    CLUSTER.bind(run_forwarded, LOBBY.apply, drop_lost_room)
+    if CLUSTER.enabled:
+        LOBBY.shared_version = CLUSTER.next_lobby_version
+
+    def broadcast_lobby(change):
+        # 로비 델타(room_added / room_changed / room_removed)를 모든 클라이언트와 다른 노드의 LOBBY 에 전송
+        if change is not None:
+            socketio.emit(*change)
+            CLUSTER.share_lobby(change)
+
+    @socketio.on("connect")
+    def connect():
+        # 접속하면 버전이 붙은 방 목록 스냅샷부터 받음
+        emit("room_snapshot", LOBBY.snapshot())
+
+    @on("room_snapshot_request")
+    def room_snapshot_request(data=None):
+        # 클라이언트가 델타 버전 누락을 감지하면 스냅샷을 다시 요청함
+        emit("room_snapshot", LOBBY.snapshot())
+
+    @on("join_loading_ready_toggle")
     def join_loading_ready_toggle(data):
         room_name = data.get("room_name")
         side = data.get("side")
@@ -40,11 +229,11 @@ def register_socket_handlers(socketio):
         
         # 두 명이 모두 준비되면 게임 시작 신호 보내기
         if loading_games[room_name].left_ready and loading_games[room_name].right_ready:
-            print(f"두 명이 모두 준비됨! {room_name} 방 게임 시작!")
+            log.info("두 명이 모두 준비됨! %s 방 게임 시작!", room_name)
             socketio.emit("game_start_ready", {"room_name": room_name}, room=room_name)
-    @socketio.on("leave_loading")
+    @on("leave_loading")
     def leave_loading(data):
-        print("leave_loading in server", data)
+        log.debug("leave_loading %s", data)
         room_name = data.get("room_name")
         username = data.get("username")
         side = data.get("side")
@@ -56,12 +245,8 @@ def register_socket_handlers(socketio):
             loading_games[room_name].right_ready = False
             loading_games[room_name].right_username = "waiting"
             loading_games[room_name].right_user_skills = []
-        if(loading_games[room_name].COUNT == 2):
-            DB.toggle_is_playing(room_name)
         loading_games[room_name].COUNT -= 1
-        
-        DB.update_current_player(room_name, loading_games[room_name].COUNT)
-        print("leave_loading in server", room_name, username)
+        broadcast_lobby(LOBBY.update(room_name, current_player=loading_games[room_name].COUNT, is_playing=False))
         socketio.emit(
             "loading_room_updated",  # 원하는 이벤트명
             {
@@ -71,54 +256,56 @@ def register_socket_handlers(socketio):
             room=room_name
         )
         emit("leave_loading_success", {"room_name": room_name, "side": side}, to=request.sid)
-        leave_room(room_name)
-    @socketio.on("join_loading")
+        exit_room(room_name)
+        # 마지막 사람이 나가면 방을 로비에서 지움
+        if loading_games[room_name].COUNT <= 0:
+            loading_games.pop(room_name, None)
+            matched_sids.pop(room_name, None)
+            if room_name not in participants:
+                release_game(room_name)   # 자동 매칭이 미리 만든 Game (아무도 입장하지 않음)
+            if room_name not in games:
+                CLUSTER.release(room_name)
+            broadcast_lobby(LOBBY.remove(room_name))
+    @on("join_loading")
     def join_loading(data):
         room_name = data.get("room_name")
         username = data.get("username")
         sid = request.sid
         lg = loading_games[room_name]
         mySide = None
-        if lg.left_username == "waiting":
+        if lg.matched:
+            # 자동 매칭 방은 자리가 정해져 있어 인원/준비 상태를 바꾸지 않고 내 자리만 알려 줌
+            mySide = "left" if lg.left_username == username else "right" if lg.right_username == username else None
+            if mySide is None:
+                emit("join_loading_fail", {"error": "매칭된 플레이어만 들어올 수 있습니다."}, to=sid)
+                return
+        elif lg.left_username == "waiting":
             mySide = "left"
-        elif lg.right_username == "waiting":
-            mySide = "right"
-        else:
-            # 방이 가득 참
-            emit("join_loading_fail", {"error": "방에 이미 2명이 있습니다."}, to=sid)
-            return
-        print("join_loading_success in server mySide : ", mySide)
-        if(mySide == "left"):
             lg.left_username = username
             left_user_skills = DB.get_user_skills(username)
             lg.left_user_skills = left_user_skills
             lg.left_ready = False
             lg.COUNT += 1
-            DB.update_current_player(room_name, loading_games[room_name].COUNT)
-        elif(mySide == "right"):
+        elif lg.right_username == "waiting":
+            mySide = "right"
             lg.right_username = username
             right_user_skills = DB.get_user_skills(username)
             lg.right_user_skills = right_user_skills
             lg.right_ready = False
             lg.COUNT += 1
-            DB.update_current_player(room_name, loading_games[room_name].COUNT)
         else:
-            print("join_loading_failed in server", room_name, username)
+            # 방이 가득 참
+            log.debug("join_loading 실패 %s %s", room_name, username)
             emit("join_loading_fail", {"error": "방에 이미 2명이 있습니다."}, to=sid)
             return
+        log.debug("join_loading %s %s side=%s", room_name, username, mySide)
         # 준비 상태 초기화  
         
             
         #2명이 모두 차면 이제 상태를 바꿔줘야함.
-        if loading_games[room_name].COUNT == 2:
-            DB.toggle_is_playing(room_name)
-            print("room_updated in server, emit room_updated")
-
-        a = DB.get_room_list()
-        a_serialized = [serialize_room(room) for room in a]
-        socketio.emit("room_updated", a_serialized)
+        broadcast_lobby(LOBBY.update(room_name, current_player=lg.COUNT, is_playing=lg.COUNT == 2))
         # print("join_loading_success in server", room_name, username, side)
-        join_room(room_name)
+        enter_room(room_name)
         emit_data = {
             "room_name": room_name,
             "left_username": lg.left_username,
@@ -131,19 +318,36 @@ def register_socket_handlers(socketio):
             }
         emit("join_loading_success", emit_data, to = room_name)
 
-    @socketio.on("join")
+    @on("join")
     def join(data):
         room = data.get("room", "default")
         username = data.get("username")
-        print("join emit in server", room, username)
-        join_room(room) # 이거 빼기기
+        if room not in games and not CLUSTER.claim(room):
+            # 그 사이 다른 노드가 이 방을 맡음 - Game 을 만들지 않고 그 노드로 넘김
+            if not CLUSTER.forward("join", room, [data], request.sid):
+                emit("joined", {"side": None, "error": "방을 찾을 수 없습니다."})
+            return
+        enter_room(room) # 이거 빼기기
         sid = request.sid
 
+        lg = loading_games.get(room)
+        matched = lg is not None and lg.matched
+        if matched:
+            # 자동 매칭 방은 match_found 로 알려 준 자리 그대로 (도착 순서와 무관)
+            side = "left" if lg.left_username == username else "right" if lg.right_username == username else None
+            if side is None:
+                emit("joined", {"side": None, "error": "매칭된 플레이어만 들어올 수 있습니다."})
+                return
+
         participants.setdefault(room, set()).add(sid)
-        games.setdefault(room, Game(room, socketio))
+        if room not in games:
+            games[room] = new_game(room, socketio)
 
         num = len(participants[room])  # 현재 인원 수
-        side = "left" if num == 1 else "right" if num == 2 else None
+        if num > 2:
+            side = None
+        elif not matched:
+            side = "left" if num == 1 else "right"
         if side is None:
             emit("joined", {"side": None, "error": "방이 가득 찼습니다."})
             return
@@ -151,100 +355,218 @@ def register_socket_handlers(socketio):
         # 유저의 스킬 정보 가져오기
         if username:
             user_skills = DB.get_user_skills(username)
-            games[room].set_player_skills(side, user_skills)
+            games[room].queue_action("set_player_skills", side, user_skills, username)
+
+        # 혼자 기다리는 동안은 느리게, 상대가 오면 정상 주기로 돌림
+        games[room].set_tick_rate(IDLE_TICK_HZ if num == 1 else 1 / Game.TICK)
 
         emit("joined", {"side": side})
-        emit("state", games[room].out(), room=room)
-        print("JOIN", room, side, "참가자수:", num)
+        send_keyframe(socketio, room)
+        log.info("JOIN %s %s %s 참가자수: %d", room, username, side, num)
 
-        # 2명이 모이면 game_ready 이벤트 emit
+        # 2명이 모이면 카운트다운 시작 + game_ready 이벤트 emit
         if num == 2:
+            games[room].queue_action("start_countdown")
             socketio.emit("game_ready", {}, room=room)
 
-    @socketio.on("paddle_move")
+    @on("spectate")
+    def spectate(data):
+        # 관전자는 플레이어 인원에 세지 않고 별도 Socket.IO 방에서 지연된 저주기 상태만 받음 (SPECTATORS 참고)
+        room = data.get("room", "default")
+        g = games.get(room)
+        if g is None or isinstance(g, RemoteGame):
+            emit("spectate_failed", {"error": "관전할 수 없는 방입니다."})
+            return
+        # 다른 방을 보고 있었으면 그 피드와 관전자 Socket.IO 방에서 먼저 빠짐 (두 방 프레임을 함께 받지 않도록)
+        previous = SPECTATORS.remove(request.sid)
+        if previous is not None:
+            exit_room(spectator_channel(previous))
+        channel = SPECTATORS.add(request.sid, room)
+        if channel is None:
+            emit("spectate_failed", {"error": "관전자가 너무 많습니다."})
+            return
+        enter_room(channel)
+        emit("spectating", {"room": room, "delay": SPECTATORS.delay})
+        SPECTATORS.send_snapshot(socketio, request.sid, g)
+
+    @on("state_resync")
+    def state_resync(data):
+        # 클라이언트가 델타 시퀀스 누락을 감지하면 키프레임을 다시 요청함 (sid 별 속도 제한 - RESYNCS 참고)
+        if not RESYNCS.allow(request.sid):
+            return
+        room = data.get("room")
+        g = games.get(room)
+        if g is not None and SPECTATORS.is_viewer(request.sid):
+            SPECTATORS.send_snapshot(socketio, request.sid, g)
+        elif isinstance(g, RemoteGame):
+            g.resync(request.sid)
+        elif g:
+            emit_resync(socketio, room, g, request.sid)
+
+    # 패들 입력은 sid 별 속도 제한 후 입력 버퍼에만 넣고, 실제 반영은 게임 틱에서 한 번만 (INPUTS 참고)
+    @on("paddle_move")
     def paddle_move(data):
+        if not INPUTS.allow(request.sid):
+            return
         g = games.get(data["room"])
         if g:
-            dx = data.get("dx", 0)
-            dy = data.get("dy", 0)
-            g.move_paddle(data["side"], dx, dy)
+            move = paddle_input(data, "dx", "dy")
+            if move is not None:
+                INPUTS.record(g.queue_paddle_move(*move))
 
-    @socketio.on("paddle_position")
+    @on("paddle_position")
     def paddle_position(data):
+        if not INPUTS.allow(request.sid):
+            return
         g = games.get(data["room"])
         if g:
-            x = data.get("x", 0)
-            y = data.get("y", 0)
-            g.set_paddle_position(data["side"], x, y)
+            position = paddle_input(data, "x", "y")
+            if position is not None:
+                INPUTS.record(g.queue_paddle_position(*position))
 
-    @socketio.on("activate_skill")
+    # 스킬 동작은 패들 입력처럼 큐에 넣고 다음 틱 시작에 적용 (성공하면 Game 이 skill_activated 를 emit)
+    @on("activate_skill")
     def activate_skill(data):
         g = games.get(data["room"])
-        if g:
-            skill_id = data.get("skill_id", 1)
-            success = g.activate_skill(data["side"], skill_id)
-            if success:
-                # 3,4번 스킬은 즉시 효과 적용 (이미 activate_skill에서 처리됨)
-                # 모든 스킬에 대해 이벤트 발송
-                print(f"스킬 {skill_id} 활성화 성공! {data['side']} 플레이어")
-                socketio.emit("skill_activated", {"side": data["side"], "skill_id": skill_id}, room=data["room"])
-
-    @socketio.on("set_selected_skill")
+        skill = skill_input(data, 1)
+        if g and skill is not None:
+            g.queue_action("activate_skill", *skill)
+
+    @on("set_selected_skill")
     def set_selected_skill(data):
-        print("[DEBUG] set_selected_skill 수신:", data)
         g = games.get(data["room"])
-        if g:
-            skill_id = data.get("skill_id", 0)
-            print("[DEBUG] set_selected_skill: side =", data["side"], "skill_id =", skill_id)
-            g.set_selected_skill(data["side"], skill_id)
-            print("[DEBUG] 서버에 저장된 selected_skill =", g.selected_skill)
+        skill = skill_input(data, 0)
+        if g and skill is not None:
+            hot_log.debug("set_selected_skill", "set_selected_skill: side=%s skill_id=%s", *skill)
+            g.queue_action("set_selected_skill", *skill)
 
-    @socketio.on("disconnect")
+    @on("disconnect")
     def disconnect():
         sid = request.sid
+        if forwarded_from() is None:
+            CLUSTER.share_disconnect(sid)   # 다른 노드가 맡은 방에 참가 중이었을 수 있음
+        INPUTS.forget(sid)
+        RESYNCS.forget(sid)
+        MATCHMAKER.cancel(sid)
+        if SPECTATORS.remove(sid) is not None:
+            return
         for room, sids in list(participants.items()):
             if sid in sids:
                 sids.remove(sid)
-                print(f"DISCONNECT: {sid} from {room}")
+                log.info("DISCONNECT: %s from %s", sid, room)
                 if not sids:  # 방에 아무도 없으면 삭제
                     participants.pop(room, None)
-                    games.pop(room, None)
+                    release_game(room)
                 else:
-                    # 남아있는 플레이어에게 알림
+                    # 남아있는 플레이어에게 알림 (게임은 종료 상태로 - 더 이상 스텝/브로드캐스트하지 않음)
+                    g = games.get(room)
+                    if g:
+                        # 시작된 경기면 결과를 지연 쓰기 큐에 기록 (샤드 모드의 원격 방은 점수를 워커가 들고 있어 제외)
+                        if not isinstance(g, RemoteGame) and g.is_active():
+                            WRITES.match_result(g.get_score("left"), g.get_score("right"))
+                        g.queue_action("finish")
                     socketio.emit("opponent_disconnected", {}, room=room)
                 break
+        abandon_match(sid)
     
     # 로딩 방을 만드는 것임
-    @socketio.on("room_create")
+    @on("room_create")
     def room_create(data):
         room_name = data.get("room_name")
         username = data.get("username")
         sid = request.sid
         # 방 이름 중복 체크
-        print("room_create in server", room_name, username)
-        room_list = DB.get_room_list()
-        if any(room["room_name"] == room_name for room in room_list):
+        log.debug("room_create %s %s", room_name, username)
+        change = LOBBY.add(username, room_name)
+        if change is None:
             emit("room_create_failed", {"error": "이미 존재하는 방 이름입니다."}, to=sid)
             return
-        DB.make_room(username, room_name)
-        loading_games[room_name] = type('LoadingGame', (), {})()
-        loading_games[room_name].COUNT = 0
-        loading_games[room_name].left_username = "waiting"
-        loading_games[room_name].right_username = "waiting"
-        loading_games[room_name].left_user_skills = []
-        loading_games[room_name].right_user_skills = []
-        loading_games[room_name].left_ready = False
-        loading_games[room_name].right_ready = False
-        # 캐릭터 인덱스(혹은 이름) 기본값 추가
-        loading_games[room_name].left_character = 0
-        loading_games[room_name].right_character = 0
-        print("loading_games[room_name]",loading_games[room_name].COUNT)
-        a = DB.get_room_list()
-        a_serialized = [serialize_room(room) for room in a]
-        socketio.emit("room_updated", a_serialized)
+        room_name = change[1]["room"]["room_name"]
+        CLUSTER.claim(room_name)   # 로딩 방과 이어지는 게임은 이 노드가 맡음
+        loading_games[room_name] = new_loading_game()
+        broadcast_lobby(change)
+
+    # ─────────── 자동 매칭 ───────────
+    def start_match(first, second):
+        # 짝지어진 두 사람의 로딩 방(자리 확정)과 Game 을 바로 만들고 각자에게 알림
+        room_name = f"매칭-{uuid.uuid4().hex[:8]}"
+        change = LOBBY.add(first.username, room_name)
+        if change is None:
+            return
+        CLUSTER.claim(room_name)
+        lg = new_loading_game()
+        lg.matched = True
+        lg.COUNT = 2
+        lg.left_username, lg.left_user_skills = first.username, first.skills
+        lg.right_username, lg.right_user_skills = second.username, second.skills
+        loading_games[room_name] = lg
+        matched_sids[room_name] = {first.sid, second.sid}
+        g = games[room_name] = new_game(room_name, socketio)
+        g.queue_action("set_player_skills", "left", first.skills, first.username)
+        g.queue_action("set_player_skills", "right", second.skills, second.username)
+        g.set_tick_rate(IDLE_TICK_HZ)
+        broadcast_lobby(change)
+        broadcast_lobby(LOBBY.update(room_name, current_player=2, is_playing=True))
+        log.info("매칭 %s: %s(%.0f) vs %s(%.0f)", room_name, first.username, first.rating, second.username, second.rating)
+        for me, other, side in ((first, second, "left"), (second, first, "right")):
+            socketio.emit("match_found", {"room_name": room_name, "side": side, "opponent": other.username}, to=me.sid)
+
+    def abandon_match(sid):
+        # start_match 는 아무도 입장하기 전에 방을 만들어 두므로, 매칭된 두 사람이 모두 끊겼는데 게임에 남은 참가자도 없으면
+        # Game / 로딩 방 / 방 소유 / 로비 줄을 여기서 정리 (입장한 참가자가 있으면 그 사람들의 disconnect 가 Game 을 정리)
+        for room, sids in list(matched_sids.items()):
+            if sid not in sids:
+                continue
+            sids.discard(sid)
+            if sids:
+                continue
+            matched_sids.pop(room, None)
+            if room in participants:
+                continue
+            loading_games.pop(room, None)
+            release_game(room)
+            CLUSTER.release(room)
+            broadcast_lobby(LOBBY.remove(room))
+            log.info("매칭 방 정리 %s: 두 사람이 모두 나감", room)
+
+    def run_matchmaker():
+        # 기다릴수록 범위가 넓어진 대기자들을 주기적으로 다시 짝지음 (새로 들어온 사람은 enqueue 에서 바로 짝지음)
+        while True:
+            socketio.sleep(MATCH_SWEEP_INTERVAL)
+            for first, second in MATCHMAKER.sweep():
+                try:
+                    start_match(first, second)
+                except Exception:
+                    log.exception("매칭 방 생성 실패: %s vs %s", first.username, second.username)
+
+    @on("match_enqueue")
+    def match_enqueue(data):
+        global matchmaker_started
+        username = data.get("username")
+        if not username:
+            emit("match_failed", {"error": "로그인이 필요합니다."})
+            return
+        with bg_lock:
+            if not matchmaker_started:
+                matchmaker_started = True
+                socketio.start_background_task(run_matchmaker)
+        skills = DB.get_user_skills(username)
+        try:
+            pair = MATCHMAKER.enqueue(request.sid, username, skills)  # 점수는 서버가 스킬 사용 기록으로 계산
+        except MatchQueueFull:
+            emit("match_failed", {"error": "매칭 대기 인원이 너무 많습니다."})
+            return
+        if pair is not None:
+            start_match(*pair)
+        else:
+            emit("match_queued", {"position": MATCHMAKER.position(request.sid)})
+
+    @on("match_cancel")
+    def match_cancel(data=None):
+        emit("match_cancelled", {"ok": MATCHMAKER.cancel(request.sid)})
 
     # 캐릭터 선택 변경 이벤트
-    @socketio.on("character_select")
+    @on("character_select")
     def character_select(data):
         room_name = data.get("room_name")
         side = data.get("side")
@@ -266,11 +588,10 @@ def register_socket_handlers(socketio):
 
 def get_games():
     return games
-def serialize_room(room):
-    room = room.copy()  # 원본 변형 방지
-    if isinstance(room.get('created_at'), datetime):
-        room['created_at'] = room['created_at'].isoformat()
-    return room
+
+def set_shard_pool(pool):
+    global shard_pool
+    shard_pool = pool
 
 def get_participants():
     return participants
@@ -0,0 +1,169 @@
+import os
+import time
+from collections import deque
+from threading import Lock
+
+from socketio import packet as sio_packet
+
+from state_sync import StateEncoder
+from metrics import EVENTS_OUT, BYTES_OUT
+
+# ─────────── 관전자 피드 ───────────
+# 관전자는 플레이어와 다른 Socket.IO 방(<방>#spectators)에 넣고, 방마다 SPECTATOR_HZ 로 상태 프레임을 만든다.
+# 방 emit 은 python-socketio 가 참가자마다 패킷을 다시 인코딩하므로, 관전자에게는 Socket.IO 패킷을 한 번만 인코딩해
+# 이 노드에 붙은 관전자 소켓마다 같은 문자열을 그대로 쓴다 (관전자 수와 상관없이 JSON 인코딩은 한 번).
+# 클러스터 모드에서 다른 노드에 붙은 관전자만 일반 emit 으로 보낸다. 프레임은 SPECTATOR_DELAY 초 뒤에 내보내므로
+# 관전 화면으로 상대 위치를 훔쳐볼 수 없다. 게임 루프는 플레이어 전송을 모두 끝낸 뒤에 관전자 피드를 처리한다.
+SPECTATOR_HZ = float(os.getenv("SPECTATOR_HZ", "10"))            # 관전자 상태 전송 주기 (Hz)
+SPECTATOR_DELAY = float(os.getenv("SPECTATOR_DELAY", "2.0"))     # 관전자에게 보내기 전 지연 (초)
+SPECTATOR_MAX = int(os.getenv("SPECTATOR_MAX", "500"))           # 방당 최대 관전자 수
+
+
+def spectator_channel(room):
+    return f"{room}#spectators"
+
+
+class SpectatorFeed:
+    """방 하나의 관전자용 프레임 시퀀스와 지연 버퍼"""
+
+    def __init__(self, room):
+        self.room = room
+        self.channel = spectator_channel(room)
+        self.encoder = StateEncoder()   # 플레이어 피드와 별개의 시퀀스 (낮은 주기 델타)
+        self.buffer = deque()           # (내보낼 시각, 이벤트, 프레임, seq, 상태)
+        self.released = None            # 마지막으로 내보낸 (seq, 상태) - 새 관전자의 키프레임 기준
+        self.viewers = set()
+        self.next_sample = 0.0
+        self.frames = 0
+        self.encode_total = 0.0
+        self.emit_total = 0.0
+
+
+class SpectatorHub:
+    def __init__(self, hz=SPECTATOR_HZ, delay=SPECTATOR_DELAY, max_viewers=SPECTATOR_MAX):
+        self.interval = 1 / hz if hz > 0 else 0.1
+        self.delay = delay
+        self.max_viewers = max_viewers
+        self.feeds = {}     # room -> SpectatorFeed
+        self.viewing = {}   # sid -> room
+        self.lock = Lock()
+        self.rejected = 0
+
+    def add(self, sid, room):
+        """관전자 등록. 방이 가득 찼으면 None, 아니면 Socket.IO 방 이름"""
+        with self.lock:
+            feed = self.feeds.get(room)
+            if feed is None:
+                feed = self.feeds[room] = SpectatorFeed(room)
+            if len(feed.viewers) >= self.max_viewers:
+                self.rejected += 1
+                return None
+            feed.viewers.add(sid)
+            self.viewing[sid] = room
+            return feed.channel
+
+    def remove(self, sid):
+        with self.lock:
+            room = self.viewing.pop(sid, None)
+            feed = self.feeds.get(room)
+            if feed is not None:
+                feed.viewers.discard(sid)
+                if not feed.viewers:
+                    del self.feeds[room]
+            return room
+
+    def is_viewer(self, sid):
+        return sid in self.viewing
+
+    def drop_room(self, room):
+        """방이 없어짐 - 피드와 관전자 등록을 정리하고 관전자 Socket.IO 방 이름을 반환 (없으면 None)"""
+        with self.lock:
+            feed = self.feeds.pop(room, None)
+            if feed is None:
+                return None
+            for sid in feed.viewers:
+                self.viewing.pop(sid, None)
+            return feed.channel
+
+    def send_snapshot(self, socketio, sid, game):
+        """관전자 한 명에게 마지막으로 내보낸 프레임의 키프레임 (입장 / 재동기화). 아직 없으면 다음 키프레임을 기다림"""
+        feed = self.feeds.get(self.viewing.get(sid))
+        if feed is None or feed.released is None:
+            return
+        seq, state = feed.released
+        socketio.emit("state", feed.encoder.frame_at(game, state, seq), to=sid)
+
+    def _broadcast(self, socketio, feed, event, frame):
+        """패킷을 한 번 인코딩해 이 노드의 관전자 engine.io 소켓마다 같은 페이로드를 씀"""
+        server = socketio.server
+        local = []
+        for sid in list(feed.viewers):
+            eio_sid = server.manager.eio_sid_from_sid(sid, "/")
+            if eio_sid is not None:
+                local.append((sid, eio_sid))
+        if local:
+            encoded = server.packet_class(sio_packet.EVENT, namespace="/", data=[event, frame]).encode()
+            parts = encoded if isinstance(encoded, list) else [encoded]
+            for _, eio_sid in local:
+                for part in parts:
+                    server.eio.send(eio_sid, part)
+            size = sum(len(p.encode("utf-8")) if isinstance(p, str) else len(p) for p in parts)
+            EVENTS_OUT.inc(event)
+            BYTES_OUT.inc(event, amount=size * len(local))
+        if len(local) < len(feed.viewers):
+            # 다른 노드에 붙은 관전자 (클러스터 버스를 거쳐 그 노드가 보냄)
+            socketio.emit(event, frame, room=feed.channel, skip_sid=[sid for sid, _ in local])
+
+    def publish_due(self, socketio, games, now=None):
+        """주기가 된 피드는 한 번 인코딩해 지연 버퍼에 넣고, 지연이 지난 프레임은 관전자들에게 한 번 인코딩해 전송"""
+        if not self.feeds:
+            return
+        if now is None:
+            now = time.perf_counter()
+        for feed in list(self.feeds.values()):
+            game = games.get(feed.room)
+            if game is None:
+                continue
+            if now >= feed.next_sample:
+                feed.next_sample = max(feed.next_sample + self.interval, now)
+                t0 = time.perf_counter()
+                enc = feed.encoder
+                frame = enc.delta(game)
+                if frame is None:
+                    frame = enc.keyframe(game)
+                    event = "state"
+                else:
+                    event = "state_delta"
+                feed.buffer.append((now + self.delay, event, frame, enc.seq, enc.last))
+                feed.encode_total += time.perf_counter() - t0
+            while feed.buffer and feed.buffer[0][0] <= now:
+                _, event, frame, seq, state = feed.buffer.popleft()
+                t0 = time.perf_counter()
+                self._broadcast(socketio, feed, event, frame)
+                feed.emit_total += time.perf_counter() - t0
+                feed.released = (seq, state)
+                feed.frames += 1
+
+    def stats(self):
+        with self.lock:
+            rooms = {
+                room: {
+                    "viewers": len(feed.viewers),
+                    "frames": feed.frames,
+                    "buffered": len(feed.buffer),
+                    "encode_ms_avg": feed.encode_total / max(1, feed.encoder.seq) * 1000,
+                    "emit_ms_avg": feed.emit_total / max(1, feed.frames) * 1000,
+                }
+                for room, feed in self.feeds.items()
+            }
+        return {
+            "hz": 1 / self.interval,
+            "delay": self.delay,
+            "viewers": len(self.viewing),
+            "rejected": self.rejected,
+            "rooms": rooms,
+        }
+
+
+# 싱글턴 인스턴스
+SPECTATORS = SpectatorHub()
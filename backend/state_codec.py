@@ -0,0 +1,93 @@
+import struct
+import time
+
+from game_logic import SIDE_NAMES, PHASES
+
+# ─────────── 바이너리 상태 프레임 (STATE_SYNC_MODE=binary) ───────────
+# 스킬 목록 같은 정적 데이터는 JSON 키프레임으로 보내고, 매 틱 "state_bin" 이벤트로 아래 고정 레이아웃만 보낸다.
+# 레이아웃을 바꾸면 반드시 FRAME_VERSION 을 올리고 frontend/src/socket.js 의 디코더도 같이 고칠 것.
+#
+#  offset  type  field
+#  0       u8    version
+#  1       u8    flags (FLAG_* 비트 0~3, 방 상태 PHASES 인덱스는 비트 4~6)
+#  2       u32   seq
+#  6       f64   timestamp (ms)
+#  14      f32   ball x, ball y
+#  22      f32   top paddle x, y
+#  30      f32   bottom paddle x, y
+#  38      u16   top score, bottom score
+#  42      u8    top goal ratio, bottom goal ratio (ratio * 256)
+#  44      u8    top active skill, bottom active skill
+#  46      u32   server tick
+#  50      u32   top ack seq, bottom ack seq (마지막으로 반영한 입력 시퀀스)
+FRAME_VERSION = 2
+FRAME_FORMAT = "<BBIdffffffHHBBBBIII"
+FRAME_SIZE = struct.calcsize(FRAME_FORMAT)   # 58 bytes
+
+FLAG_BLIND_TOP_CIRCLE = 1 << 0
+FLAG_BLIND_TOP_RECT = 1 << 1
+FLAG_BLIND_BOTTOM_CIRCLE = 1 << 2
+FLAG_BLIND_BOTTOM_RECT = 1 << 3
+PHASE_SHIFT = 4
+
+RATIO_SCALE = 256
+
+_packer = struct.Struct(FRAME_FORMAT)
+_BLIND_FLAGS = {
+    ("top", "circle"): FLAG_BLIND_TOP_CIRCLE,
+    ("top", "rect"): FLAG_BLIND_TOP_RECT,
+    ("bottom", "circle"): FLAG_BLIND_BOTTOM_CIRCLE,
+    ("bottom", "rect"): FLAG_BLIND_BOTTOM_RECT,
+}
+
+
+def _ratio_byte(effect):
+    ratio = effect.value if effect.value is not None else 0.5
+    return min(255, int(ratio * RATIO_SCALE))
+
+
+def pack_frame(game, seq):
+    """Game 속성에서 바로 바이너리 프레임을 만든다 (중간 dict 없음)"""
+    flags = PHASES.index(game.phase) << PHASE_SHIFT
+    top, bottom = game.sides
+    for name, st in zip(SIDE_NAMES, game.sides):
+        shape = st.blind_effect.value
+        if shape:
+            flags |= _BLIND_FLAGS[(name, shape)]
+    return _packer.pack(
+        FRAME_VERSION, flags, seq & 0xFFFFFFFF, time.time() * 1000,
+        game.bx, game.by,
+        top.x, top.y, bottom.x, bottom.y,
+        top.score, bottom.score,
+        _ratio_byte(top.goal_effect), _ratio_byte(bottom.goal_effect),
+        top.active_skill, bottom.active_skill,
+        game.timers.now & 0xFFFFFFFF, top.ack_seq & 0xFFFFFFFF, bottom.ack_seq & 0xFFFFFFFF,
+    )
+
+
+def unpack_frame(buf):
+    """pack_frame 의 역변환. Game.out_dynamic() 과 같은 모양의 dict 와 seq 를 반환"""
+    (version, flags, seq, timestamp, bx, by, tx, ty, ux, uy,
+     score_top, score_bottom, ratio_top, ratio_bottom, active_top, active_bottom,
+     tick, ack_top, ack_bottom) = _packer.unpack(buf)
+    if version != FRAME_VERSION:
+        raise ValueError(f"unsupported state frame version {version}")
+
+    def blind(side):
+        if flags & _BLIND_FLAGS[(side, "circle")]:
+            return {"shape": "circle"}
+        if flags & _BLIND_FLAGS[(side, "rect")]:
+            return {"shape": "rect"}
+        return None
+
+    return seq, {
+        "phase": PHASES[(flags >> PHASE_SHIFT) & 7],
+        "tick": tick,
+        "ack": {"top": ack_top, "bottom": ack_bottom},
+        "ball": {"x": bx, "y": by, "timestamp": timestamp},
+        "paddles": {"top": {"x": tx, "y": ty}, "bottom": {"x": ux, "y": uy}},
+        "scores": {"top": score_top, "bottom": score_bottom},
+        "goal_width_ratio": {"top": ratio_top / RATIO_SCALE, "bottom": ratio_bottom / RATIO_SCALE},
+        "blind_effect": {"top": blind("top"), "bottom": blind("bottom")},
+        "skills": {"top": {"active": active_top}, "bottom": {"active": active_bottom}},
+    }
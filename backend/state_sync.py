@@ -0,0 +1,157 @@
+import os
+from threading import RLock
+
+from state_codec import pack_frame
+
+# ─────────── 상태 동기화 (키프레임 + 델타) ───────────
+# "delta": 입장/재동기화 때 키프레임, 이후에는 바뀐 필드만 전송
+# "full" : 예전처럼 매 틱 Game.out() 전체 전송
+# "binary": 입장/재동기화 때 JSON 키프레임, 이후에는 고정 레이아웃 바이너리 프레임 (state_codec.py)
+STATE_SYNC_MODE = os.getenv("STATE_SYNC_MODE", "delta")
+
+encoders = {}
+
+
+def _diff(prev, cur):
+    """prev 대비 cur 에서 바뀐 필드만 (중첩 dict 는 재귀적으로) 추려낸다"""
+    changed = {}
+    for key, value in cur.items():
+        old = prev.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            sub = _diff(old, value)
+            if sub:
+                changed[key] = sub
+        elif key not in prev or old != value:
+            changed[key] = value
+    return changed
+
+
+class StateEncoder:
+    """방 하나의 상태 프레임 시퀀스를 관리.
+    키프레임은 핸들러 스레드(입장)에서, 델타는 루프 스레드에서 만들므로 lock 으로 묶는다.
+    emit 하는 쪽도 인코딩과 emit 을 같은 lock 안에서 해야 보내는 순서가 시퀀스 순서와 같아진다"""
+
+    def __init__(self):
+        self.lock = RLock()
+        self.seq = 0
+        self.last = None        # 마지막으로 브로드캐스트한 동적 상태 (델타 기준)
+        self.static_rev = -1    # 마지막 키프레임에 실린 스킬 목록 버전
+        self.packed_seq = None  # 마지막 바이너리 프레임의 시퀀스 (그 뒤로 last 는 갱신되지 않음)
+
+    def _frame(self, game, state, key):
+        static = game.out_static()
+        frame = dict(state)
+        frame["skills"] = {
+            side: dict(state["skills"][side], available=static[side])
+            for side in ("top", "bottom")
+        }
+        frame["seq"] = self.seq
+        frame["key"] = key
+        return frame
+
+    def keyframe(self, game):
+        """새 기준 상태를 만들고 전체 프레임(스킬 목록 포함)을 반환"""
+        with self.lock:
+            state = game.out_dynamic()
+            self.seq += 1
+            self.last = state
+            self.static_rev = game.static_rev
+            self.packed_seq = None
+            return self._frame(game, state, True)
+
+    def snapshot(self, game):
+        """시퀀스를 올리지 않고 현재 기준 상태를 다시 보낸다 (한 클라이언트 재동기화용).
+        바이너리 프레임을 보낸 뒤라면 last 는 키프레임 시점 상태이므로 지금 상태로 만든다
+        (바이너리 프레임은 동적 상태 전체를 덮어쓰므로 델타 기준을 맞출 필요가 없음)"""
+        with self.lock:
+            if self.last is None:
+                return None
+            if self.packed_seq is not None:
+                return self._frame(game, game.out_dynamic(), True)
+            return self._frame(game, self.last, True)
+
+    def frame_at(self, game, state, seq):
+        """이미 보낸 상태 state(시퀀스 seq)의 키프레임 - 지연 전송 중인 피드에 새로 붙는 클라이언트용"""
+        frame = self._frame(game, state, True)
+        frame["seq"] = seq
+        return frame
+
+    def packed(self, game):
+        """바이너리 프레임 (매번 전체 동적 상태라 누락돼도 다음 프레임이 덮어씀). 키프레임이 필요하면 None"""
+        with self.lock:
+            if self.last is None or game.static_rev != self.static_rev:
+                return None
+            self.seq += 1
+            self.packed_seq = self.seq
+            return pack_frame(game, self.seq)
+
+    def delta(self, game):
+        """직전 프레임 대비 바뀐 필드만 반환. 키프레임이 필요하면 None"""
+        with self.lock:
+            if self.last is None or game.static_rev != self.static_rev:
+                return None
+            state = game.out_dynamic()
+            changed = _diff(self.last, state)
+            self.seq += 1
+            self.last = state
+            changed["seq"] = self.seq
+            changed["base"] = self.seq - 1
+            return changed
+
+
+def get_encoder(room):
+    enc = encoders.get(room)
+    if enc is None:
+        enc = encoders.setdefault(room, StateEncoder())
+    return enc
+
+
+def drop_encoder(room):
+    encoders.pop(room, None)
+
+
+def encode_state(room, game):
+    """방 상태를 한 번 직렬화해 (이벤트명, 페이로드)로 반환 (모드에 따라 델타 또는 전체)"""
+    if STATE_SYNC_MODE not in ("delta", "binary"):
+        return "state", game.out()
+    enc = get_encoder(room)
+    if STATE_SYNC_MODE == "binary":
+        frame = enc.packed(game)
+        if frame is None:
+            return "state", enc.keyframe(game)
+        return "state_bin", frame
+    frame = enc.delta(game)
+    if frame is None:
+        return "state", enc.keyframe(game)
+    return "state_delta", frame
+
+
+def emit_state(socketio, room, game):
+    """방 전체에 상태를 브로드캐스트"""
+    with get_encoder(room).lock:
+        event, frame = encode_state(room, game)
+        socketio.emit(event, frame, room=room)
+
+
+def emit_keyframe(socketio, room, game):
+    """방 전체에 새 키프레임을 브로드캐스트 (입장 / 매치 시작)"""
+    if STATE_SYNC_MODE not in ("delta", "binary"):
+        socketio.emit("state", game.out(), room=room)
+        return
+    enc = get_encoder(room)
+    with enc.lock:
+        socketio.emit("state", enc.keyframe(game), room=room)
+
+
+def emit_resync(socketio, room, game, sid):
+    """시퀀스가 끊긴 클라이언트 한 명에게만 현재 기준 상태를 다시 보낸다"""
+    if STATE_SYNC_MODE not in ("delta", "binary"):
+        socketio.emit("state", game.out(), to=sid)
+        return
+    enc = get_encoder(room)
+    with enc.lock:
+        frame = enc.snapshot(game)
+        if frame is None:
+            emit_keyframe(socketio, room, game)
+            return
+        socketio.emit("state", frame, to=sid)
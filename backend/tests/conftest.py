@@ -0,0 +1,5 @@
+import os
+import sys
+
+# backend/ 의 모듈은 평평하게 import 하므로 (python app.py 로 실행) 테스트도 같은 경로에서 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+import threading
+import time
+
+import pytest
+
+from async_runtime import LoadOnce
+
+
+def test_concurrent_callers_load_once_without_holding_lock():
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return {"a": 1}
+
+    once = LoadOnce(loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(once.get())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    started.wait(1)
+    assert not once.lock.locked()  # 읽는 동안 다른 호출자는 lock 을 쥐고 기다리지 않음
+    for t in threads:
+        t.join()
+    assert calls == [1]
+    assert results == [{"a": 1}] * 8
+
+
+def test_failed_load_is_retried_and_reset_reloads():
+    values = iter([RuntimeError("db down"), 1, 2])
+
+    def loader():
+        value = next(values)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    once = LoadOnce(loader)
+    with pytest.raises(RuntimeError):
+        once.get()
+    assert once.get() == 1
+    assert once.get() == 1
+    once.reset()
+    assert once.get() == 2
@@ -0,0 +1,95 @@
+from flask import Flask, request
+
+from cluster import Cluster, LocalBus
+
+
+class FakeServer:
+    def __init__(self):
+        self.rooms = []
+
+    def enter_room(self, sid, room, namespace="/"):
+        self.rooms.append(("enter", sid, room))
+
+    def leave_room(self, sid, room, namespace="/"):
+        self.rooms.append(("leave", sid, room))
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.server = FakeServer()
+
+
+class Node:
+    """Cluster 하나와 그 노드의 핸들러 호출 기록"""
+
+    def __init__(self, bus, node_id):
+        self.cluster = Cluster(bus, node_id, "test")
+        self.socketio = FakeSocketIO()
+        self.events = []
+        self.lobby = []
+        self.lost = []
+        self.cluster.bind(self.dispatch, lambda *change: self.lobby.append(change), self.lost.append)
+        self.cluster.start(Flask(node_id), self.socketio)
+
+    def dispatch(self, event, args):
+        self.events.append((event, args, request.sid, request.cluster_origin))
+
+
+def make_nodes():
+    bus = LocalBus()
+    return Node(bus, "a"), Node(bus, "b")
+
+
+def test_claim_conflict_loser_releases():
+    a, b = make_nodes()
+    # b 가 먼저 맡았지만 그 알림이 닿기 전에 a 도 맡음
+    b.cluster.owners["r"] = "b"
+    assert a.cluster.claim("r")
+    assert b.lost == ["r"]
+    assert b.cluster.owner("r") == "a"
+    b.cluster._publish_all("own", room="r")   # 늦게 도착한 b 의 알림
+    assert a.lost == []
+    assert a.cluster.owner("r") == "a"
+    assert not b.cluster.claim("r")
+    assert a.cluster.owned_rooms() == ["r"] and b.cluster.owned_rooms() == []
+
+
+def test_forward_runs_handler_on_owner():
+    a, b = make_nodes()
+    assert a.cluster.claim("r")
+    assert b.cluster.owner("r") == "a"
+    assert not a.cluster.forward("paddle_move", "r", [{"room": "r"}], "s1")
+    assert b.cluster.forward("paddle_move", "r", [{"room": "r"}], "s1")
+    assert a.events == [("paddle_move", [{"room": "r"}], "s1", "b")]
+    assert b.events == []
+    # owner 노드의 방 입장 요청은 소켓이 붙어 있는 노드에서 실행됨
+    a.cluster.enter_room("b", "s1", "r")
+    assert b.socketio.server.rooms == [("enter", "s1", "r")]
+    assert a.socketio.server.rooms == []
+
+
+def test_share_disconnect_and_lobby():
+    a, b = make_nodes()
+    b.cluster.share_disconnect("s1")
+    assert a.events == [("disconnect", [], "s1", "b")]
+    assert b.events == []
+    a.cluster.share_lobby(("room_removed", {"version": 1, "room_name": "r"}))
+    assert b.lobby == [("room_removed", {"version": 1, "room_name": "r"})]
+    assert a.lobby == []
+
+
+def test_release_and_bye_clear_ownership():
+    a, b = make_nodes()
+    a.cluster.claim("r")
+    a.cluster.claim("q")
+    a.cluster.release("r")
+    assert b.cluster.owner("r") is None and b.cluster.owner("q") == "a"
+    a.cluster.stop()
+    assert b.cluster.owner("q") is None
+
+
+def test_lobby_versions_shared_across_nodes():
+    a, b = make_nodes()
+    # 두 노드가 번갈아 델타를 만들어도 버전이 겹치지 않음
+    versions = [a.cluster.next_lobby_version(), b.cluster.next_lobby_version(), a.cluster.next_lobby_version()]
+    assert versions == [1, 2, 3]
@@ -0,0 +1,63 @@
+import pytest
+
+from game_logic import Game, PLAYING, FINISHED
+from game_loop import GameLoop
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.emits = []
+
+    def emit(self, event, data, room=None, to=None):
+        self.emits.append((event, room))
+
+    def sleep(self, seconds):
+        pass
+
+
+def test_one_failing_room_does_not_stop_the_others():
+    games = {"bad": Game("bad", None, 1), "good": Game("good", None, 2)}
+    for g in games.values():
+        g.phase = PLAYING
+
+    def broken():
+        raise TypeError("malformed input")
+    games["bad"]._apply_input = broken
+    games["bad"].input_pending = True
+
+    sio = FakeSocketIO()
+    loop = GameLoop(sio, games)
+    loop.run_due(now=0.0)
+    before = games["good"].timers.now
+    loop.run_due(now=Game.TICK)
+
+    assert games["bad"].phase == FINISHED
+    assert games["good"].phase == PLAYING
+    assert games["good"].timers.now > before
+    assert ("state", "good") in sio.emits or ("state_delta", "good") in sio.emits
+
+
+def test_queued_actions_apply_at_tick_start():
+    sio = FakeSocketIO()
+    g = Game("r", sio, 1)
+    skills = [{"id": i, "cooldown": 1.0} for i in range(1, 7)]
+    g.queue_action("set_player_skills", "left", skills, "alice")
+    g.queue_action("start_countdown")
+    assert g.sides[0].username is None and g.phase == "waiting"
+
+    loop = GameLoop(sio, {"r": g})
+    loop.run_due(now=0.0)   # 대기 방도 틱 경계에서 동작을 적용
+    assert g.sides[0].username == "alice" and g.phase == "countdown"
+
+    g.queue_action("activate_skill", "left", 3)
+    tick = g.timers.now
+    g.step()
+    assert g.sides[0].cooldowns and ("skill_activated", "r") in sio.emits
+    assert g.timers.now == tick + 1
+
+
+def test_queue_action_rejects_other_methods():
+    g = Game("r", None, 1)
+    with pytest.raises(ValueError):
+        g.queue_action("close")
+    assert not g.actions
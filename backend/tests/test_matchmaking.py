@@ -0,0 +1,89 @@
+import pytest
+
+from matchmaking import MatchQueue, MatchQueueFull, match_rating
+
+
+def played(usage_count):
+    """스킬 사용 횟수 합이 usage_count 인 스킬 목록 (매칭 점수는 이 값으로만 정해짐)"""
+    return [{"skill_id": 1, "usage_count": usage_count}]
+
+
+def sids(pair):
+    return tuple(entry.sid for entry in pair)
+
+
+def test_same_bucket_pairs_immediately():
+    q = MatchQueue(widen_seconds=5, max_range=3)
+    assert q.enqueue("a", "A", played(120), now=0) is None
+    pair = q.enqueue("b", "B", played(180), now=1)
+    assert sids(pair) == ("a", "b")  # 먼저 온 사람이 왼쪽
+    assert q.stats()["queued"] == 0 and q.stats()["matched"] == 1
+
+
+def test_sweep_widens_range_over_time():
+    q = MatchQueue(widen_seconds=5, max_range=3)
+    assert q.enqueue("a", "A", played(100), now=0) is None
+    assert q.enqueue("b", "B", played(250), now=0) is None
+    assert q.sweep(now=4.9) == []
+    assert [sids(p) for p in q.sweep(now=5)] == [("a", "b")]
+    assert q.sweep(now=6) == []
+
+
+def test_max_range_caps_widening():
+    q = MatchQueue(widen_seconds=1, max_range=3)
+    q.enqueue("a", "A", played(0), now=0)
+    q.enqueue("b", "B", played(1000), now=0)
+    assert q.sweep(now=100) == []
+    assert q.stats()["queued"] == 2
+
+
+def test_sweep_picks_nearest_bucket():
+    q = MatchQueue(widen_seconds=5, max_range=5)
+    q.enqueue("a", "A", played(500), now=0)
+    q.enqueue("far", "F", played(700), now=1)
+    q.enqueue("near", "N", played(400), now=2)
+    assert [sids(p) for p in q.sweep(now=12)] == [("a", "near")]
+    assert q.position("far") == 1
+
+
+def test_cancel_removes_entry():
+    q = MatchQueue(widen_seconds=5, max_range=3)
+    q.enqueue("a", "A", played(100), now=0)
+    assert q.cancel("a")
+    assert not q.cancel("a")
+    assert q.position("a") is None
+    assert q.enqueue("b", "B", played(100), now=1) is None
+    assert q.stats()["cancelled"] == 1 and q.stats()["buckets"] == {1: 1}
+
+
+def test_full_queue_rejects_new_but_allows_requeue():
+    q = MatchQueue(widen_seconds=5, max_range=0, max_size=2)
+    q.enqueue("a", "A", played(0), now=0)
+    q.enqueue("b", "B", played(500), now=0)
+    with pytest.raises(MatchQueueFull):
+        q.enqueue("c", "C", played(900), now=1)
+    assert q.stats()["rejected"] == 1
+    # 이미 기다리는 사람은 조건을 바꿔 다시 넣을 수 있고 대기 시간은 유지됨
+    assert q.enqueue("b", "B", played(50), now=3) is not None
+
+
+def test_rating_ignores_non_finite_usage():
+    assert match_rating(played(float("nan"))) == 0.0
+    assert match_rating(played(float("inf"))) == 0.0
+    assert match_rating(played(250)) == 250.0
+
+
+def test_same_username_is_not_matched_with_itself():
+    q = MatchQueue(widen_seconds=5, max_range=3)
+    assert q.enqueue("a1", "A", played(100), now=0) is None
+    assert q.enqueue("a2", "A", played(100), now=1) is None   # 같은 계정의 다른 탭
+    assert sids(q.enqueue("b", "B", played(100), now=2)) == ("a1", "b")
+
+
+def test_requeue_keeps_sweep_order():
+    q = MatchQueue(widen_seconds=5, max_range=3)
+    q.enqueue("a", "A", played(0), now=0)
+    q.enqueue("b", "B", played(300), now=11)
+    assert q.enqueue("a", "A", played(0), now=12) is None   # 다시 요청해도 오래 기다린 순서는 그대로
+    # b 는 아직 범위가 넓어지지 않았지만 그보다 먼저 온 a 의 차례에 짝지어짐 (a 가 왼쪽)
+    assert [sids(p) for p in q.sweep(now=15)] == [("a", "b")]
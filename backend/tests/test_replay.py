@@ -0,0 +1,71 @@
+import glob
+import os
+import random
+
+import pytest
+
+import batch_engine
+import match_log
+import replay
+from bench_game import SKILLS
+from match_log import RECORD, CHECKSUM
+
+
+def record_match(tmp_path, monkeypatch, engine="scalar", seed=11):
+    """스크립트 입력으로 경기 하나를 기록하고 (.rpl 경로, 실제 점수) 반환"""
+    monkeypatch.setattr(match_log, "REPLAY_DIR", str(tmp_path))
+    monkeypatch.setattr(batch_engine, "PHYSICS_ENGINE", engine)
+    rng = random.Random(seed)
+    g = batch_engine.make_game("test room", seed=seed)
+    g.set_player_skills("left", [dict(s) for s in SKILLS], "a")
+    g.set_player_skills("right", [dict(s) for s in SKILLS], "b")
+    g.start_countdown()
+    for t in range(1500):
+        if rng.random() < 0.5:
+            g.queue_paddle_position("left", g.bx + rng.uniform(-20, 20), 80 + rng.uniform(-30, 30), t,
+                                    max(0, g.timers.now - rng.randint(0, 10)))
+        if rng.random() < 0.5:
+            g.queue_paddle_move("right", rng.uniform(-8, 8), rng.uniform(-8, 8), t)
+        if rng.random() < 0.01:
+            g.set_selected_skill("left", rng.choice((1, 2)))
+        if rng.random() < 0.005:
+            g.activate_skill("right", rng.choice((3, 4, 5, 6)))
+        batch_engine.step_games([g], [1])
+    g.finish()
+    score = {"left": g.get_score("left"), "right": g.get_score("right")}
+    g.close()
+    (path,) = glob.glob(os.path.join(str(tmp_path), "*.rpl"))
+    return path, score
+
+
+def test_replay_reproduces_recorded_match(tmp_path, monkeypatch):
+    path, score = record_match(tmp_path, monkeypatch)
+    _, result = replay.replay(path)
+    assert result["verified"] is True
+    assert result["score"] == score
+    assert result["ticks"] >= 1500
+
+
+def test_numpy_replay_of_scalar_log(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    path, _ = record_match(tmp_path, monkeypatch)
+    _, result = replay.replay(path, engine="numpy")
+    assert result["verified"] is True
+
+
+def test_unfinished_log_is_not_verified(tmp_path, monkeypatch):
+    # 서버가 비정상 종료해 END 레코드가 없으면 verified 는 None
+    path, _ = record_match(tmp_path, monkeypatch)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - RECORD.size - CHECKSUM.size)
+    _, result = replay.replay(path)
+    assert result["verified"] is None
+
+
+def test_tampered_checksum_fails(tmp_path, monkeypatch):
+    path, _ = record_match(tmp_path, monkeypatch)
+    with open(path, "r+b") as f:
+        f.seek(os.path.getsize(path) - 8)   # 체크섬의 마지막 필드 (공 재배치 횟수)
+        f.write((123456789).to_bytes(8, "little"))
+    _, result = replay.replay(path)
+    assert result["verified"] is False
@@ -0,0 +1,88 @@
+from socketio import packet
+
+from game_logic import Game
+from spectators import SpectatorHub
+
+
+class FakeManager:
+    def __init__(self, local):
+        self.local = local
+
+    def eio_sid_from_sid(self, sid, namespace):
+        return "eio-" + sid if sid in self.local else None
+
+
+class FakeEngineIO:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, eio_sid, data):
+        self.sent.append((eio_sid, data))
+
+
+class FakeServer:
+    packet_class = packet.Packet
+
+    def __init__(self, local):
+        self.manager = FakeManager(local)
+        self.eio = FakeEngineIO()
+
+
+class FakeSocketIO:
+    def __init__(self, local):
+        self.server = FakeServer(local)
+        self.emits = []
+
+    def emit(self, event, data, **kwargs):
+        self.emits.append((event, kwargs))
+
+
+def count_encodes(monkeypatch):
+    calls = []
+    encode = packet.Packet.encode
+
+    def counting(self):
+        calls.append(self.packet_type)
+        return encode(self)
+    monkeypatch.setattr(packet.Packet, "encode", counting)
+    return calls
+
+
+def make_hub(viewers):
+    hub = SpectatorHub(hz=10, delay=0.0, max_viewers=1000)
+    for sid in viewers:
+        assert hub.add(sid, "r") == "r#spectators"
+    return hub
+
+
+def test_publish_encodes_once_for_all_viewers(monkeypatch):
+    viewers = [f"s{i}" for i in range(50)]
+    sio = FakeSocketIO(set(viewers))
+    hub = make_hub(viewers)
+    calls = count_encodes(monkeypatch)
+    games = {"r": Game("r", None, 1)}
+
+    for i in range(3):
+        hub.publish_due(sio, games, now=i * hub.interval)
+
+    assert calls == [packet.EVENT] * 3  # 관전자 수와 상관없이 프레임당 한 번
+    assert len(sio.server.eio.sent) == 3 * len(viewers)
+    first = {data for _, data in sio.server.eio.sent[:len(viewers)]}
+    assert len(first) == 1  # 모두 같은 페이로드
+    assert {eio_sid for eio_sid, _ in sio.server.eio.sent} == {"eio-" + sid for sid in viewers}
+    assert sio.emits == []
+
+
+def test_remote_viewers_fall_back_to_room_emit(monkeypatch):
+    sio = FakeSocketIO({"a", "b"})
+    hub = make_hub(["a", "b", "remote"])
+    calls = count_encodes(monkeypatch)
+
+    hub.publish_due(sio, {"r": Game("r", None, 1)}, now=0.0)
+
+    assert calls == [packet.EVENT]
+    assert len(sio.server.eio.sent) == 2
+    assert len(sio.emits) == 1
+    event, kwargs = sio.emits[0]
+    assert kwargs["room"] == "r#spectators"
+    assert sorted(kwargs["skip_sid"]) == ["a", "b"]
@@ -0,0 +1,29 @@
+from game_logic import Game
+from state_sync import StateEncoder
+
+
+def test_binary_resync_uses_live_state():
+    g = Game("r", None, 1)
+    enc = StateEncoder()
+    key = enc.keyframe(g)
+    for x in (100, 150, 200):
+        g.queue_paddle_position("left", x, 120)
+        g.step()
+        assert enc.packed(g) is not None
+    snap = enc.snapshot(g)
+    assert snap["seq"] == enc.seq
+    assert snap["paddles"] == g.out_dynamic()["paddles"] != key["paddles"]
+
+
+def test_delta_resync_keeps_delta_base():
+    g = Game("r", None, 1)
+    enc = StateEncoder()
+    enc.keyframe(g)
+    g.queue_paddle_position("left", 150, 120)
+    g.step()
+    enc.delta(g)
+    base = enc.last
+    g.queue_paddle_position("left", 200, 120)
+    g.step()
+    # 다음 델타는 last 기준이므로 재동기화도 last 를 보냄
+    assert enc.snapshot(g)["paddles"] == base["paddles"]
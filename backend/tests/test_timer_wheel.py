@@ -0,0 +1,67 @@
+import random
+
+from timer_wheel import TimerWheel, WHEEL_SIZE
+
+
+def run_until(wheel, tick):
+    while wheel.now < tick:
+        wheel.advance()
+
+
+def test_timers_fire_on_their_tick_across_levels():
+    wheel = TimerWheel()
+    fired = []
+    rng = random.Random(7)
+    # 레벨 0 (< 64), 레벨 1 (< 4096), 레벨 2 (< 262144) 경계를 모두 포함
+    delays = [1, 2, 63, 64, 65, 127, 128, 4095, 4096, 4097, 8191, 70000, 262143]
+    delays += [rng.randrange(1, 200000) for _ in range(300)]
+    for delay in delays:
+        wheel.schedule(delay, lambda d: fired.append((wheel.now, d)), delay)
+
+    run_until(wheel, max(delays))
+
+    assert sorted(fired) == sorted((d, d) for d in delays)
+    assert all(now == delay for now, delay in fired)
+
+
+def test_same_tick_runs_in_schedule_order():
+    wheel = TimerWheel()
+    fired = []
+    for name in "abc":
+        wheel.schedule(WHEEL_SIZE * 3 + 5, fired.append, name)
+    run_until(wheel, WHEEL_SIZE * 3 + 5)
+    assert fired == ["a", "b", "c"]
+
+
+def test_cancelled_timer_never_fires():
+    wheel = TimerWheel()
+    fired = []
+    near = wheel.schedule(10, fired.append, "near")
+    far = wheel.schedule(5000, fired.append, "far")   # 레벨 1 에서 내려오기 전에 취소
+    near.cancel()
+    far.cancel()
+    run_until(wheel, 6000)
+    assert fired == []
+    assert wheel.remaining(far) == 0
+
+
+def test_callback_can_schedule_far_timer():
+    wheel = TimerWheel()
+    fired = []
+
+    def first():
+        fired.append(wheel.now)
+        wheel.schedule(WHEEL_SIZE * WHEEL_SIZE + 1, lambda: fired.append(wheel.now))
+
+    wheel.schedule(WHEEL_SIZE, first)
+    run_until(wheel, WHEEL_SIZE * 2 + WHEEL_SIZE * WHEEL_SIZE)
+    assert fired == [WHEEL_SIZE, WHEEL_SIZE + WHEEL_SIZE * WHEEL_SIZE + 1]
+
+
+def test_remaining_counts_down():
+    wheel = TimerWheel()
+    timer = wheel.schedule(100, lambda: None)
+    run_until(wheel, 40)
+    assert wheel.remaining(timer) == 60
+    run_until(wheel, 100)
+    assert wheel.remaining(timer) == 0
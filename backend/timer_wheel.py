@@ -0,0 +1,88 @@
+# 계층형 타이머 휠 (틱 단위)
+# 각 레벨은 64칸. 레벨 0 은 1틱, 레벨 1 은 64틱, 레벨 2 는 4096틱 ... 간격
+# 예약/취소는 O(1), 틱마다 하는 일은 현재 칸 하나를 비우는 것 뿐이라 효과 수와 상관없이 일정함
+
+WHEEL_BITS = 6
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4
+
+
+class Timer:
+    """예약된 콜백 하나. cancel() 하면 만료돼도 실행되지 않는다"""
+    __slots__ = ("expires", "callback", "args", "cancelled")
+
+    def __init__(self, expires, callback, args):
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    def __init__(self):
+        self.now = 0    # 지금까지 진행한 틱 수
+        self.wheels = [[[] for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)]
+        self.overflow = []  # 가장 큰 레벨보다 먼 타이머
+
+    def _place(self, timer):
+        delta = timer.expires - self.now
+        for level in range(WHEEL_LEVELS):
+            if delta < (1 << (WHEEL_BITS * (level + 1))):
+                slot = (timer.expires >> (WHEEL_BITS * level)) & WHEEL_MASK
+                self.wheels[level][slot].append(timer)
+                return
+        self.overflow.append(timer)
+
+    def schedule(self, ticks, callback, *args):
+        """ticks 틱 뒤(최소 1틱)에 callback(*args) 실행"""
+        timer = Timer(self.now + max(1, int(ticks)), callback, args)
+        self._place(timer)
+        return timer
+
+    def remaining(self, timer):
+        """남은 틱 수 (취소됐거나 이미 실행됐으면 0)"""
+        if timer is None or timer.cancelled:
+            return 0
+        return max(0, timer.expires - self.now)
+
+    def _cascade(self, level):
+        slot = (self.now >> (WHEEL_BITS * level)) & WHEEL_MASK
+        timers = self.wheels[level][slot]
+        self.wheels[level][slot] = []
+        for timer in timers:
+            if not timer.cancelled:
+                self._place(timer)
+
+    def advance(self):
+        """한 틱 진행하고 만료된 타이머를 예약 순서대로 실행"""
+        self.now += 1
+        # 하위 레벨 한 바퀴가 끝나면 상위 레벨 칸을 내려보냄
+        for level in range(1, WHEEL_LEVELS):
+            if self.now & ((1 << (WHEEL_BITS * level)) - 1):
+                break
+            self._cascade(level)
+        else:
+            if self.overflow:
+                timers, self.overflow = self.overflow, []
+                for timer in timers:
+                    if not timer.cancelled:
+                        self._place(timer)
+
+        slot = self.now & WHEEL_MASK
+        timers = self.wheels[0][slot]
+        if not timers:
+            return
+        self.wheels[0][slot] = []
+        for timer in timers:
+            if timer.cancelled:
+                continue
+            if timer.expires != self.now:
+                # 콜백 안에서 같은 칸에 예약된 먼 타이머
+                self._place(timer)
+                continue
+            timer.cancelled = True
+            timer.callback(*timer.args)
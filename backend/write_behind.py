@@ -0,0 +1,196 @@
+import os
+import time
+import atexit
+import threading
+
+from database import DB
+from logs import get_logger
+
+log = get_logger("write_behind")
+
+# ─────────── 지연 쓰기 (write-behind) 큐 ───────────
+# 소켓 핸들러 안에서 매번 커넥션을 빌려 한 줄씩 커밋하던 쓰기(방 인원/게임 중 여부, 스킬 사용 횟수, 경기 결과)를
+# 메모리에 모아 두었다가 백그라운드 스레드가 주기적으로 한 트랜잭션에 여러 행씩 기록한다.
+# 같은 방/스킬에 대한 쓰기는 합쳐지므로(마지막 값 / 횟수 합산) 대기열 크기는 방 수 + 사용한 스킬 수 + 경기 수로 묶인다.
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "1.0"))       # 플러시 주기 (초)
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))  # 대기 항목 상한 (넘으면 버리고 집계)
+
+
+class WriteBehindQueue:
+    def __init__(self, interval=WRITE_BEHIND_INTERVAL, max_pending=WRITE_BEHIND_MAX_PENDING):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.stopping = False
+        self.rooms = {}     # room_name -> [current_player, is_playing] (None 이면 그 필드는 그대로)
+        self.usage = {}     # (username, skill_id) -> [증가할 횟수, 마지막 사용 시각]
+        self.matches = []   # (left_score, right_score)
+        # 지표
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.errors = 0
+        self.flush_last = 0.0
+        self.flush_max = 0.0
+        self.flush_total = 0.0
+
+    # ── 생산자 쪽 (소켓 핸들러 / 게임 루프) ──
+    def _pending(self):
+        return len(self.rooms) + len(self.usage) + len(self.matches)
+
+    def _admit(self, is_new):
+        """새 항목을 넣을 자리가 있는지 (lock 안에서 호출). 기존 항목에 합쳐지는 쓰기는 항상 허용"""
+        self.enqueued += 1
+        if not is_new:
+            self.coalesced += 1
+            return True
+        if self._pending() >= self.max_pending:
+            self.dropped += 1
+            self.wakeup.set()
+            return False
+        return True
+
+    def room_counters(self, room_name, current_player=None, is_playing=None):
+        with self.lock:
+            entry = self.rooms.get(room_name)
+            if not self._admit(entry is None):
+                return
+            if entry is None:
+                entry = self.rooms[room_name] = [None, None]
+            if current_player is not None:
+                entry[0] = current_player
+            if is_playing is not None:
+                entry[1] = bool(is_playing)
+
+    def discard_room(self, room_name):
+        """방이 삭제/재생성될 때 아직 안 쓴 인원 변경을 버림 (삭제 뒤에 오래된 값이 기록되지 않도록)"""
+        with self.lock:
+            self.rooms.pop(room_name, None)
+
+    def skill_used(self, username, skill_id):
+        if not username:
+            return
+        key = (username, skill_id)
+        with self.lock:
+            entry = self.usage.get(key)
+            if not self._admit(entry is None):
+                return
+            if entry is None:
+                entry = self.usage[key] = [0, None]
+            entry[0] += 1
+            entry[1] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def match_result(self, left_score, right_score):
+        with self.lock:
+            if self._admit(True):
+                self.matches.append((left_score, right_score))
+
+    # ── 백그라운드 워커 ──
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """남은 쓰기를 모두 기록하고 워커를 멈춤 (서버 종료 시)"""
+        self.stopping = True
+        self.wakeup.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=10)
+        self.flush()
+
+    def _run(self):
+        while not self.stopping:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def _take(self):
+        with self.lock:
+            batch = (self.rooms, self.usage, self.matches)
+            self.rooms, self.usage, self.matches = {}, {}, []
+            return batch
+
+    def _restore(self, rooms, usage, matches):
+        # 실패한 배치를 되돌림. 그 사이 들어온 값이 더 최신이므로 방 상태는 기존 값을 우선, 횟수는 합산
+        with self.lock:
+            for name, (players, playing) in rooms.items():
+                entry = self.rooms.setdefault(name, [None, None])
+                if entry[0] is None:
+                    entry[0] = players
+                if entry[1] is None:
+                    entry[1] = playing
+            for key, (count, last_used) in usage.items():
+                entry = self.usage.setdefault(key, [0, last_used])
+                entry[0] += count
+            room = max(0, self.max_pending - self._pending())
+            self.dropped += max(0, len(matches) - room)
+            self.matches[:0] = matches[:room]
+
+    def flush(self):
+        rooms, usage, matches = self._take()
+        if not (rooms or usage or matches):
+            return 0
+        t0 = time.perf_counter()
+        try:
+            with DB.transaction("write_behind_flush") as cur:
+                if matches:
+                    cur.executemany("INSERT INTO matches(left_score, right_score) VALUES (%s,%s)", matches)
+                if usage:
+                    cur.executemany("""
+                        UPDATE user_skills us JOIN users u ON u.id = us.user_id
+                        SET us.usage_count = us.usage_count + %s, us.last_used = %s
+                        WHERE u.username = %s AND us.skill_id = %s
+                    """, [(count, last_used, username, skill_id)
+                          for (username, skill_id), (count, last_used) in usage.items()])
+                if rooms:
+                    cur.executemany("""
+                        UPDATE match_room
+                        SET current_player = COALESCE(%s, current_player), is_playing = COALESCE(%s, is_playing)
+                        WHERE room_name = %s
+                    """, [(players, playing, name) for name, (players, playing) in rooms.items()])
+        except Exception as e:
+            self.errors += 1
+            log.warning("플러시 실패, 다음 주기에 다시 시도: %s", e)
+            self._restore(rooms, usage, matches)
+            return 0
+        # 캐시된 로드아웃의 usage_count 가 방금 기록한 값보다 오래됨 - 해당 유저만 다시 읽게 함
+        for username in {username for username, _ in usage}:
+            DB.loadouts.invalidate(username)
+
+        elapsed = time.perf_counter() - t0
+        written = len(rooms) + len(usage) + len(matches)
+        self.flushes += 1
+        self.rows_written += written
+        self.flush_last = elapsed
+        self.flush_max = max(self.flush_max, elapsed)
+        self.flush_total += elapsed
+        return written
+
+    def stats(self):
+        with self.lock:
+            pending = self._pending()
+        flushes = self.flushes or 1
+        return {
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "errors": self.errors,
+            "flush_ms_last": self.flush_last * 1000,
+            "flush_ms_max": self.flush_max * 1000,
+            "flush_ms_avg": self.flush_total / flushes * 1000,
+        }
+
+
+# 싱글턴 인스턴스 (워커는 app.py 에서 start)
+WRITES = WriteBehindQueue()
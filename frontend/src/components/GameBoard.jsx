@@ -1,6 +1,6 @@
 import { useEffect, useRef, useState, useCallback } from "react";
 import { useSearchParams } from "react-router-dom";
-import socket from "../socket";
+import socket, { subscribeState, createPaddlePredictor } from "../socket";
 import fry_audio from "../assets/audio/audio_fry.mp3";
 import malletRedImg from '../assets/mallet_red.png';
 import puckImg from '../assets/puck.png';
@@ -23,14 +23,24 @@ const audio_fry = new Audio(fry_audio);
 // Throttle 함수
 function throttle(func, limit) {
   let inThrottle;
-  return function() {
-    const args = arguments;
-    const context = this;
-    if (!inThrottle) {
-      func.apply(context, args);
-      inThrottle = true;
-      setTimeout(() => inThrottle = false, limit);
+  let trailingArgs = null;  // 쉬는 동안 들어온 마지막 호출 (마지막 위치가 서버에 빠지지 않도록)
+  const release = () => {
+    if (trailingArgs) {
+      func(...trailingArgs);
+      trailingArgs = null;
+      setTimeout(release, limit);
+    } else {
+      inThrottle = false;
     }
+  };
+  return function(...args) {
+    if (inThrottle) {
+      trailingArgs = args;
+      return;
+    }
+    func(...args);
+    inThrottle = true;
+    setTimeout(release, limit);
   }
 }
 
@@ -38,6 +48,7 @@ export default function GameBoard() {
   const [searchParams] = useSearchParams();
   const username = searchParams.get('username') || 'player1';
   const roomName = searchParams.get('room_name') || 'default'; // room_name 파라미터 추가
+  const spectating = searchParams.get('spectate') === '1'; // 관전 모드 (패들 조작 없음, 지연된 저주기 상태)
   const characterImages = [
     { src: jaeminChar, name: 'jaemin' },
     { src: bongChar, name: 'bong' },
@@ -53,8 +64,9 @@ export default function GameBoard() {
   const [serverPaddlePosition, setServerPaddlePosition] = useState(null);  // 서버에서 온 패들 위치
   const [selectedSkillId, setSelectedSkillId] = useState(null);
   const [gameReady, setGameReady] = useState(false);
-  const [status, setStatus] = useState('connecting'); // connecting | waiting | ready | disconnected
+  const [status, setStatus] = useState('connecting'); // connecting | waiting | ready | spectating | disconnected
   const sideRef = useRef(null);
+  const predictorRef = useRef(null);  // 내 패들 입력 시퀀스 / 서버 보정
   const room = roomName; // room_name 사용
   const socketRef = useRef(null);
   const gameBoardRef = useRef(null);
@@ -107,12 +119,25 @@ export default function GameBoard() {
     // 서버에 접속
     console.log("room : ", room);
     console.log("username : ", username);
-    socket.emit("join", { room, username });
+    if (spectating) {
+      socket.emit("spectate", { room });
+    } else {
+      socket.emit("join", { room, username });
+    }
+
+    socket.on("spectating", () => {
+      setStatus('spectating');
+    });
+    socket.on("spectate_failed", data => {
+      alert(data.error);
+      window.location.href = "/";
+    });
 
     // joined 이벤트
     socket.on("joined", data => {
       setSide(data.side);
       sideRef.current = data.side;
+      predictorRef.current = data.side ? createPaddlePredictor(room, data.side) : null;
       setStatus('waiting');
 
       //    핵심: 게임 시작할 때 로컬 위치 초기화
@@ -121,7 +146,7 @@ export default function GameBoard() {
     });
 
     // 게임 상태 업데이트
-    socket.on("state", data => {
+    const unsubscribeState = subscribeState(room, data => {
       setState(data);
 
       // 골대 효과 디버그 로그
@@ -134,10 +159,9 @@ export default function GameBoard() {
       //   const currentPaddle = sideRef.current === 'left' ? data.paddles.top : data.paddles.bottom;
       //   setLocalPaddlePosition(currentPaddle);
       // }
-      //핵심: 서버에서 온 패들 위치를 별도로 저장
-      if (side && data.paddles) {
-        const serverPos = side === 'left' ? data.paddles.top : data.paddles.bottom;
-        setServerPaddlePosition(serverPos);
+      //핵심: 서버가 내 입력을 모두 반영했을 때만 서버 패들 위치로 보정 (반영 전이면 로컬 예측 유지)
+      if (predictorRef.current && data.paddles) {
+        setServerPaddlePosition(predictorRef.current.reconcile(data));
       }
 
       // 스킬 상태 동기화
@@ -196,15 +220,16 @@ export default function GameBoard() {
     });
 
     return () => {
+      unsubscribeState();
       socket.disconnect();
     };
-  }, [username, room]);
+  }, [username, room, spectating]);
 
   // 서버 업데이트 throttle 함수
   const throttledServerUpdate = useCallback(
     throttle((x, y) => {
-      if (socketRef.current) {
-        socketRef.current.emit("paddle_position", { room, side, x, y });
+      if (predictorRef.current) {
+        predictorRef.current.send(x, y);
       }
     }, 16), // 약 60fps
     [room, side]
@@ -825,6 +850,27 @@ export default function GameBoard() {
             }}
           />
         )}
+        {/* 두 명이 모인 뒤 공 발사 전 카운트다운 */}
+        {state.phase === 'countdown' && (
+          <div
+            style={{
+              position: 'absolute',
+              left: 0,
+              right: 0,
+              top: '45%',
+              textAlign: 'center',
+              fontSize: '2em',
+              fontWeight: 900,
+              color: '#fff',
+              textShadow: '0 2px 8px rgba(0,0,0,0.6)',
+              zIndex: 5,
+              pointerEvents: 'none',
+              userSelect: 'none',
+            }}
+          >
+            곧 시작합니다!
+          </div>
+        )}
         {/* 점수 표시 (더 어두운 색상으로 변경) */}
         {/* 하키판 가운데 점수 표시 제거 */}
       </div>
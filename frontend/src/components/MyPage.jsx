@@ -2,7 +2,7 @@ import { useNavigate, useSearchParams } from 'react-router-dom';
 import bgm from '../assets/audio/jpop.mp3';
 import './MyPage.css';
 import { useState, useRef } from 'react';
-import socket from "../socket";
+import socket, { subscribeLobby } from "../socket";
 import { useEffect } from 'react';
 import jpop from '../assets/audio/jpop.mp3';
 import a from '../assets/audio/a.mp3';
@@ -37,18 +37,41 @@ export default function MyPage() {
   ]);
   const [selectedTab, setSelectedTab] = useState('list');
   const [selectedRoom, setSelectedRoom] = useState(null);
+  const [matching, setMatching] = useState(null); // 자동 매칭 대기 중이면 안내 문구
   const [currentTrack, setCurrentTrack] = useState(0);
   const [isPlaying, setIsPlaying] = useState(true);
   const [volume, setVolume] = useState(0.7);
   const audioRef = useRef(null);
 
   useEffect(()=>{
-    socket.on("room_updated", (roomList)=>{
+    const unsubscribeLobby = subscribeLobby((roomList)=>{
       setRoomList(roomList);
     });
     socket.on("room_create_failed", (error)=>{
       console.log(error.error);
     });
+    // 자동 매칭: 짝이 지어지면 서버가 만든 로딩 방으로 이동
+    socket.on("match_queued", (data)=>{
+      setMatching(`상대를 찾는 중... (대기 ${data.position}번째)`);
+    });
+    socket.on("match_failed", (data)=>{
+      setMatching(null);
+      alert(data.error);
+    });
+    socket.on("match_cancelled", ()=>{
+      setMatching(null);
+    });
+    socket.on("match_found", (data)=>{
+      setMatching(null);
+      navigate(`/load_game?username=${encodeURIComponent(username)}&room_name=${encodeURIComponent(data.room_name)}`);
+    });
+    return () => {
+      unsubscribeLobby();
+      socket.off("match_queued");
+      socket.off("match_failed");
+      socket.off("match_cancelled");
+      socket.off("match_found");
+    };
   }, []);
 
   // 음악 재생/일시정지/볼륨/다음/이전
@@ -258,6 +281,19 @@ export default function MyPage() {
             방만들기
         </button>
         <button style={subBtnStyle} onClick={updateRoomList}>방 업데이트</button>
+        <button
+          style={subBtnStyle}
+          onClick={() => {
+            if (matching) {
+              socket.emit("match_cancel", {});
+            } else {
+              setMatching("상대를 찾는 중...");
+              socket.emit("match_enqueue", {username: username});
+            }
+          }}>
+            {matching ? "매칭 취소" : "자동 매칭"}
+        </button>
+        {matching && <span style={{ color: '#fff', alignSelf: 'center' }}>{matching}</span>}
       </div>
 
       {/* 방 리스트 카드 영역 */}
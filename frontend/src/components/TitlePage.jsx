@@ -28,6 +28,8 @@ export default function TitlePage() {
       if (res.ok) {
         setLoginMsg("");
         navigate(`/mypage?username=${encodeURIComponent(loginId)}`);
+      } else if (res.status === 429) {
+        setLoginMsg("접속자가 많습니다. 잠시 후 다시 시도하세요");
       } else {
         setLoginMsg("없는 회원입니다");
       }
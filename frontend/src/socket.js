@@ -2,4 +2,202 @@ import { io } from "socket.io-client";
 
 const socket = io(import.meta.env.VITE_SOCKET_URL, { transports: ['websocket'] });
 
+// 델타를 현재 상태에 깊은 병합 (배열/null 은 통째로 교체)
+function applyDelta(target, delta) {
+  const out = { ...target };
+  for (const [key, value] of Object.entries(delta)) {
+    if (value && typeof value === 'object' && !Array.isArray(value)
+        && out[key] && typeof out[key] === 'object' && !Array.isArray(out[key])) {
+      out[key] = applyDelta(out[key], value);
+    } else {
+      out[key] = value;
+    }
+  }
+  return out;
+}
+
+// 바이너리 상태 프레임 ("state_bin") - backend/state_codec.py 의 레이아웃과 반드시 같아야 함
+const FRAME_VERSION = 2;
+const FRAME_SIZE = 58;
+const RATIO_SCALE = 256;
+const FLAG_BLIND_TOP_CIRCLE = 1 << 0;
+const FLAG_BLIND_TOP_RECT = 1 << 1;
+const FLAG_BLIND_BOTTOM_CIRCLE = 1 << 2;
+const FLAG_BLIND_BOTTOM_RECT = 1 << 3;
+const PHASE_SHIFT = 4;  // flags 비트 4~6: 방 상태
+const PHASES = ['waiting', 'countdown', 'playing', 'paused', 'finished'];
+
+function blindFromFlags(flags, circleFlag, rectFlag) {
+  if (flags & circleFlag) return { shape: 'circle' };
+  if (flags & rectFlag) return { shape: 'rect' };
+  return null;
+}
+
+// ArrayBuffer(또는 Uint8Array) → { seq, state } (버전이 다르면 null)
+export function decodeStateFrame(data) {
+  const bytes = data instanceof ArrayBuffer ? new Uint8Array(data) : data;
+  if (bytes.byteLength < FRAME_SIZE) return null;
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  if (view.getUint8(0) !== FRAME_VERSION) return null;
+  const flags = view.getUint8(1);
+  return {
+    seq: view.getUint32(2, true),
+    state: {
+      phase: PHASES[(flags >> PHASE_SHIFT) & 7],
+      tick: view.getUint32(46, true),
+      ack: { top: view.getUint32(50, true), bottom: view.getUint32(54, true) },
+      ball: { x: view.getFloat32(14, true), y: view.getFloat32(18, true), timestamp: view.getFloat64(6, true) },
+      paddles: {
+        top: { x: view.getFloat32(22, true), y: view.getFloat32(26, true) },
+        bottom: { x: view.getFloat32(30, true), y: view.getFloat32(34, true) },
+      },
+      scores: { top: view.getUint16(38, true), bottom: view.getUint16(40, true) },
+      goal_width_ratio: { top: view.getUint8(42) / RATIO_SCALE, bottom: view.getUint8(43) / RATIO_SCALE },
+      blind_effect: {
+        top: blindFromFlags(flags, FLAG_BLIND_TOP_CIRCLE, FLAG_BLIND_TOP_RECT),
+        bottom: blindFromFlags(flags, FLAG_BLIND_BOTTOM_CIRCLE, FLAG_BLIND_BOTTOM_RECT),
+      },
+      skills: { top: { active: view.getUint8(44) }, bottom: { active: view.getUint8(45) } },
+    },
+  };
+}
+
+// 키프레임을 재요청한 뒤 응답이 없으면 다시 요청하기까지 기다리는 시간 (ms)
+const RESYNC_RETRY_MS = 1000;
+
+// 게임 상태 구독: 키프레임("state")과 델타("state_delta") / 바이너리("state_bin")를 합쳐 항상 전체 상태를 넘겨줌
+export function subscribeState(room, onState) {
+  let current = null;
+  let seq = null;
+  let resyncAt = null;  // 키프레임을 재요청한 시각 (받을 때까지 프레임마다 다시 보내지 않음)
+
+  const requestResync = () => {
+    current = null;
+    const now = Date.now();
+    if (resyncAt !== null && now - resyncAt < RESYNC_RETRY_MS) return;
+    resyncAt = now;
+    socket.emit("state_resync", { room });
+  };
+
+  const handleState = (frame) => {
+    const { seq: frameSeq, key, ...state } = frame;
+    current = state;
+    resyncAt = null;
+    if (frameSeq !== undefined) seq = frameSeq;
+    onState(current);
+  };
+
+  const handleDelta = (frame) => {
+    const { seq: frameSeq, base, ...delta } = frame;
+    if (current === null || base !== seq) {
+      // 시퀀스가 끊김 → 서버에 키프레임 재요청
+      requestResync();
+      return;
+    }
+    current = applyDelta(current, delta);
+    seq = frameSeq;
+    onState(current);
+  };
+
+  const handleBinary = (data) => {
+    const frame = decodeStateFrame(data);
+    if (frame === null || current === null) {
+      // 모르는 버전이거나 키프레임(스킬 목록)을 아직 못 받음
+      requestResync();
+      return;
+    }
+    // 바이너리 프레임은 매번 전체 동적 상태라 시퀀스가 끊겨도 그대로 적용
+    current = applyDelta(current, frame.state);
+    seq = frame.seq;
+    onState(current);
+  };
+
+  socket.on("state", handleState);
+  socket.on("state_delta", handleDelta);
+  socket.on("state_bin", handleBinary);
+  return () => {
+    socket.off("state", handleState);
+    socket.off("state_delta", handleDelta);
+    socket.off("state_bin", handleBinary);
+  };
+}
+
+// ─────────── 내 패들 예측 / 서버 보정 ───────────
+// 입력마다 시퀀스 번호를 붙여 보내고, 서버가 상태 프레임의 ack 로 "여기까지 반영했다"고 알려주면
+// 그 이전 입력은 버린다. 아직 반영되지 않은 입력이 남아 있으면 내 패들은 로컬 예측(마지막 입력)을 그대로 쓰고,
+// 모두 반영됐을 때만 서버 위치를 기준으로 보정한다.
+// 입력에는 화면에 보이던 서버 틱도 붙여서, 서버가 그 시점으로 되감아 패들 충돌을 판정할 수 있게 한다 (지연 보상).
+export function createPaddlePredictor(room, side) {
+  const key = side === 'left' ? 'top' : 'bottom';
+  // 재접속 후 이전 세션의 ack 와 겹치지 않도록 임의의 번호에서 시작
+  let seq = Math.floor(Math.random() * 0x3fffffff);
+  let pending = [];
+  let tick;  // 마지막으로 받은 상태 프레임의 서버 틱
+
+  return {
+    // 절대 위치 입력 전송 (보낸 입력은 ack 가 올 때까지 보관)
+    send(x, y) {
+      seq += 1;
+      pending.push({ seq, x, y });
+      socket.emit("paddle_position", { room, side, x, y, seq, tick });
+    },
+    // 상태 프레임을 받을 때마다 호출. 반영 대기 중인 입력이 있으면 null, 없으면 서버 기준 위치
+    reconcile(state) {
+      if (state.tick !== undefined) tick = state.tick;
+      const ack = state.ack ? state.ack[key] : undefined;
+      if (ack === undefined) return state.paddles ? state.paddles[key] : null;  // 구버전 서버
+      pending = pending.filter(input => input.seq > ack);
+      return pending.length ? null : state.paddles[key];
+    },
+  };
+}
+
+// ─────────── 로비 방 목록 ───────────
+// 접속 시 받은 스냅샷에 room_added / room_changed / room_removed 델타를 버전 순서대로 적용
+const lobby = { version: null, rooms: new Map(), listeners: new Set() };
+
+function notifyLobby() {
+  const rooms = Array.from(lobby.rooms.values());
+  lobby.listeners.forEach(listener => listener(rooms));
+}
+
+function applyLobbyDelta(payload, apply) {
+  if (lobby.version === null || payload.version !== lobby.version + 1) {
+    // 델타가 빠졌으면 스냅샷을 다시 받음
+    if (lobby.version !== null && payload.version <= lobby.version) return;
+    socket.emit("room_snapshot_request");
+    return;
+  }
+  apply();
+  lobby.version = payload.version;
+  notifyLobby();
+}
+
+socket.on("room_snapshot", (snapshot) => {
+  if (lobby.version !== null && snapshot.version < lobby.version) return;
+  lobby.version = snapshot.version;
+  lobby.rooms = new Map(snapshot.rooms.map(room => [room.room_name, room]));
+  notifyLobby();
+});
+socket.on("room_added", (payload) => {
+  applyLobbyDelta(payload, () => lobby.rooms.set(payload.room.room_name, payload.room));
+});
+socket.on("room_changed", (payload) => {
+  applyLobbyDelta(payload, () => lobby.rooms.set(payload.room.room_name, payload.room));
+});
+socket.on("room_removed", (payload) => {
+  applyLobbyDelta(payload, () => lobby.rooms.delete(payload.room_name));
+});
+
+// 로비 방 목록 구독: 현재 목록을 바로 넘겨주고 바뀔 때마다 다시 호출
+export function subscribeLobby(onRooms) {
+  lobby.listeners.add(onRooms);
+  if (lobby.version === null) {
+    socket.emit("room_snapshot_request");
+  } else {
+    onRooms(Array.from(lobby.rooms.values()));
+  }
+  return () => lobby.listeners.delete(onRooms);
+}
+
 export default socket;